@@ -1 +1,4 @@
 # Analyzers package
+
+# Bump when analyzer output changes, so results from older analyzers are not reused
+ANALYZER_VERSION = "1"
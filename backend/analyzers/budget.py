@@ -0,0 +1,49 @@
+import os
+import time
+import resource
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+def current_rss_bytes() -> int:
+    """Return the resident set size of this process in bytes."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Not Linux; fall back to peak RSS (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+class AnalysisBudget:
+    """Time and memory budget for a single analysis run."""
+    
+    def __init__(self, max_seconds: Optional[float] = None, max_memory_mb: Optional[int] = None):
+        self.max_seconds = max_seconds
+        self.max_memory_mb = max_memory_mb
+        self.started_at = time.monotonic()
+        self.baseline_rss = current_rss_bytes()
+        self.exhausted_reason = None
+    
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+    
+    def memory_used_mb(self) -> float:
+        """Memory grown since the budget started, in megabytes."""
+        return max(0, current_rss_bytes() - self.baseline_rss) / (1024 * 1024)
+    
+    def exhausted(self) -> bool:
+        """Check whether the time or memory budget has been used up."""
+        if self.exhausted_reason:
+            return True
+        
+        if self.max_seconds is not None and self.elapsed() > self.max_seconds:
+            self.exhausted_reason = f"Time budget of {self.max_seconds}s exceeded"
+        elif self.max_memory_mb is not None and self.memory_used_mb() > self.max_memory_mb:
+            self.exhausted_reason = f"Memory budget of {self.max_memory_mb}MB exceeded"
+        
+        if self.exhausted_reason:
+            logger.warning(f"Analysis budget exhausted: {self.exhausted_reason}")
+            return True
+        return False
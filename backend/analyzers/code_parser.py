@@ -5,39 +5,57 @@ from pathlib import Path
 from typing import Dict, List, Set, Tuple
 import logging
 import networkx as nx
+from config import get_settings
+from analyzers.duplicates import Winnower
+from analyzers.file_reader import FileReader
+from analyzers.symbols import PythonSymbolExtractor
 
 logger = logging.getLogger(__name__)
 
 class PythonAnalyzer:
     """Analyzes Python code for architectural patterns and risks."""
     
+    LANGUAGES = {'Python'}
+    EXTENSIONS = {'.py'}
+    COMMENT_PATTERN = re.compile(r"#[^\n]*")
+    
     @staticmethod
     def analyze_file(file_path: Path) -> Dict:
-        """Analyze a single Python file."""
+        """Analyze a single Python file. Returns None for binary or skipped oversized files."""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                tree = ast.parse(content)
+            content = FileReader.read_text(file_path)
+            if content is None:
+                return None
+            tree = ast.parse(content)
             
-            imports = PythonAnalyzer._extract_imports(tree)
-            functions = PythonAnalyzer._extract_functions(tree)
-            classes = PythonAnalyzer._extract_classes(tree)
-            loc = len([l for l in content.split('\n') if l.strip()])
+            imports, functions, classes = PythonAnalyzer._extract_definitions(tree)
+            loc = sum(1 for l in content.split('\n') if l.strip())
             
-            return {
+            result = {
                 'imports': imports,
                 'functions': functions,
                 'classes': classes,
                 'loc': loc,
                 'complexity': len(functions) + len(classes)
             }
+            settings = get_settings()
+            if settings.symbol_graph:
+                result['symbols'] = PythonSymbolExtractor.extract(tree)
+            if settings.duplicate_detection:
+                winnower = Winnower()
+                winnower.feed_text(content, PythonAnalyzer.COMMENT_PATTERN)
+                result['fingerprints'] = winnower.finish()
+            return result
         except Exception as e:
             logger.warning(f"Error analyzing {file_path}: {e}")
             return {'imports': [], 'functions': [], 'classes': [], 'loc': 0, 'complexity': 0}
     
     @staticmethod
-    def _extract_imports(tree: ast.AST) -> List[str]:
+    def _extract_definitions(tree: ast.AST) -> Tuple[List[str], List[str], List[str]]:
+        """Imports, function names and class names, in one walk of the tree."""
         imports = []
+        functions = []
+        classes = []
         for node in ast.walk(tree):
             if isinstance(node, ast.Import):
                 for alias in node.names:
@@ -45,46 +63,44 @@ class PythonAnalyzer:
             elif isinstance(node, ast.ImportFrom):
                 if node.module:
                     imports.append(node.module)
-        return imports
-    
-    @staticmethod
-    def _extract_functions(tree: ast.AST) -> List[str]:
-        functions = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.FunctionDef):
+            elif isinstance(node, ast.FunctionDef):
                 functions.append(node.name)
-        return functions
-    
-    @staticmethod
-    def _extract_classes(tree: ast.AST) -> List[str]:
-        classes = []
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
+            elif isinstance(node, ast.ClassDef):
                 classes.append(node.name)
-        return classes
+        return imports, functions, classes
 
 class JavaScriptAnalyzer:
     """Analyzes JavaScript/TypeScript code for architectural patterns and risks."""
     
+    LANGUAGES = {'JavaScript', 'TypeScript'}
+    EXTENSIONS = {'.js', '.jsx', '.ts', '.tsx'}
+    COMMENT_PATTERN = re.compile(r"//[^\n]*|/\*[\s\S]*?\*/")
+    
     @staticmethod
     def analyze_file(file_path: Path) -> Dict:
-        """Analyze a single JavaScript/TypeScript file."""
+        """Analyze a single JavaScript/TypeScript file. Returns None for binary or skipped oversized files."""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            content = FileReader.read_text(file_path)
+            if content is None:
+                return None
             
             imports = JavaScriptAnalyzer._extract_imports(content)
             exports = JavaScriptAnalyzer._extract_exports(content)
             functions = JavaScriptAnalyzer._extract_functions(content)
-            loc = len([l for l in content.split('\n') if l.strip()])
+            loc = sum(1 for l in content.split('\n') if l.strip())
             
-            return {
+            result = {
                 'imports': imports,
                 'exports': exports,
                 'functions': functions,
                 'loc': loc,
                 'complexity': len(functions)
             }
+            if get_settings().duplicate_detection:
+                winnower = Winnower()
+                winnower.feed_text(content, JavaScriptAnalyzer.COMMENT_PATTERN)
+                result['fingerprints'] = winnower.finish()
+            return result
         except Exception as e:
             logger.warning(f"Error analyzing {file_path}: {e}")
             return {'imports': [], 'exports': [], 'functions': [], 'loc': 0, 'complexity': 0}
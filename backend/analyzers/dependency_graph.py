@@ -1,76 +1,234 @@
 import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 import logging
 import networkx as nx
-from analyzers.code_parser import PythonAnalyzer, JavaScriptAnalyzer
+from analyzers.budget import AnalysisBudget
+from analyzers.duplicates import CloneIndex
+from analyzers.file_record import FileRecord
+from analyzers.parse_cache import ParseCache
+from analyzers.registry import extensions_for_language, get_analyzer
+from analyzers.symbols import SymbolGraph
 
 logger = logging.getLogger(__name__)
 
+def _analyze_path(file_path: Path, ext: str, parse_cache: Optional[ParseCache]) -> Tuple[Optional[Dict], bool]:
+    """Analyze a file with the analyzer registered for its extension. Returns (analysis, whether it was cached)."""
+    analyzer = get_analyzer(ext)
+    if not analyzer:
+        return None, False
+    if parse_cache is None:
+        return analyzer.analyze_file(file_path), False
+    return parse_cache.analyze(file_path, analyzer)
+
+def _analyze_batch(files: List[Tuple[str, str]], parse_cache: Optional[ParseCache]) -> List[Tuple[Optional[Dict], bool]]:
+    """Analyze (file_path, ext) pairs in a parse worker process."""
+    return [_analyze_path(Path(file_path), ext, parse_cache) for file_path, ext in files]
+
 class DependencyGraphBuilder:
     """Builds dependency graph for multi-file code understanding."""
     
-    def __init__(self, repo_path: Path, primary_language: str):
+    SKIP_DIRS = {
+        '.git', 'node_modules', '__pycache__', '.venv', 'venv',
+        'build', 'dist', '.next', 'coverage'
+    }
+    
+    # Directories analyzed last, and summarized first when a budget runs out
+    PERIPHERAL_DIRS = {
+        'test', 'tests', '__tests__', 'spec', 'examples', 'example', 'samples',
+        'docs', 'scripts', 'fixtures', 'benchmarks', 'vendor', 'third_party'
+    }
+    
+    # Average bytes per line, used to estimate LOC of summarized files
+    BYTES_PER_LINE_ESTIMATE = 40
+    
+    # Files sent to a parse worker at a time, and batches in flight per worker
+    PARSE_BATCH = 64
+    BATCHES_PER_WORKER = 2
+    
+    def __init__(
+        self,
+        repo_path: Path,
+        primary_language: str,
+        budget: Optional[AnalysisBudget] = None,
+        compact: bool = False,
+        workers: int = 1,
+        parse_cache: Optional[ParseCache] = None
+    ):
         self.repo_path = repo_path
         self.primary_language = primary_language
+        self.budget = budget
+        self.compact = compact
+        # Parse worker processes; 1 parses in this process
+        self.workers = workers
+        self.parse_cache = parse_cache
+        self.extensions = extensions_for_language(primary_language)
         self.graph = nx.DiGraph()
-        self.file_info = {}
+        # One FileRecord per analyzed file; graph nodes carry no attributes of their own
+        self.file_info: Dict[str, FileRecord] = {}
+        # Directory-level summaries of files skipped after the budget ran out
+        self.coarse_dirs = {}
+        self._module_index = None
+        # Function-level call graph, when analyzers collected symbols
+        self.symbol_graph: Optional[SymbolGraph] = None
+        # Clone clusters, when analyzers fingerprinted files
+        self.clones: Optional[CloneIndex] = None
+        self.built = False
+        # Timings and counts of the last build, for instrumentation
+        self.stats = {}
     
     def build_graph(self) -> nx.DiGraph:
         """Build dependency graph for the repository."""
-        # First pass: analyze all files
-        for root, dirs, files in os.walk(self.repo_path):
-            dirs[:] = [d for d in dirs if d not in {
-                '.git', 'node_modules', '__pycache__', '.venv', 'venv',
-                'build', 'dist', '.next', 'coverage'
-            }]
+        parse_start = time.perf_counter()
+        files_parsed = 0
+        bytes_read = 0
+        cache_hits = 0
+        
+        # First pass: analyze files in walk order, as the walk yields them
+        for relative_path, file_path, analysis, cached in self._analyze_files():
+            files_parsed += 1
+            cache_hits += cached
+            try:
+                bytes_read += file_path.stat().st_size
+            except OSError:
+                pass
             
-            for file in files:
-                file_path = Path(root) / file
-                ext = file_path.suffix.lower()
-                
-                if self._should_analyze_file(ext):
-                    relative_path = file_path.relative_to(self.repo_path)
-                    analysis = self._analyze_file(file_path, ext)
-                    
-                    if analysis:
-                        self.file_info[str(relative_path)] = analysis
-                        self.graph.add_node(
-                            str(relative_path),
-                            **analysis
-                        )
+            if analysis:
+                # Compact records drop function, class and symbol names
+                self.graph.add_node(relative_path)
+                self.file_info[relative_path] = FileRecord.from_analysis(analysis, self.compact)
+        
+        edges_start = time.perf_counter()
         
         # Second pass: build edges based on imports
         self._build_edges()
+        edges_end = time.perf_counter()
+        
+        # Function-level calls resolve through the file edges, from symbols collected while parsing
+        self.symbol_graph = SymbolGraph.build(self.graph, self.file_info)
+        symbols_end = time.perf_counter()
+        
+        # Fingerprints are only needed for the index; dropping them keeps records small afterwards
+        self.clones = CloneIndex.build(list(self.file_info), self.file_info)
+        if self.clones is not None:
+            for info in self.file_info.values():
+                info.fingerprints = None
+        self.built = True
+        
+        self.stats = {
+            'parse_seconds': edges_start - parse_start,
+            'edge_resolution_seconds': edges_end - edges_start,
+            'files_parsed': files_parsed,
+            'bytes_read': bytes_read,
+            'edges': self.graph.number_of_edges()
+        }
+        if self.parse_cache is not None:
+            self.stats['parse_cache_hits'] = cache_hits
+        if self.symbol_graph is not None:
+            self.stats['symbol_graph_seconds'] = symbols_end - edges_end
+            self.stats['symbols'] = len(self.symbol_graph)
+            self.stats['call_edges'] = len(self.symbol_graph.edges)
+        if self.clones is not None:
+            self.stats['duplicate_detection_seconds'] = time.perf_counter() - symbols_end
+            self.stats['fingerprints'] = self.clones.fingerprints
+            self.stats['clone_clusters'] = len(self.clones)
         
         return self.graph
     
+    @property
+    def degraded(self) -> Optional[Dict]:
+        """Describe what was summarized instead of analyzed, if anything."""
+        if not self.coarse_dirs:
+            return None
+        return {
+            'reason': self.budget.exhausted_reason if self.budget else None,
+            'directories': self.coarse_dirs
+        }
+    
+    def _analyze_files(self) -> Iterator[Tuple[str, Path, Optional[Dict], bool]]:
+        """
+        Yield (relative_path, file_path, analysis, cached) for every analyzed file, in walk order.
+        Files reached after the budget ran out are summarized instead. With several workers,
+        batches of files are parsed in worker processes, a bounded number in flight, so the
+        budget is still checked as the walk advances.
+        """
+        files = self._iter_source_files()
+        if self.workers <= 1:
+            for relative_path, file_path, ext in files:
+                if self.budget and self.budget.exhausted():
+                    self._summarize_file(relative_path, file_path)
+                    continue
+                yield (relative_path, file_path, *_analyze_path(file_path, ext, self.parse_cache))
+            return
+        
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for batch in iter(lambda: list(islice(files, self.PARSE_BATCH)), []):
+                if self.budget and self.budget.exhausted():
+                    for relative_path, file_path, _ in batch:
+                        self._summarize_file(relative_path, file_path)
+                    continue
+                future = executor.submit(_analyze_batch, [(str(f), ext) for _, f, ext in batch], self.parse_cache)
+                pending.append((batch, future))
+                while len(pending) > self.workers * self.BATCHES_PER_WORKER:
+                    yield from self._batch_results(*pending.popleft())
+            while pending:
+                yield from self._batch_results(*pending.popleft())
+    
+    @staticmethod
+    def _batch_results(batch: List[Tuple[str, Path, str]], future) -> Iterator[Tuple[str, Path, Optional[Dict], bool]]:
+        for (relative_path, file_path, _), (analysis, cached) in zip(batch, future.result()):
+            yield relative_path, file_path, analysis, cached
+    
+    def _iter_source_files(self) -> Iterator[Tuple[str, Path, str]]:
+        """
+        Yield (relative_path, file_path, ext) for analyzable files.
+        With a budget, peripheral directories are walked last.
+        """
+        deferred = []
+        roots = [self.repo_path]
+        
+        while roots:
+            for root, dirs, files in os.walk(roots.pop(0)):
+                dirs[:] = [d for d in dirs if d not in self.SKIP_DIRS]
+                
+                peripheral = [d for d in dirs if d.lower() in self.PERIPHERAL_DIRS] if self.budget else []
+                if peripheral:
+                    deferred.extend(Path(root) / d for d in peripheral)
+                    dirs[:] = [d for d in dirs if d not in peripheral]
+                
+                for file in files:
+                    file_path = Path(root) / file
+                    ext = file_path.suffix.lower()
+                    
+                    if self._should_analyze_file(ext):
+                        yield str(file_path.relative_to(self.repo_path)), file_path, ext
+            
+            if not roots:
+                roots, deferred = deferred, []
+    
+    def _summarize_file(self, relative_path: str, file_path: Path):
+        """Fold a file into its directory summary without parsing it."""
+        directory = str(Path(relative_path).parent)
+        summary = self.coarse_dirs.setdefault(directory, {'files': 0, 'approx_loc': 0})
+        summary['files'] += 1
+        try:
+            summary['approx_loc'] += file_path.stat().st_size // self.BYTES_PER_LINE_ESTIMATE
+        except OSError:
+            pass
+    
     def _should_analyze_file(self, ext: str) -> bool:
         """Check if file should be analyzed."""
-        python_exts = {'.py'}
-        js_exts = {'.js', '.jsx', '.ts', '.tsx'}
-        
-        if 'python' in self.primary_language.lower():
-            return ext in python_exts
-        elif 'javascript' in self.primary_language.lower() or 'typescript' in self.primary_language.lower():
-            return ext in js_exts
-        else:
-            return ext in python_exts or ext in js_exts
-    
-    def _analyze_file(self, file_path: Path, ext: str) -> Dict:
-        """Analyze a file based on its extension."""
-        if ext == '.py':
-            return PythonAnalyzer.analyze_file(file_path)
-        elif ext in {'.js', '.jsx', '.ts', '.tsx'}:
-            return JavaScriptAnalyzer.analyze_file(file_path)
-        return None
+        return ext in self.extensions
     
     def _build_edges(self):
         """Build edges between files based on imports."""
         for file_path, info in self.file_info.items():
-            imports = info.get('imports', [])
-            
-            for imp in imports:
+            for imp in info.imports:
                 # Try to resolve import to actual file
                 target_file = self._resolve_import(file_path, imp)
                 if target_file and target_file in self.file_info:
@@ -78,6 +236,11 @@ class DependencyGraphBuilder:
     
     def _resolve_import(self, source_file: str, import_name: str) -> str:
         """Resolve import to actual file path."""
+        # Line analyzers split imports into path segments in their language's syntax
+        analyzer = get_analyzer(Path(source_file).suffix.lower())
+        if hasattr(analyzer, 'import_segments'):
+            return self._resolve_segments(analyzer.import_segments(import_name))
+        
         # Simple heuristic-based resolution
         # For relative imports
         if import_name.startswith('.'):
@@ -88,12 +251,42 @@ class DependencyGraphBuilder:
         
         # For absolute imports, try to find matching file
         import_parts = import_name.replace('.', '/').replace('-', '_')
+        
+        # Compact mode resolves through a path-segment index instead of scanning every file
+        if self.compact:
+            return self._get_module_index().get(import_parts)
+        
         for file_path in self.file_info.keys():
             if import_parts in file_path:
                 return file_path
         
         return None
     
+    def _resolve_segments(self, segments: List[str]) -> Optional[str]:
+        """Resolve the longest run of import segments that names a file or package path."""
+        index = self._get_module_index()
+        min_length = min(2, len(segments))
+        
+        for length in range(len(segments), min_length - 1, -1):
+            for start in range(len(segments) - length + 1):
+                target = index.get('/'.join(segments[start:start + length]))
+                if target:
+                    return target
+        
+        return None
+    
+    def _get_module_index(self) -> Dict[str, str]:
+        """Map every module and package path suffix to the first file it matches."""
+        if self._module_index is None:
+            self._module_index = {}
+            for file_path in self.file_info.keys():
+                parts = Path(file_path).with_suffix('').parts
+                for i in range(len(parts)):
+                    self._module_index.setdefault('/'.join(parts[i:]), file_path)
+                    for j in range(i + 1, len(parts)):
+                        self._module_index.setdefault('/'.join(parts[i:j]), file_path)
+        return self._module_index
+    
     def get_file_metrics(self, file_path: str) -> Dict:
         """Get metrics for a specific file."""
         if file_path not in self.graph:
@@ -0,0 +1,282 @@
+import re
+import zlib
+from array import array
+from typing import Dict, List, Optional, Pattern, Tuple
+import logging
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from analyzers.file_record import FileRecord
+
+logger = logging.getLogger(__name__)
+
+# Identifiers, numbers, string literals (closed on the same line or not) and single punctuation characters
+TOKEN_PATTERN = re.compile(
+    r"[A-Za-z_$][\w$]*|\d[\w.]*|\"[^\"\\\n]*(?:\\.[^\"\\\n]*)*\"?|'[^'\\\n]*(?:\\.[^'\\\n]*)*'?|`[^`\n]*`?|[^\s\w]"
+)
+# The same tokens plus line breaks, for tokenizing a whole file at once
+TEXT_PATTERN = re.compile(TOKEN_PATTERN.pattern + r"|\n")
+
+# Kept verbatim when normalizing; every other identifier becomes one placeholder
+KEYWORDS = frozenset((
+    'if', 'else', 'elif', 'for', 'foreach', 'while', 'do', 'switch', 'case', 'default', 'match',
+    'break', 'continue', 'return', 'yield', 'await', 'async', 'try', 'catch', 'except', 'finally',
+    'throw', 'throws', 'raise', 'with', 'def', 'fn', 'fun', 'func', 'function', 'lambda', 'class',
+    'struct', 'interface', 'enum', 'trait', 'impl', 'object', 'new', 'delete', 'import', 'from',
+    'package', 'use', 'using', 'namespace', 'public', 'private', 'protected', 'static', 'final',
+    'const', 'let', 'var', 'val', 'void', 'in', 'is', 'not', 'and', 'or', 'true', 'false', 'True',
+    'False', 'None', 'null', 'nil', 'this', 'self', 'super', 'go', 'defer', 'select', 'chan', 'map'
+))
+
+# Id of the line-break token of TEXT_PATTERN; no normalized token hashes to it
+NEWLINE = 1
+
+# Raw token -> stable 32-bit id of its normalized form; cleared when it grows past MAX_CACHED_TOKENS
+_token_ids: Dict[str, int] = {'\n': NEWLINE}
+MAX_CACHED_TOKENS = 200_000
+
+def _token_id(token: str) -> int:
+    if len(_token_ids) >= MAX_CACHED_TOKENS:
+        _token_ids.clear()
+        _token_ids['\n'] = NEWLINE
+    token_id = _token_ids[token] = zlib.crc32(_normalize(token).encode())
+    return token_id
+
+def _line_breaks(match: re.Match) -> str:
+    # Removed comments keep their line breaks, so later tokens keep their line numbers
+    return '\n' * match.group().count('\n')
+
+def _normalize(token: str) -> str:
+    first = token[0]
+    if first.isalpha() or first in '_$':
+        return token if token in KEYWORDS else 'I'
+    if first.isdigit():
+        return 'N'
+    if first in '"\'`':
+        return 'S'
+    return token
+
+class FileFingerprints:
+    """
+    Winnowed fingerprints of one file: k-gram hashes with the token position of each
+    k-gram and the lines it starts and ends on, as parallel uint64 and int32 arrays.
+    """
+    
+    __slots__ = ('hashes', 'positions', 'lines', 'end_lines')
+    
+    def __init__(self, hashes: np.ndarray, positions: np.ndarray, lines: np.ndarray, end_lines: np.ndarray):
+        self.hashes = hashes
+        self.positions = positions
+        self.lines = lines
+        self.end_lines = end_lines
+    
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+class Winnower:
+    """
+    Fingerprints a file's normalized token stream as an analyzer reads it.
+    
+    Identifiers, numbers and strings are replaced by placeholders so renamed copies
+    still match. Every run of K tokens is hashed, and of each WINDOW consecutive
+    hashes the rightmost minimum is kept (winnowing): any run of at least
+    K + WINDOW - 1 tokens shared by two files yields a shared fingerprint, while
+    only about 2 / (WINDOW + 1) of the hashes are stored.
+    """
+    
+    K = 15
+    WINDOW = 10
+    BASE = np.uint64(1000003)
+    
+    # Windows reduced per step, bounding the temporary arrays on large files
+    CHUNK = 8192
+    
+    def __init__(self):
+        self.tokens = array('I')
+        self.lines = array('i')
+    
+    def feed(self, line: str, line_number: int):
+        """Add the tokens of one line of code, with comments already removed."""
+        tokens = [_token_ids.get(token) or _token_id(token) for token in TOKEN_PATTERN.findall(line)]
+        self.tokens.extend(tokens)
+        self.lines.extend([line_number] * len(tokens))
+    
+    def feed_text(self, content: str, comment_pattern: Pattern):
+        """Add a whole file, with comments matching comment_pattern removed."""
+        code = comment_pattern.sub(_line_breaks, content)
+        ids = np.array([_token_ids.get(token) or _token_id(token) for token in TEXT_PATTERN.findall(code)], dtype=np.uint32)
+        newline = ids == NEWLINE
+        lines = (np.cumsum(newline, dtype=np.int32) + 1)[~newline]
+        self.tokens.frombytes(ids[~newline].tobytes())
+        self.lines.frombytes(lines.tobytes())
+    
+    def finish(self) -> Optional[FileFingerprints]:
+        """Fingerprints of everything fed, or None if the file is shorter than one k-gram."""
+        n = len(self.tokens) - self.K + 1
+        if n < 1:
+            return None
+        
+        tokens = np.frombuffer(self.tokens, dtype=np.uint32).astype(np.uint64)
+        hashes = np.zeros(n, dtype=np.uint64)
+        # Polynomial hash of each k-gram, wrapping modulo 2^64
+        for j in range(self.K):
+            hashes = hashes * self.BASE + tokens[j:j + n]
+        
+        window = min(self.WINDOW, n)
+        windows = sliding_window_view(hashes, window)
+        positions = []
+        for start in range(0, len(windows), self.CHUNK):
+            chunk = windows[start:start + self.CHUNK]
+            rightmost = window - 1 - np.argmin(chunk[:, ::-1], axis=1)
+            positions.append(np.arange(start, start + len(chunk)) + rightmost)
+        # Neighbouring windows usually share their minimum; each position is recorded once
+        selected = np.unique(np.concatenate(positions))
+        
+        lines = np.frombuffer(self.lines, dtype=np.int32)
+        return FileFingerprints(
+            hashes[selected],
+            selected.astype(np.int32),
+            lines[selected].copy(),
+            lines[selected + self.K - 1].copy()
+        )
+
+class CloneCluster:
+    """
+    Files sharing one duplicated fragment: their paths, the matched runs of lines in
+    each as (first, last) pairs, longest first, and the fingerprints they share.
+    """
+    
+    __slots__ = ('paths', 'runs', 'shared')
+    
+    def __init__(self, paths: List[str], runs: List[List[Tuple[int, int]]], shared: int):
+        self.paths = paths
+        self.runs = runs
+        self.shared = shared
+    
+    def matched_lines(self) -> int:
+        """Lines of the longest run, in the file where that run is shortest."""
+        return min(last - first + 1 for (first, last), *_ in self.runs)
+
+class CloneIndex:
+    """
+    Clone clusters of a repository, found through an inverted index of fingerprints.
+    
+    All fingerprints are sorted by hash once, so each hash's group lists the
+    (file, line) locations sharing it. Groups found in exactly the same set of
+    files belong to one cloned fragment; sets of files sharing at least
+    MIN_SHARED_FINGERPRINTS such hashes are candidate clusters. Grouping by
+    exact file set, rather than linking files pairwise, keeps an idiom shared by
+    two files from chaining unrelated clones together. Hashes found more than
+    MAX_OCCURRENCES times are boilerplate (license headers, generated code) and are
+    ignored, which also bounds the size of a cluster.
+    
+    Within each file, a cluster's fingerprints are split into contiguous runs
+    wherever consecutive ones are more than MAX_GAP tokens apart: winnowing keeps
+    one fingerprint in every WINDOW k-grams of shared code, so a wider gap is code
+    the files do not share. Only runs of at least MIN_RUN_TOKENS count, so short
+    idioms scattered through two files are not reported as one long clone, and a
+    cluster needs such runs in at least two files.
+    """
+    
+    MIN_SHARED_FINGERPRINTS = 5
+    MAX_OCCURRENCES = 50
+    MAX_GAP = Winnower.WINDOW
+    MIN_RUN_TOKENS = 40
+    
+    def __init__(self, clusters: List[CloneCluster], fingerprints: int = 0):
+        # Strongest first; a cluster whose files all belong to a stronger one is left out
+        self.clusters = clusters
+        self.fingerprints = fingerprints
+    
+    def __len__(self) -> int:
+        return len(self.clusters)
+    
+    @staticmethod
+    def build(paths: List[str], file_info: Dict[str, FileRecord]) -> Optional["CloneIndex"]:
+        """Build from the fingerprints of each file's record. Returns None if no file has fingerprints."""
+        paths = [path for path in paths if file_info[path].fingerprints]
+        if not paths:
+            return None
+        
+        records = [file_info[path].fingerprints for path in paths]
+        hashes = np.concatenate([r.hashes for r in records])
+        files = np.repeat(np.arange(len(paths), dtype=np.int64), [len(r) for r in records])
+        positions = np.concatenate([r.positions for r in records])
+        lines = np.concatenate([r.lines for r in records])
+        end_lines = np.concatenate([r.end_lines for r in records])
+        
+        # Inverted index: locations grouped by hash, files ascending within a group
+        order = np.lexsort((files, hashes))
+        hashes, files, positions = hashes[order], files[order], positions[order]
+        lines, end_lines = lines[order], end_lines[order]
+        new_group = np.r_[True, hashes[1:] != hashes[:-1]]
+        starts = np.flatnonzero(new_group)
+        sizes = np.diff(np.r_[starts, len(hashes)])
+        group = np.cumsum(new_group) - 1
+        
+        # Each group's set of distinct files, summarized as a sum of random per-file weights
+        new_file = new_group | (files != np.r_[-1, files[:-1]])
+        distinct = np.add.reduceat(new_file.astype(np.int64), starts)
+        weights = np.random.default_rng(0).integers(1, 2 ** 63, size=len(paths), dtype=np.uint64)
+        file_set = np.add.reduceat(np.where(new_file, weights[files], np.uint64(0)), starts)
+        
+        usable = (distinct > 1) & (sizes <= CloneIndex.MAX_OCCURRENCES)
+        file_sets, cluster_of, shared = np.unique(file_set[usable], return_inverse=True, return_counts=True)
+        strong = shared >= CloneIndex.MIN_SHARED_FINGERPRINTS
+        
+        # Cluster of each location, or -1 for boilerplate, unshared and weakly shared hashes
+        group_cluster = np.full(len(starts), -1, dtype=np.int64)
+        group_cluster[usable] = np.where(strong[cluster_of], cluster_of, -1)
+        location_cluster = group_cluster[group]
+        kept = np.flatnonzero(location_cluster >= 0)
+        if not len(kept):
+            return CloneIndex([], len(hashes))
+        
+        # Contiguous runs of every (cluster, file), in token order
+        key = location_cluster[kept] * len(paths) + files[kept]
+        by_run = np.lexsort((positions[kept], key))
+        key, kept = key[by_run], kept[by_run]
+        position = positions[kept].astype(np.int64)
+        run_starts = np.flatnonzero(np.r_[True, (key[1:] != key[:-1]) | (np.diff(position) > CloneIndex.MAX_GAP)])
+        run_ends = np.r_[run_starts[1:], len(kept)]
+        run_tokens = position[run_ends - 1] + Winnower.K - position[run_starts]
+        long_runs = run_tokens >= CloneIndex.MIN_RUN_TOKENS
+        
+        run_key = key[run_starts][long_runs]
+        first_lines = np.minimum.reduceat(lines[kept], run_starts)[long_runs].tolist()
+        last_lines = np.maximum.reduceat(end_lines[kept], run_starts)[long_runs].tolist()
+        run_fingerprints = (run_ends - run_starts)[long_runs].tolist()
+        
+        # cluster -> file -> [(first, last, fingerprints)]
+        members: Dict[int, Dict[int, List[Tuple[int, int, int]]]] = {}
+        for k, first, last, count in zip(run_key.tolist(), first_lines, last_lines, run_fingerprints):
+            c, f = divmod(k, len(paths))
+            members.setdefault(c, {}).setdefault(f, []).append((first, last, count))
+        
+        # Fingerprints inside long runs, in the member file with fewest
+        matched = {
+            c: min(sum(count for _, _, count in runs) for runs in by_file.values())
+            for c, by_file in members.items() if len(by_file) > 1
+        }
+        
+        clusters = []
+        # File sets of reported clusters, by file
+        reported: Dict[int, List[frozenset]] = {}
+        for c in sorted(matched, key=lambda c: -matched[c]):
+            if matched[c] < CloneIndex.MIN_SHARED_FINGERPRINTS:
+                continue
+            file_ids = frozenset(members[c])
+            if any(file_ids <= other for other in reported.get(min(file_ids), ())):
+                continue
+            for f in file_ids:
+                reported.setdefault(f, []).append(file_ids)
+            file_order = sorted(file_ids)
+            clusters.append(CloneCluster(
+                [paths[f] for f in file_order],
+                [
+                    [(first, last) for first, last, _ in sorted(members[c][f], key=lambda run: run[0] - run[1])]
+                    for f in file_order
+                ],
+                matched[c]
+            ))
+        
+        return CloneIndex(clusters, len(hashes))
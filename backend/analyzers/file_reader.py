@@ -0,0 +1,91 @@
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+import logging
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+class FileReader:
+    """Memory-bounded file access shared by feasibility checks and analyzers."""
+    
+    CHUNK_SIZE = 64 * 1024
+    BINARY_SNIFF_BYTES = 8192
+    
+    SKIP = "skip"
+    SAMPLE = "sample"
+    
+    @staticmethod
+    def is_binary(file_path: Path) -> bool:
+        """Detect binary content from the first block: NUL bytes never appear in source text."""
+        try:
+            with open(file_path, 'rb') as f:
+                return b'\0' in f.read(FileReader.BINARY_SNIFF_BYTES)
+        except OSError:
+            return False
+    
+    @staticmethod
+    def inspect(file_path: Path, max_bytes: Optional[int] = None) -> Tuple[int, Optional[str]]:
+        """
+        Stat a file before reading it.
+        Returns (size, skip_reason); skip_reason is None when the file can be read in full.
+        """
+        try:
+            size = os.stat(file_path).st_size
+        except OSError as e:
+            return 0, f"unreadable: {e}"
+        
+        if FileReader.is_binary(file_path):
+            return size, "binary"
+        
+        max_bytes = max_bytes if max_bytes is not None else get_settings().max_analyzed_file_bytes
+        if size > max_bytes:
+            return size, "oversized"
+        
+        return size, None
+    
+    @staticmethod
+    def read_text(file_path: Path, max_bytes: Optional[int] = None) -> Optional[str]:
+        """
+        Read a source file as text, guarding against binaries and huge files.
+        Oversized files are skipped, or sampled up to max_bytes (cut at the last full line)
+        when the oversized file policy is "sample". Returns None for skipped files.
+        """
+        settings = get_settings()
+        max_bytes = max_bytes if max_bytes is not None else settings.max_analyzed_file_bytes
+        size, skip_reason = FileReader.inspect(file_path, max_bytes)
+        
+        if skip_reason == "oversized" and settings.oversized_file_policy == FileReader.SAMPLE:
+            with open(file_path, 'rb') as f:
+                sample = f.read(max_bytes)
+            logger.info(f"Sampling first {max_bytes} of {size} bytes from {file_path}")
+            return sample[:sample.rfind(b'\n') + 1].decode('utf-8', errors='ignore')
+        
+        if skip_reason:
+            logger.info(f"Skipping {file_path} ({skip_reason}, {size} bytes)")
+            return None
+        
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+    
+    @staticmethod
+    def count_loc(file_path: Path) -> Optional[int]:
+        """
+        Count non-blank lines by streaming fixed-size chunks, without decoding the file.
+        Returns None if the first block shows binary content.
+        """
+        loc = 0
+        line_has_code = False
+        
+        with open(file_path, 'rb') as f:
+            for i, chunk in enumerate(iter(lambda: f.read(FileReader.CHUNK_SIZE), b'')):
+                if i == 0 and b'\0' in chunk[:FileReader.BINARY_SNIFF_BYTES]:
+                    return None
+                pieces = chunk.split(b'\n')
+                # The first piece continues the line left open by the previous chunk
+                line_has_code = line_has_code or bool(pieces[0].strip())
+                for piece in pieces[1:]:
+                    loc += line_has_code
+                    line_has_code = bool(piece.strip())
+        
+        return loc + line_has_code
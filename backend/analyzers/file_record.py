@@ -0,0 +1,58 @@
+import sys
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+class FileRecord:
+    """
+    Analysis results of one file, kept for the life of a build.
+    
+    Analyzers return a dict per file; the builder turns it into a record with
+    fixed slots and tuples of interned names, so the many files importing 'os'
+    or defining 'main' share one string, and no per-file dict or list survives.
+    Records are held once, in DependencyGraphBuilder.file_info.
+    """
+    
+    __slots__ = ('imports', 'functions', 'classes', 'exports', 'package', 'loc', 'complexity', 'symbols', 'fingerprints')
+    
+    def __init__(
+        self,
+        imports: Tuple[str, ...] = (),
+        functions: Tuple[str, ...] = (),
+        classes: Tuple[str, ...] = (),
+        exports: Tuple[str, ...] = (),
+        package: Optional[str] = None,
+        loc: int = 0,
+        complexity: int = 0,
+        symbols=None,
+        fingerprints=None
+    ):
+        self.imports = imports
+        self.functions = functions
+        self.classes = classes
+        self.exports = exports
+        self.package = package
+        self.loc = loc
+        self.complexity = complexity
+        # FileSymbols of the file's functions, when the analyzer collected them
+        self.symbols = symbols
+        # FileFingerprints for duplicate detection, released once the clone index is built
+        self.fingerprints = fingerprints
+    
+    @staticmethod
+    def from_analysis(analysis: Dict[str, Any], compact: bool = False) -> "FileRecord":
+        """Record of an analyzer result. Compact records keep only imports, loc, complexity and fingerprints."""
+        record = FileRecord(
+            imports=_interned(analysis.get('imports')),
+            loc=analysis.get('loc') or 0,
+            complexity=analysis.get('complexity') or 0,
+            fingerprints=analysis.get('fingerprints')
+        )
+        if not compact:
+            record.functions = _interned(analysis.get('functions'))
+            record.classes = _interned(analysis.get('classes'))
+            record.exports = _interned(analysis.get('exports'))
+            record.package = analysis.get('package') and sys.intern(analysis['package'])
+            record.symbols = analysis.get('symbols')
+        return record
+
+def _interned(values: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    return tuple(map(sys.intern, values)) if values else ()
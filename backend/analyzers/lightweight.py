@@ -0,0 +1,289 @@
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Pattern, Set
+import logging
+from config import get_settings
+from analyzers.duplicates import Winnower
+from analyzers.file_reader import FileReader
+
+logger = logging.getLogger(__name__)
+
+class LineAnalyzer:
+    """
+    Base for analyzers that stream a file line by line with bounded memory.
+    Subclasses declare comment syntax and per-line patterns.
+    """
+    
+    LANGUAGES: Set[str] = set()
+    EXTENSIONS: Set[str] = set()
+    
+    LINE_COMMENTS = ('//',)
+    BLOCK_COMMENT = ('/*', '*/')
+    
+    PACKAGE_PATTERN: Optional[Pattern] = None
+    IMPORT_PATTERNS: List[Pattern] = []
+    CLASS_PATTERNS: List[Pattern] = []
+    FUNCTION_PATTERNS: List[Pattern] = []
+    
+    # Separator between segments of an import path, used for import resolution
+    IMPORT_SEPARATOR = '.'
+    
+    # Bounds that keep memory flat on minified or generated files
+    MAX_LINE_LENGTH = 4096
+    MAX_NAMES = 5000
+    
+    @classmethod
+    def analyze_file(cls, file_path: Path) -> Dict:
+        """Analyze a single file one line at a time. Returns None for binary or skipped oversized files."""
+        result = {'imports': [], 'functions': [], 'classes': [], 'package': None, 'loc': 0, 'complexity': 0}
+        state = {'in_block_comment': False}
+        
+        try:
+            settings = get_settings()
+            size, skip_reason = FileReader.inspect(file_path, settings.max_analyzed_file_bytes)
+            remaining = None
+            if skip_reason == "oversized" and settings.oversized_file_policy == FileReader.SAMPLE:
+                remaining = settings.max_analyzed_file_bytes
+            elif skip_reason:
+                logger.info(f"Skipping {file_path} ({skip_reason}, {size} bytes)")
+                return None
+            
+            # Fingerprinted from the same comment-stripped lines, so the file is read once
+            winnower = Winnower() if settings.duplicate_detection else None
+            line_number = 1
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                for raw_line in iter(lambda: f.readline(cls.MAX_LINE_LENGTH), ''):
+                    # Sampling an oversized file stops after the first max_analyzed_file_bytes
+                    if remaining is not None:
+                        remaining -= len(raw_line)
+                        if remaining < 0:
+                            break
+                    
+                    # Lines longer than MAX_LINE_LENGTH arrive in several reads
+                    current_line = line_number
+                    line_number += raw_line.endswith('\n')
+                    
+                    line = cls._strip_comments(raw_line, state)
+                    if not line.strip():
+                        continue
+                    
+                    result['loc'] += 1
+                    cls._match_line(line, state, result)
+                    if winnower:
+                        winnower.feed(line, current_line)
+            
+            result['complexity'] = len(result['functions']) + len(result['classes'])
+            if winnower:
+                result['fingerprints'] = winnower.finish()
+            return result
+        except Exception as e:
+            logger.warning(f"Error analyzing {file_path}: {e}")
+            return {'imports': [], 'functions': [], 'classes': [], 'package': None, 'loc': 0, 'complexity': 0}
+    
+    @classmethod
+    def _strip_comments(cls, line: str, state: Dict) -> str:
+        """Remove comments from a line, tracking block comments across lines."""
+        block_start, block_end = cls.BLOCK_COMMENT if cls.BLOCK_COMMENT else (None, None)
+        code = ''
+        
+        while line:
+            if state['in_block_comment']:
+                end = line.find(block_end)
+                if end == -1:
+                    return code
+                line = line[end + len(block_end):]
+                state['in_block_comment'] = False
+                continue
+            
+            cut = len(line)
+            for marker in cls.LINE_COMMENTS:
+                pos = line.find(marker)
+                if pos != -1:
+                    cut = min(cut, pos)
+            
+            start = line.find(block_start) if block_start else -1
+            if start != -1 and start < cut:
+                code += line[:start]
+                line = line[start + len(block_start):]
+                state['in_block_comment'] = True
+                continue
+            
+            return code + line[:cut]
+        
+        return code
+    
+    @classmethod
+    def _match_line(cls, line: str, state: Dict, result: Dict):
+        """Extract package, imports and declarations from one code line."""
+        if cls.PACKAGE_PATTERN and result['package'] is None:
+            match = cls.PACKAGE_PATTERN.match(line)
+            if match:
+                result['package'] = match.group(1)
+                return
+        
+        for key, patterns in (
+            ('imports', cls.IMPORT_PATTERNS),
+            ('classes', cls.CLASS_PATTERNS),
+            ('functions', cls.FUNCTION_PATTERNS)
+        ):
+            for pattern in patterns:
+                for match in pattern.finditer(line):
+                    if len(result[key]) < cls.MAX_NAMES:
+                        result[key].append(match.group(1))
+    
+    @classmethod
+    def import_segments(cls, import_name: str) -> List[str]:
+        """Split an import into path segments for resolution against repository files."""
+        return [part for part in import_name.split(cls.IMPORT_SEPARATOR) if part and part != '*']
+
+# Java-style modifiers that introduce a method declaration
+_JVM_METHOD = re.compile(
+    r"^\s*(?:(?:public|protected|private|static|final|abstract|synchronized|native|default|override|internal|virtual|async)\s+)+"
+    r"[\w<>\[\],.?\s]*?\b(\w+)\s*\("
+)
+
+class JavaAnalyzer(LineAnalyzer):
+    LANGUAGES = {'Java'}
+    EXTENSIONS = {'.java'}
+    PACKAGE_PATTERN = re.compile(r"^\s*package\s+([\w.]+)\s*;")
+    IMPORT_PATTERNS = [re.compile(r"^\s*import\s+(?:static\s+)?([\w.]+?)(?:\.\*)?\s*;")]
+    CLASS_PATTERNS = [re.compile(r"\b(?:class|interface|enum|record)\s+([A-Z]\w*)")]
+    FUNCTION_PATTERNS = [_JVM_METHOD]
+
+class KotlinAnalyzer(LineAnalyzer):
+    LANGUAGES = {'Kotlin'}
+    EXTENSIONS = {'.kt'}
+    PACKAGE_PATTERN = re.compile(r"^\s*package\s+([\w.]+)")
+    IMPORT_PATTERNS = [re.compile(r"^\s*import\s+([\w.]+?)(?:\.\*)?(?:\s+as\s+\w+)?\s*$")]
+    CLASS_PATTERNS = [re.compile(r"\b(?:class|interface|object)\s+([A-Z]\w*)")]
+    FUNCTION_PATTERNS = [re.compile(r"\bfun\s+(?:<[^>]*>\s*)?(?:[\w.]+\.)?(\w+)\s*\(")]
+
+class ScalaAnalyzer(LineAnalyzer):
+    LANGUAGES = {'Scala'}
+    EXTENSIONS = {'.scala'}
+    PACKAGE_PATTERN = re.compile(r"^\s*package\s+([\w.]+)")
+    IMPORT_PATTERNS = [re.compile(r"^\s*import\s+([\w.]+?)(?:\.[_*{].*)?\s*$")]
+    CLASS_PATTERNS = [re.compile(r"\b(?:class|trait|object)\s+([A-Z]\w*)")]
+    FUNCTION_PATTERNS = [re.compile(r"\bdef\s+(\w+)")]
+
+class CSharpAnalyzer(LineAnalyzer):
+    LANGUAGES = {'C#'}
+    EXTENSIONS = {'.cs'}
+    PACKAGE_PATTERN = re.compile(r"^\s*namespace\s+([\w.]+)")
+    IMPORT_PATTERNS = [re.compile(r"^\s*(?:global\s+)?using\s+(?:static\s+)?([\w.]+)\s*;")]
+    CLASS_PATTERNS = [re.compile(r"\b(?:class|interface|struct|enum|record)\s+([A-Z]\w*)")]
+    FUNCTION_PATTERNS = [_JVM_METHOD]
+
+class GoAnalyzer(LineAnalyzer):
+    LANGUAGES = {'Go'}
+    EXTENSIONS = {'.go'}
+    PACKAGE_PATTERN = re.compile(r"^\s*package\s+(\w+)")
+    IMPORT_PATTERNS = [re.compile(r"^\s*import\s+(?:[\w.]+\s+)?\"([^\"]+)\"")]
+    CLASS_PATTERNS = [re.compile(r"^\s*type\s+(\w+)\s+(?:struct|interface)\b")]
+    FUNCTION_PATTERNS = [re.compile(r"^\s*func\s+(?:\([^)]*\)\s*)?(\w+)")]
+    IMPORT_SEPARATOR = '/'
+    
+    _BLOCK_START = re.compile(r"^\s*import\s*\(\s*$")
+    _BLOCK_ENTRY = re.compile(r"^\s*(?:[\w.]+\s+)?\"([^\"]+)\"")
+    
+    @classmethod
+    def _match_line(cls, line: str, state: Dict, result: Dict):
+        # Grouped imports span lines: import ( "fmt"; alias "x/y" )
+        if state.get('in_import_block'):
+            if line.strip().startswith(')'):
+                state['in_import_block'] = False
+            else:
+                match = cls._BLOCK_ENTRY.match(line)
+                if match and len(result['imports']) < cls.MAX_NAMES:
+                    result['imports'].append(match.group(1))
+            return
+        
+        if cls._BLOCK_START.match(line):
+            state['in_import_block'] = True
+            return
+        
+        super()._match_line(line, state, result)
+
+class RustAnalyzer(LineAnalyzer):
+    LANGUAGES = {'Rust'}
+    EXTENSIONS = {'.rs'}
+    IMPORT_PATTERNS = [
+        re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?use\s+([\w:]+?)(?:::\{.*|::\*)?\s*;"),
+        re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?mod\s+(\w+)\s*;")
+    ]
+    CLASS_PATTERNS = [re.compile(r"\b(?:struct|enum|trait)\s+([A-Z]\w*)")]
+    FUNCTION_PATTERNS = [re.compile(r"\bfn\s+(\w+)")]
+    IMPORT_SEPARATOR = '::'
+    
+    _USE_BLOCK_START = re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?use\s+([\w:]+?)::\{[^;]*$")
+    
+    @classmethod
+    def _match_line(cls, line: str, state: Dict, result: Dict):
+        # rustfmt wraps long imports: use a::b::{ C, D, }; is recorded as a::b, like on one line
+        if state.get('in_use_block'):
+            if ';' in line:
+                state['in_use_block'] = False
+            return
+        
+        match = cls._USE_BLOCK_START.match(line)
+        if match:
+            if len(result['imports']) < cls.MAX_NAMES:
+                result['imports'].append(match.group(1))
+            state['in_use_block'] = True
+            return
+        
+        super()._match_line(line, state, result)
+    
+    @classmethod
+    def import_segments(cls, import_name: str) -> List[str]:
+        return [
+            part for part in super().import_segments(import_name)
+            if part not in {'crate', 'self', 'super'}
+        ]
+
+class CAnalyzer(LineAnalyzer):
+    LANGUAGES = {'C', 'C++', 'C/C++'}
+    EXTENSIONS = {'.c', '.cpp', '.h'}
+    IMPORT_PATTERNS = [re.compile(r"^\s*#\s*include\s*[<\"]([^>\"]+)[>\"]")]
+    CLASS_PATTERNS = [re.compile(r"^\s*(?:template\s*<[^>]*>\s*)?(?:class|struct)\s+(\w+)\s*(?:final\s*)?(?:[:{]|$)")]
+    FUNCTION_PATTERNS = [re.compile(
+        r"^(?!\s*(?:if|for|while|switch|return|else|do|case)\b)[A-Za-z_][\w:<>,*&\s]*?[\s*&](\w+)\s*\([^;]*\)\s*(?:const\s*)?(?:\{.*)?$"
+    )]
+    IMPORT_SEPARATOR = '/'
+    
+    @classmethod
+    def import_segments(cls, import_name: str) -> List[str]:
+        return super().import_segments(str(Path(import_name).with_suffix('')))
+
+class RubyAnalyzer(LineAnalyzer):
+    LANGUAGES = {'Ruby'}
+    EXTENSIONS = {'.rb'}
+    LINE_COMMENTS = ('#',)
+    BLOCK_COMMENT = ('=begin', '=end')
+    IMPORT_PATTERNS = [re.compile(r"^\s*require(?:_relative)?\s*\(?\s*['\"]([^'\"]+)['\"]")]
+    CLASS_PATTERNS = [re.compile(r"^\s*(?:class|module)\s+([\w:]+)")]
+    FUNCTION_PATTERNS = [re.compile(r"^\s*def\s+(?:self\.)?(\w+[?!=]?)")]
+    IMPORT_SEPARATOR = '/'
+
+class PHPAnalyzer(LineAnalyzer):
+    LANGUAGES = {'PHP'}
+    EXTENSIONS = {'.php'}
+    LINE_COMMENTS = ('//', '#')
+    PACKAGE_PATTERN = re.compile(r"^\s*namespace\s+([\w\\]+)\s*;")
+    IMPORT_PATTERNS = [
+        re.compile(r"^\s*use\s+([\w\\]+)"),
+        re.compile(r"\b(?:require|include)(?:_once)?\s*\(?\s*['\"]([^'\"]+)\.php['\"]")
+    ]
+    CLASS_PATTERNS = [re.compile(r"\b(?:class|interface|trait)\s+([A-Z]\w*)")]
+    FUNCTION_PATTERNS = [re.compile(r"\bfunction\s+(\w+)")]
+    
+    @classmethod
+    def import_segments(cls, import_name: str) -> List[str]:
+        return [part for part in re.split(r"[\\/]", import_name) if part and part not in {'.', '..'}]
+
+class SwiftAnalyzer(LineAnalyzer):
+    LANGUAGES = {'Swift'}
+    EXTENSIONS = {'.swift'}
+    IMPORT_PATTERNS = [re.compile(r"^\s*(?:@testable\s+)?import\s+(?:(?:class|struct|enum|protocol|func)\s+)?([\w.]+)")]
+    CLASS_PATTERNS = [re.compile(r"\b(?:class|struct|protocol|enum|extension)\s+([A-Z]\w*)")]
+    FUNCTION_PATTERNS = [re.compile(r"\bfunc\s+(\w+)")]
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Type
+import logging
+from analyzers import ANALYZER_VERSION
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+class ParseCache:
+    """
+    On-disk cache of analyzer results, keyed by file content.
+    
+    Entries are found by a hash of the file's bytes, the analyzer and every setting
+    that changes its output, so a fresh checkout of unchanged files hits the cache
+    however its timestamps look, and a changed setting or ANALYZER_VERSION misses.
+    Each entry is its own pickle file, written to a temporary name and renamed into
+    place, so parallel parse workers can share a directory without locking.
+    Files above max_analyzed_file_bytes bypass the cache; analyzers skip or sample them cheaply.
+    """
+    
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        settings = get_settings()
+        # Everything besides the content that changes an analyzer's result
+        self.salt = "|".join(map(str, (
+            ANALYZER_VERSION,
+            settings.symbol_graph,
+            settings.duplicate_detection,
+            settings.max_analyzed_file_bytes,
+            settings.oversized_file_policy
+        )))
+        self.max_bytes = settings.max_analyzed_file_bytes
+    
+    def analyze(self, file_path: Path, analyzer: Type) -> Tuple[Optional[Dict], bool]:
+        """Analyze a file with analyzer, or load its cached result. Returns (analysis, whether it was cached)."""
+        try:
+            if file_path.stat().st_size > self.max_bytes:
+                return analyzer.analyze_file(file_path), False
+            digest = hashlib.blake2b(file_path.read_bytes(), digest_size=20, key=self._key(analyzer)).hexdigest()
+        except OSError:
+            return analyzer.analyze_file(file_path), False
+        
+        entry = self.directory / digest[:2] / digest
+        try:
+            with open(entry, 'rb') as f:
+                return pickle.load(f), True
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parse cache entry {entry}: {e}")
+        
+        analysis = analyzer.analyze_file(file_path)
+        self._store(entry, analysis)
+        return analysis, False
+    
+    def _key(self, analyzer: Type) -> bytes:
+        return hashlib.blake2b(f"{self.salt}|{analyzer.__name__}".encode(), digest_size=32).digest()
+    
+    def _store(self, entry: Path, analysis: Optional[Dict]):
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            fd, temporary = tempfile.mkstemp(dir=entry.parent, prefix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(analysis, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, entry)
+        except OSError as e:
+            # A read-only or full cache directory only costs the speed-up
+            logger.warning(f"Could not write parse cache entry {entry}: {e}")
@@ -0,0 +1,94 @@
+import zlib
+from typing import Dict, Any, List, Iterable, Tuple
+import logging
+import networkx as nx
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class ReachabilityIndex:
+    """
+    Transitive dependents of every file, precomputed so blast-radius queries never walk the graph.
+    
+    Files in a dependency cycle all reach each other, so the closure is computed over
+    strongly connected components. Components are numbered in topological order and
+    each keeps a packed bitset row of the components that transitively depend on it;
+    a query ORs the rows of the changed files' components and unpacks the result.
+    """
+    
+    def __init__(self, paths: List[str], component_of: np.ndarray, rows: np.ndarray):
+        self.paths = paths
+        self.component_of = component_of
+        self.rows = rows
+        self.index = {path: i for i, path in enumerate(paths)}
+        self._path_array = np.array(paths, dtype=object)
+    
+    @property
+    def component_count(self) -> int:
+        return self.rows.shape[0]
+    
+    @staticmethod
+    def build(paths: List[str], edges: np.ndarray) -> "ReachabilityIndex":
+        """
+        Build the index from file paths and an (n, 2) array of (importer, imported) path indexes.
+        """
+        graph = nx.DiGraph()
+        graph.add_nodes_from(range(len(paths)))
+        graph.add_edges_from(map(tuple, np.asarray(edges).reshape(-1, 2).tolist()))
+        condensed = nx.condensation(graph)
+        
+        # Renumber components so every importer comes before what it imports
+        order = {c: i for i, c in enumerate(nx.topological_sort(condensed))}
+        component_of = np.empty(len(paths), dtype=np.uint32)
+        for node, c in condensed.graph['mapping'].items():
+            component_of[node] = order[c]
+        
+        k = len(order)
+        rows = np.zeros((k, (k + 7) // 8), dtype=np.uint8)
+        for c in nx.topological_sort(condensed):
+            preds = np.fromiter((order[p] for p in condensed.predecessors(c)), dtype=np.int64)
+            if not len(preds):
+                continue
+            # Importers were finished first, so their rows already hold their own dependents
+            row = rows[order[c]]
+            np.bitwise_or.reduce(rows[preds], axis=0, out=row)
+            np.bitwise_or.at(row, preds >> 3, (1 << (preds & 7)).astype(np.uint8))
+        
+        return ReachabilityIndex(list(paths), component_of, rows)
+    
+    def dependents(self, paths: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        Files that transitively depend on any of paths, excluding paths themselves.
+        Returns (dependents, unknown_paths), dependents in path order.
+        """
+        paths = list(paths)
+        files = np.fromiter((self.index[p] for p in paths if p in self.index), dtype=np.int64)
+        unknown = [p for p in paths if p not in self.index]
+        if not len(files):
+            return [], unknown
+        
+        components = self.component_of[files]
+        row = np.bitwise_or.reduce(self.rows[components], axis=0)
+        selected = np.unpackbits(row, count=self.component_count, bitorder='little').astype(bool)
+        # Other members of a changed file's cycle depend on it too
+        selected[components] = True
+        
+        mask = selected[self.component_of]
+        mask[files] = False
+        return self._path_array[mask].tolist(), unknown
+    
+    def to_document(self) -> Dict[str, Any]:
+        """Serialize for storage: component ids as uint32 bytes, bitset rows zlib-compressed."""
+        return {
+            'paths': self.paths,
+            'component_count': self.component_count,
+            'components': self.component_of.astype('<u4').tobytes(),
+            'rows': zlib.compress(self.rows.tobytes(), 6)
+        }
+    
+    @staticmethod
+    def from_document(document: Dict[str, Any]) -> "ReachabilityIndex":
+        k = document['component_count']
+        rows = np.frombuffer(zlib.decompress(document['rows']), dtype=np.uint8).reshape(k, (k + 7) // 8)
+        component_of = np.frombuffer(document['components'], dtype='<u4').astype(np.uint32)
+        return ReachabilityIndex(document['paths'], component_of, rows)
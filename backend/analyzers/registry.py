@@ -0,0 +1,36 @@
+from typing import Dict, Optional, Set, Type
+from analyzers.code_parser import PythonAnalyzer, JavaScriptAnalyzer
+from analyzers.lightweight import (
+    JavaAnalyzer, KotlinAnalyzer, ScalaAnalyzer, CSharpAnalyzer, GoAnalyzer,
+    RustAnalyzer, CAnalyzer, RubyAnalyzer, PHPAnalyzer, SwiftAnalyzer
+)
+
+# File extension -> analyzer class
+ANALYZERS: Dict[str, Type] = {}
+
+# Analyzed when no analyzer handles the primary language (e.g. HTML or Shell), as before other languages had analyzers
+FALLBACK_EXTENSIONS = frozenset(PythonAnalyzer.EXTENSIONS | JavaScriptAnalyzer.EXTENSIONS)
+
+def register_analyzer(analyzer: Type) -> Type:
+    """Register an analyzer for each of its EXTENSIONS."""
+    for ext in analyzer.EXTENSIONS:
+        ANALYZERS[ext] = analyzer
+    return analyzer
+
+def get_analyzer(ext: str) -> Optional[Type]:
+    return ANALYZERS.get(ext)
+
+def extensions_for_language(language: str) -> Set[str]:
+    """Extensions handled by analyzers for a language, or FALLBACK_EXTENSIONS if none match."""
+    language = (language or '').lower()
+    matching = {
+        ext for ext, analyzer in ANALYZERS.items()
+        if language in {lang.lower() for lang in analyzer.LANGUAGES}
+    }
+    return matching or set(FALLBACK_EXTENSIONS)
+
+for _analyzer in (
+    PythonAnalyzer, JavaScriptAnalyzer, JavaAnalyzer, KotlinAnalyzer, ScalaAnalyzer,
+    CSharpAnalyzer, GoAnalyzer, RustAnalyzer, CAnalyzer, RubyAnalyzer, PHPAnalyzer, SwiftAnalyzer
+):
+    register_analyzer(_analyzer)
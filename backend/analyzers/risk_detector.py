@@ -1,70 +1,226 @@
 from pathlib import Path
-from typing import List, Dict, Any
+from itertools import islice
+from typing import Iterable, List, Dict, Any, Optional
+import time
 import logging
 import networkx as nx
+import numpy as np
+from analyzers.budget import AnalysisBudget
 from analyzers.dependency_graph import DependencyGraphBuilder
+from analyzers.duplicates import CloneIndex
+from analyzers.parse_cache import ParseCache
+from analyzers.rules import RuleEngine
+from analyzers.symbols import SymbolGraph
 from models.analysis import Risk, RiskLevel
 
 logger = logging.getLogger(__name__)
 
 class RiskDetector:
-    """Detects engineering risks in code structure."""
+    """
+    Detects engineering risks in code structure.
+    File-level rules are declared in analyzers.rules and evaluated by its RuleEngine;
+    cycles, function-level and duplicate risks are detected here.
+    """
     
-    # Thresholds for risk detection
-    GOD_FILE_LOC = 500
-    GOD_FILE_COMPLEXITY = 30
-    HIGH_FAN_IN = 10
-    HIGH_FAN_OUT = 15
+    # Only the worst functions of each kind are reported
+    MAX_SYMBOL_RISKS = 20
     
-    def __init__(self, repo_path: Path, primary_language: str):
+    # Duplicated code clusters reported
+    MAX_DUPLICATE_RISKS = 20
+    
+    def __init__(
+        self,
+        repo_path: Path,
+        primary_language: str,
+        budget: Optional[AnalysisBudget] = None,
+        compact: bool = False,
+        max_cycles: Optional[int] = None,
+        graph_builder: Optional[DependencyGraphBuilder] = None,
+        thresholds: Optional[Dict[str, float]] = None,
+        workers: int = 1,
+        parse_cache: Optional[ParseCache] = None
+    ):
         self.repo_path = repo_path
         self.primary_language = primary_language
-        self.graph_builder = DependencyGraphBuilder(repo_path, primary_language)
+        self.max_cycles = max_cycles
+        # Defaults overridden by the organization's thresholds (see rules.load_thresholds)
+        self.engine = RuleEngine(thresholds=thresholds)
+        self.thresholds = self.engine.thresholds
+        self.graph_builder = graph_builder or DependencyGraphBuilder(
+            repo_path, primary_language, budget=budget, compact=compact, workers=workers, parse_cache=parse_cache
+        )
         self.graph = None
         self.file_info = None
+        self.paths = []
+        # (importer, imported) index pairs into self.paths
+        self.edges = np.empty((0, 2), dtype=np.int64)
+        self.metrics = {}
+        # Timings and counts of the last run, for instrumentation
+        self.stats = {}
     
     def detect_risks(self) -> List[Risk]:
         """Detect all risks in the repository."""
-        # Build dependency graph
-        self.graph = self.graph_builder.build_graph()
+        # Build dependency graph, unless the builder was handed in already built
+        if not self.graph_builder.built:
+            self.graph_builder.build_graph()
+        self.graph = self.graph_builder.graph
         self.file_info = self.graph_builder.file_info
         
-        risks = []
+        rules_start = time.perf_counter()
+        self.metrics = self._compute_metrics()
+        
+        # File-level rules, in one pass over the metric columns
+        risks = self.engine.evaluate({'paths': self.paths, **self.metrics}, {
+            'dependents': lambda i: ', '.join(islice(self.graph.predecessors(self.paths[i]), 5)),
+            'dependencies': lambda i: ', '.join(islice(self.graph.successors(self.paths[i]), 5))
+        })
+        
+        cycles_start = time.perf_counter()
+        cycle_risks = self._detect_circular_dependencies()
+        risks.extend(cycle_risks)
+        cycles_end = time.perf_counter()
+        
+        if self.graph_builder.symbol_graph is not None:
+            risks.extend(self._detect_god_functions(self.graph_builder.symbol_graph))
+            risks.extend(self._detect_hot_symbols(self.graph_builder.symbol_graph))
         
-        # Detect various risk patterns
-        risks.extend(self._detect_god_files())
-        risks.extend(self._detect_circular_dependencies())
-        risks.extend(self._detect_high_coupling())
-        risks.extend(self._detect_missing_abstraction())
+        if self.graph_builder.clones is not None:
+            risks.extend(self._detect_duplicates(self.graph_builder.clones))
+        
+        self.stats = {
+            'cycle_detection_seconds': cycles_end - cycles_start,
+            'risk_rules_seconds': (cycles_start - rules_start) + (time.perf_counter() - cycles_end),
+            'cycles': len(cycle_risks)
+        }
         
         # Sort by confidence (high to low)
         risks.sort(key=lambda r: ['high', 'medium', 'low'].index(r.confidence))
         
         return risks
     
-    def _detect_god_files(self) -> List[Risk]:
-        """Detect files that are too large or complex (God Files)."""
+    def file_metrics(self) -> Dict[str, List]:
+        """Per-file metric columns of the last run as plain lists, with the file paths under 'paths'."""
+        return {
+            'paths': list(self.paths),
+            **{name: column.tolist() for name, column in self.metrics.items()}
+        }
+    
+    def _compute_metrics(self) -> Dict[str, np.ndarray]:
+        """Compute per-file metric columns once, indexed like self.paths."""
+        self.paths = list(self.graph.nodes())
+        n = len(self.paths)
+        index = {path: i for i, path in enumerate(self.paths)}
+        
+        loc = np.fromiter(
+            (self.file_info[p].loc for p in self.paths), dtype=np.int64, count=n
+        )
+        complexity = np.fromiter(
+            (self.file_info[p].complexity for p in self.paths), dtype=np.int64, count=n
+        )
+        
+        # Degrees are counted from flat edge index arrays instead of per-node lookups
+        self.edges = np.array(
+            [(index[u], index[v]) for u, v in self.graph.edges()], dtype=np.int64
+        ).reshape(-1, 2)
+        fan_out = np.bincount(self.edges[:, 0], minlength=n)
+        fan_in = np.bincount(self.edges[:, 1], minlength=n)
+        
+        return {
+            'loc': loc,
+            'complexity': complexity,
+            'fan_in': fan_in,
+            'fan_out': fan_out
+        }
+    
+    @staticmethod
+    def detect_hotspots(
+        file_metrics: Dict[str, List],
+        days: int,
+        thresholds: Optional[Dict[str, float]] = None
+    ) -> List[Risk]:
+        """
+        Detect large or complex files that also change often.
+        file_metrics needs a 'commits' column from the history stage; 'churned_lines' is optional.
+        Files are ranked by commits times complexity.
+        """
+        churned_lines = file_metrics.get('churned_lines')
+        return RuleEngine(thresholds=thresholds).evaluate(file_metrics, {
+            'days': lambda i: days,
+            'churn': lambda i: f" ({churned_lines[i]} lines added or removed)" if churned_lines is not None else ""
+        }, requires='commits')
+    
+    def _detect_god_functions(self, symbols: SymbolGraph) -> List[Risk]:
+        """Detect functions that are too long or have too many branches."""
         risks = []
+        mask = (symbols.complexity > self.thresholds['god_function_complexity']) | (symbols.loc > self.thresholds['god_function_loc'])
+        flagged = np.flatnonzero(mask)
+        flagged = flagged[np.argsort(-symbols.complexity[flagged], kind='stable')][:self.MAX_SYMBOL_RISKS]
         
-        for file_path, info in self.file_info.items():
-            loc = info.get('loc', 0)
-            complexity = info.get('complexity', 0)
-            
-            if loc > self.GOD_FILE_LOC or complexity > self.GOD_FILE_COMPLEXITY:
-                metrics = self.graph_builder.get_file_metrics(file_path)
-                
-                risk = Risk(
-                    title="God File Detected",
-                    files=[file_path],
-                    evidence=f"File has {loc} lines of code and complexity score of {complexity}. "
-                             f"Depended on by {metrics.get('in_degree', 0)} other files.",
-                    why_it_matters="Large, complex files are harder to maintain, test, and understand. "
-                                   "They often violate Single Responsibility Principle and become bottlenecks for changes.",
-                    suggested_action=f"Consider breaking {file_path} into smaller, focused modules. "
-                                    "Extract related functionality into separate files with clear responsibilities.",
-                    confidence=RiskLevel.HIGH if loc > self.GOD_FILE_LOC * 1.5 else RiskLevel.MEDIUM
-                )
-                risks.append(risk)
+        for i in flagged:
+            file_path = symbols.file_of(i)
+            both = symbols.complexity[i] > self.thresholds['god_function_complexity'] and symbols.loc[i] > self.thresholds['god_function_loc']
+            risks.append(Risk(
+                title="God Function Detected",
+                files=[file_path],
+                evidence=f"Function {symbols.names[i]} in {file_path} spans {symbols.loc[i]} lines "
+                         f"with cyclomatic complexity {symbols.complexity[i]}.",
+                why_it_matters="Long functions with many branches are hard to test exhaustively; "
+                               "each branch is a path that can hide a bug, and changes to one path risk the others.",
+                suggested_action=f"Split {symbols.names[i]} into smaller functions, each handling one case. "
+                                "Replace long conditional chains with lookup tables or polymorphism.",
+                confidence=RiskLevel.HIGH if both else RiskLevel.MEDIUM
+            ))
+        
+        return risks
+    
+    def _detect_hot_symbols(self, symbols: SymbolGraph) -> List[Risk]:
+        """Detect functions called from many other files."""
+        risks = []
+        caller_files = symbols.caller_files()
+        flagged = np.flatnonzero(caller_files >= self.thresholds['hot_symbol_caller_files'])
+        flagged = flagged[np.argsort(-caller_files[flagged], kind='stable')][:self.MAX_SYMBOL_RISKS]
+        
+        for i in flagged:
+            file_path = symbols.file_of(i)
+            calling_files = list(dict.fromkeys(symbols.file_of(c) for c in symbols.callers(i)))
+            calling_files = [f for f in calling_files if f != file_path]
+            risks.append(Risk(
+                title="Hot Symbol (Widely Called Function)",
+                files=[file_path],
+                evidence=f"Function {symbols.names[i]} in {file_path} is called from {caller_files[i]} other files, "
+                         f"including {', '.join(calling_files[:5])}. Its complexity is {symbols.complexity[i]}.",
+                why_it_matters="A change to the signature or behaviour of a widely called function "
+                               "ripples into every caller, even when the file around it rarely changes.",
+                suggested_action=f"Keep {symbols.names[i]}'s contract narrow and well tested. "
+                                "Consider putting it behind an interface, so callers do not depend on its implementation.",
+                confidence=RiskLevel.HIGH if symbols.complexity[i] > self.thresholds['god_function_complexity'] else RiskLevel.MEDIUM
+            ))
+        
+        return risks
+    
+    def _detect_duplicates(self, clones: CloneIndex) -> List[Risk]:
+        """Detect clusters of files sharing duplicated code."""
+        risks = []
+        
+        for cluster in clones.clusters[:self.MAX_DUPLICATE_RISKS]:
+            # Longest matched run of the first two files
+            (path_a, path_b), (runs_a, runs_b) = cluster.paths[:2], cluster.runs[:2]
+            (first_a, last_a), (first_b, last_b) = runs_a[0], runs_b[0]
+            others = len(cluster.paths) - 2
+            more = f", and in {others} more file{'s' if others > 1 else ''}" if others else ""
+            runs = max(len(file_runs) for file_runs in cluster.runs)
+            separate = f" The files match in {runs} separate runs; the longest is shown." if runs > 1 else ""
+            risks.append(Risk(
+                title="Duplicated Code",
+                files=cluster.paths,
+                evidence=f"{len(cluster.paths)} files share duplicated code ({cluster.shared} matching fingerprints): "
+                         f"lines {first_a}-{last_a} of {path_a} match lines {first_b}-{last_b} of {path_b}{more}.{separate}",
+                why_it_matters="Copies of the same logic drift apart: a bug fixed or a rule changed in one copy "
+                               "stays broken in the others, and every change has to be made several times.",
+                suggested_action="Extract the duplicated code into one shared function or module and call it "
+                                "from each place, parameterising the parts that differ.",
+                confidence=RiskLevel.HIGH if cluster.matched_lines() >= self.thresholds['duplicate_high_lines'] else RiskLevel.MEDIUM
+            ))
         
         return risks
     
@@ -73,7 +229,8 @@ class RiskDetector:
         risks = []
         
         try:
-            cycles = list(nx.simple_cycles(self.graph))
+            # Cycle enumeration is exponential in the worst case, so large runs cap it
+            cycles = self.canonical_cycles(islice(nx.simple_cycles(self.graph), self.max_cycles))
             
             for cycle in cycles:
                 if len(cycle) > 1:  # Ignore self-loops
@@ -93,72 +250,14 @@ class RiskDetector:
         
         return risks
     
-    def _detect_high_coupling(self) -> List[Risk]:
-        """Detect files with high fan-in (many dependents) or fan-out (many dependencies)."""
-        risks = []
-        
-        for file_path in self.graph.nodes():
-            metrics = self.graph_builder.get_file_metrics(file_path)
-            in_degree = metrics.get('in_degree', 0)
-            out_degree = metrics.get('out_degree', 0)
-            
-            if in_degree >= self.HIGH_FAN_IN:
-                risk = Risk(
-                    title="High Fan-In (Central File)",
-                    files=[file_path],
-                    evidence=f"File is depended upon by {in_degree} other files. "
-                             f"Dependents: {', '.join(metrics.get('dependents', [])[:5])}",
-                    why_it_matters="Files with many dependents become critical change points. "
-                                   "Any modification ripples through many parts of the codebase, increasing risk of bugs.",
-                    suggested_action="Consider if this file has too many responsibilities. "
-                                    "Extract interfaces or abstract base classes to reduce direct coupling.",
-                    confidence=RiskLevel.MEDIUM
-                )
-                risks.append(risk)
-            
-            if out_degree >= self.HIGH_FAN_OUT:
-                risk = Risk(
-                    title="High Fan-Out (Excessive Dependencies)",
-                    files=[file_path],
-                    evidence=f"File depends on {out_degree} other files. "
-                             f"Dependencies: {', '.join(metrics.get('dependencies', [])[:5])}",
-                    why_it_matters="Files with many dependencies are fragile and hard to test. "
-                                   "They're tightly coupled to many parts of the system.",
-                    suggested_action="Apply dependency injection or use facade pattern to reduce direct dependencies. "
-                                    "Consider if this file is doing too much.",
-                    confidence=RiskLevel.MEDIUM
-                )
-                risks.append(risk)
-        
-        return risks
-    
-    def _detect_missing_abstraction(self) -> List[Risk]:
-        """Detect potential missing abstraction layers."""
-        risks = []
-        
-        # Look for files that might be mixing concerns
-        # Heuristic: files with both database and HTTP/API related code
-        db_keywords = {'database', 'db', 'model', 'schema', 'query', 'mongo', 'sql'}
-        api_keywords = {'api', 'route', 'endpoint', 'controller', 'handler', 'view'}
-        
-        for file_path, info in self.file_info.items():
-            file_lower = file_path.lower()
-            
-            # Check if file name suggests mixing layers
-            has_db = any(kw in file_lower for kw in db_keywords)
-            has_api = any(kw in file_lower for kw in api_keywords)
-            
-            if has_db and has_api:
-                risk = Risk(
-                    title="Potential Layer Violation",
-                    files=[file_path],
-                    evidence=f"File appears to mix database and API concerns based on naming and structure.",
-                    why_it_matters="Mixing architectural layers (e.g., database access in controllers) "
-                                   "makes code harder to test and violates separation of concerns.",
-                    suggested_action="Introduce a service layer to separate business logic from controllers. "
-                                    "Keep database access in dedicated repository or data access files.",
-                    confidence=RiskLevel.LOW
-                )
-                risks.append(risk)
-        
-        return risks
+    @staticmethod
+    def canonical_cycles(cycles: Iterable[List[str]]) -> List[List[str]]:
+        """
+        Cycles rotated to start at their smallest node, in sorted order. simple_cycles
+        picks the start and order by graph and hash order, which varies between runs.
+        """
+        rotated = []
+        for cycle in cycles:
+            start = cycle.index(min(cycle))
+            rotated.append(cycle[start:] + cycle[:start])
+        return sorted(rotated)
@@ -0,0 +1,283 @@
+import json
+import os
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+import numpy as np
+from config import get_settings
+from models.analysis import Risk, RiskLevel
+
+logger = logging.getLogger(__name__)
+
+# Thresholds of the built-in rules; a rules file overrides them for everyone or per organization
+DEFAULT_THRESHOLDS: Dict[str, float] = {
+    'god_file_loc': 500,
+    'god_file_complexity': 30,
+    'high_fan_in': 10,
+    'high_fan_out': 15,
+    'hotspot_min_commits': 5,
+    'hotspot_min_complexity': 10,
+    'hotspot_min_loc': 200,
+    'god_function_complexity': 15,
+    'god_function_loc': 100,
+    'hot_symbol_caller_files': 8,
+    'duplicate_high_lines': 50
+}
+
+# Path keywords of the layer-violation heuristic
+DB_KEYWORDS = ('database', 'db', 'model', 'schema', 'query', 'mongo', 'sql')
+API_KEYWORDS = ('api', 'route', 'endpoint', 'controller', 'handler', 'view')
+
+Columns = Dict[str, np.ndarray]
+Predicate = Callable[[Columns, Dict[str, float]], np.ndarray]
+
+class Rule:
+    """
+    A file-level risk rule, declared as data.
+    
+    metrics names the per-file columns the rule reads; when and high_when map those
+    columns and the thresholds to boolean masks over all files at once. evidence and
+    suggested_action are str.format templates over the file's path, its metric values
+    and the fields the caller provides as context. Ranked rules report only the
+    limit files scoring highest.
+    """
+    
+    __slots__ = (
+        'name', 'category', 'title', 'metrics', 'when', 'evidence', 'why_it_matters',
+        'suggested_action', 'confidence', 'high_when', 'rank', 'limit', 'fields'
+    )
+    
+    def __init__(
+        self,
+        name: str,
+        category: str,
+        title: str,
+        metrics: Tuple[str, ...],
+        when: Predicate,
+        evidence: str,
+        why_it_matters: str,
+        suggested_action: str,
+        confidence: RiskLevel = RiskLevel.MEDIUM,
+        high_when: Optional[Predicate] = None,
+        rank: Optional[Callable[[Columns], np.ndarray]] = None,
+        limit: Optional[int] = None
+    ):
+        self.name = name
+        self.category = category
+        self.title = title
+        self.metrics = metrics
+        self.when = when
+        self.evidence = evidence
+        self.why_it_matters = why_it_matters
+        self.suggested_action = suggested_action
+        self.confidence = confidence
+        self.high_when = high_when
+        self.rank = rank
+        self.limit = limit
+        # Template fields, so only the values a rule prints are looked up
+        self.fields = frozenset(
+            field for template in (evidence, suggested_action)
+            for _, field, _, _ in Formatter().parse(template) if field
+        )
+
+def _path_contains(paths: np.ndarray, keywords: Sequence[str]) -> np.ndarray:
+    lowered = np.char.lower(paths.astype(str))
+    return np.logical_or.reduce([np.char.find(lowered, keyword) >= 0 for keyword in keywords])
+
+def _god_file(m: Columns, t: Dict[str, float]) -> np.ndarray:
+    return (m['loc'] > t['god_file_loc']) | (m['complexity'] > t['god_file_complexity'])
+
+RULES: List[Rule] = [
+    Rule(
+        name='god_file',
+        category='size',
+        title="God File Detected",
+        metrics=('loc', 'complexity', 'fan_in'),
+        when=_god_file,
+        high_when=lambda m, t: m['loc'] > t['god_file_loc'] * 1.5,
+        evidence="File has {loc} lines of code and complexity score of {complexity}. "
+                 "Depended on by {fan_in} other files.",
+        why_it_matters="Large, complex files are harder to maintain, test, and understand. "
+                       "They often violate Single Responsibility Principle and become bottlenecks for changes.",
+        suggested_action="Consider breaking {path} into smaller, focused modules. "
+                         "Extract related functionality into separate files with clear responsibilities."
+    ),
+    Rule(
+        name='high_fan_in',
+        category='coupling',
+        title="High Fan-In (Central File)",
+        metrics=('fan_in',),
+        when=lambda m, t: m['fan_in'] >= t['high_fan_in'],
+        evidence="File is depended upon by {fan_in} other files. Dependents: {dependents}",
+        why_it_matters="Files with many dependents become critical change points. "
+                       "Any modification ripples through many parts of the codebase, increasing risk of bugs.",
+        suggested_action="Consider if this file has too many responsibilities. "
+                         "Extract interfaces or abstract base classes to reduce direct coupling."
+    ),
+    Rule(
+        name='high_fan_out',
+        category='coupling',
+        title="High Fan-Out (Excessive Dependencies)",
+        metrics=('fan_out',),
+        when=lambda m, t: m['fan_out'] >= t['high_fan_out'],
+        evidence="File depends on {fan_out} other files. Dependencies: {dependencies}",
+        why_it_matters="Files with many dependencies are fragile and hard to test. "
+                       "They're tightly coupled to many parts of the system.",
+        suggested_action="Apply dependency injection or use facade pattern to reduce direct dependencies. "
+                         "Consider if this file is doing too much."
+    ),
+    Rule(
+        name='layer_violation',
+        category='layering',
+        title="Potential Layer Violation",
+        metrics=('paths',),
+        # Heuristic: file names suggesting both database and HTTP/API code
+        when=lambda m, t: _path_contains(m['paths'], DB_KEYWORDS) & _path_contains(m['paths'], API_KEYWORDS),
+        evidence="File appears to mix database and API concerns based on naming and structure.",
+        why_it_matters="Mixing architectural layers (e.g., database access in controllers) "
+                       "makes code harder to test and violates separation of concerns.",
+        suggested_action="Introduce a service layer to separate business logic from controllers. "
+                         "Keep database access in dedicated repository or data access files.",
+        confidence=RiskLevel.LOW
+    ),
+    Rule(
+        name='change_hotspot',
+        category='change',
+        title="Change Hotspot",
+        metrics=('commits', 'loc', 'complexity', 'fan_in'),
+        when=lambda m, t: (m['commits'] >= t['hotspot_min_commits']) & (
+            (m['complexity'] >= t['hotspot_min_complexity']) | (m['loc'] >= t['hotspot_min_loc'])
+        ),
+        high_when=_god_file,
+        rank=lambda m: m['commits'] * np.maximum(m['complexity'], 1),
+        limit=20,
+        evidence="File changed in {commits} commits over the last {days} days{churn}. "
+                 "It has {loc} lines of code, complexity score of {complexity} "
+                 "and is depended on by {fan_in} other files.",
+        why_it_matters="Complex code that changes often is where defects concentrate: every change "
+                       "has to be made correctly in code that is hard to understand, and it keeps happening.",
+        suggested_action="Prioritise {path} for refactoring and test coverage. "
+                         "Look for the responsibilities that keep changing and extract them into their own modules."
+    )
+]
+
+class RuleEngine:
+    """
+    Evaluates file-level rules together over metric columns computed once.
+    
+    A rule's predicate is a vectorized expression over whole columns, so adding a
+    rule adds one array operation rather than another Python loop over the files.
+    The resulting masks are walked in a single pass over the flagged files, and
+    only those are formatted, with context fields such as neighbour lists resolved
+    for them alone. Rules whose metrics are missing are skipped. Risks come out
+    grouped by category in rule order, by file (or by rank) within a category.
+    """
+    
+    def __init__(self, rules: Sequence[Rule] = RULES, thresholds: Optional[Dict[str, float]] = None):
+        self.rules = list(rules)
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    
+    def evaluate(
+        self,
+        columns: Dict[str, Sequence],
+        context: Optional[Dict[str, Callable[[int], Any]]] = None,
+        requires: Optional[str] = None
+    ) -> List[Risk]:
+        """
+        Risks of the files in columns['paths'], with metric columns indexed like it.
+        context maps extra template fields to functions of the file index. With requires,
+        only rules reading that metric run, for columns added after a first evaluation.
+        """
+        paths = list(columns['paths'])
+        context = context or {}
+        rules = [
+            rule for rule in self.rules
+            if all(metric in columns for metric in rule.metrics)
+            and (requires is None or requires in rule.metrics)
+        ]
+        if not rules or not paths:
+            return []
+        
+        m = {name: np.asarray(column) for name, column in columns.items()}
+        masks = np.zeros((len(rules), len(paths)), dtype=bool)
+        high = []
+        # Rank of each reported file, for ranked rules
+        positions: Dict[int, Dict[int, int]] = {}
+        for r, rule in enumerate(rules):
+            mask = rule.when(m, self.thresholds)
+            if rule.rank is not None:
+                flagged = np.flatnonzero(mask)
+                flagged = flagged[np.argsort(-rule.rank(m)[flagged], kind='stable')][:rule.limit]
+                mask = np.zeros(len(paths), dtype=bool)
+                mask[flagged] = True
+                positions[r] = {i: position for position, i in enumerate(flagged.tolist())}
+            masks[r] = mask
+            high.append(rule.high_when(m, self.thresholds) if rule.high_when else None)
+        
+        by_category: Dict[str, List[Tuple[int, Risk]]] = {rule.category: [] for rule in rules}
+        for i in np.flatnonzero(masks.any(axis=0)).tolist():
+            values: Dict[str, Any] = {'path': paths[i]}
+            for r in np.flatnonzero(masks[:, i]).tolist():
+                rule = rules[r]
+                for field in rule.fields - values.keys():
+                    values[field] = m[field][i] if field in m else context[field](i)
+                by_category[rule.category].append((positions[r][i] if r in positions else 0, Risk(
+                    title=rule.title,
+                    files=[paths[i]],
+                    evidence=rule.evidence.format(**values),
+                    why_it_matters=rule.why_it_matters,
+                    suggested_action=rule.suggested_action.format(**values),
+                    confidence=RiskLevel.HIGH if high[r] is not None and high[r][i] else rule.confidence
+                )))
+        
+        risks = []
+        for ranked in by_category.values():
+            ranked.sort(key=lambda item: item[0])
+            risks.extend(risk for _, risk in ranked)
+        return risks
+
+def load_thresholds(organization: Optional[str] = None) -> Dict[str, float]:
+    """
+    Thresholds for an organization: the defaults, overridden by the rules file's
+    "thresholds" and then by its "organizations" entry for the organization, if any.
+    """
+    path = get_settings().risk_rules_file
+    if not path:
+        return dict(DEFAULT_THRESHOLDS)
+    
+    try:
+        config = _read_rules_file(path, os.path.getmtime(path))
+    except (OSError, ValueError, AttributeError) as e:
+        # AttributeError: a section that is not an object
+        logger.warning(f"Ignoring risk rules file {path}: {str(e)}")
+        return dict(DEFAULT_THRESHOLDS)
+    
+    thresholds = {**DEFAULT_THRESHOLDS, **config['thresholds']}
+    if organization:
+        thresholds.update(config['organizations'].get(organization.lower(), {}))
+    return thresholds
+
+@lru_cache(maxsize=4)
+def _read_rules_file(path: str, mtime: float) -> Dict[str, Any]:
+    # Keyed by modification time, so an edited file is picked up without a restart
+    with open(path) as f:
+        config = json.load(f)
+    return {
+        'thresholds': _valid_thresholds(config.get('thresholds') or {}, path),
+        'organizations': {
+            name.lower(): _valid_thresholds(overrides, f"{path} ({name})")
+            for name, overrides in (config.get('organizations') or {}).items()
+        }
+    }
+
+def _valid_thresholds(overrides: Dict[str, Any], source: str) -> Dict[str, float]:
+    valid = {}
+    for name, value in overrides.items():
+        if name not in DEFAULT_THRESHOLDS:
+            logger.warning(f"Unknown risk threshold {name} in {source}")
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            logger.warning(f"Risk threshold {name} in {source} is not a number: {value!r}")
+        else:
+            valid[name] = value
+    return valid
@@ -0,0 +1,188 @@
+import ast
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple
+import logging
+import networkx as nx
+import numpy as np
+from analyzers.file_record import FileRecord
+
+logger = logging.getLogger(__name__)
+
+# Nodes that add a branch to the cyclomatic complexity of the function containing them
+BRANCH_NODES = (ast.If, ast.For, ast.AsyncFor, ast.While, ast.IfExp, ast.ExceptHandler, ast.match_case)
+
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+class FileSymbols:
+    """
+    Functions of one file in parallel columns: names and called names as tuples of
+    interned strings, complexity, loc and call_from as int32 arrays.
+    call_from[i] indexes names; call_to[i] is the name it calls.
+    """
+    
+    __slots__ = ('names', 'complexity', 'loc', 'call_from', 'call_to')
+    
+    def __init__(self, names: Tuple[str, ...], complexity: array, loc: array, call_from: array, call_to: Tuple[str, ...]):
+        self.names = names
+        self.complexity = complexity
+        self.loc = loc
+        self.call_from = call_from
+        self.call_to = call_to
+    
+    def __len__(self) -> int:
+        return len(self.names)
+
+class PythonSymbolExtractor:
+    """
+    Collects the functions of a parsed Python module: qualified name, cyclomatic
+    complexity, line count and the distinct names each one calls.
+    Works on the tree PythonAnalyzer already parsed; memory is bounded per file.
+    """
+    
+    MAX_SYMBOLS = 2000
+    MAX_CALLS_PER_SYMBOL = 200
+    
+    @staticmethod
+    def extract(tree: ast.AST) -> FileSymbols:
+        """Functions of a module with their complexity, line count and called names."""
+        names: List[str] = []
+        complexity = array('i')
+        loc = array('i')
+        call_from = array('i')
+        call_to: List[str] = []
+        called: List[set] = []
+        
+        # (node, qualified name prefix, index of the enclosing function or -1)
+        stack = [(child, '', -1) for child in reversed(list(ast.iter_child_nodes(tree)))]
+        while stack:
+            node, prefix, owner = stack.pop()
+            
+            if isinstance(node, FUNCTION_NODES) and len(names) < PythonSymbolExtractor.MAX_SYMBOLS:
+                name = sys.intern(prefix + node.name)
+                index = len(names)
+                names.append(name)
+                complexity.append(1)
+                loc.append((node.end_lineno or node.lineno) - node.lineno + 1)
+                called.append(set())
+                # Decorators run in the enclosing scope, the body in the function's own
+                stack.extend((child, name + '.', index) for child in reversed(node.body))
+                stack.extend((child, prefix, owner) for child in reversed(node.decorator_list))
+                continue
+            
+            if isinstance(node, ast.ClassDef):
+                stack.extend((child, prefix + node.name + '.', owner) for child in reversed(node.body))
+                stack.extend((child, prefix, owner) for child in reversed(node.bases + node.decorator_list))
+                continue
+            
+            if owner >= 0:
+                if isinstance(node, BRANCH_NODES):
+                    complexity[owner] += 1
+                elif isinstance(node, ast.BoolOp):
+                    complexity[owner] += len(node.values) - 1
+                elif isinstance(node, ast.comprehension):
+                    complexity[owner] += 1 + len(node.ifs)
+                elif isinstance(node, ast.Call):
+                    func = node.func
+                    callee = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+                    if callee and callee not in called[owner] and len(called[owner]) < PythonSymbolExtractor.MAX_CALLS_PER_SYMBOL:
+                        called[owner].add(callee)
+                        call_from.append(owner)
+                        call_to.append(sys.intern(callee))
+            
+            stack.extend((child, prefix, owner) for child in reversed(list(ast.iter_child_nodes(node))))
+        
+        return FileSymbols(tuple(names), complexity, loc, call_from, tuple(call_to))
+
+class SymbolGraph:
+    """
+    Function-level call graph of a repository in flat arrays.
+    
+    Symbols are numbered file by file; symbol_file, complexity and loc are columns
+    indexed by symbol, and edges is an (n, 2) array of (caller, callee) symbol ids.
+    A call resolves to functions of that name in the calling file, then in the
+    files it imports; calls that resolve nowhere (builtins, libraries) are dropped.
+    """
+    
+    def __init__(
+        self,
+        paths: List[str],
+        names: List[str],
+        symbol_file: np.ndarray,
+        complexity: np.ndarray,
+        loc: np.ndarray,
+        edges: np.ndarray,
+        unresolved_calls: int = 0
+    ):
+        self.paths = paths
+        self.names = names
+        self.symbol_file = symbol_file
+        self.complexity = complexity
+        self.loc = loc
+        self.edges = edges
+        self.unresolved_calls = unresolved_calls
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    @staticmethod
+    def build(graph: nx.DiGraph, file_info: Dict[str, FileRecord]) -> Optional["SymbolGraph"]:
+        """Build from the file graph and the symbols of each file's record. Returns None if no file has symbols."""
+        paths = [path for path in graph.nodes() if file_info[path].symbols]
+        if not paths:
+            return None
+        
+        names: List[str] = []
+        symbol_file: List[int] = []
+        complexity: List[int] = []
+        loc: List[int] = []
+        # path -> short name -> first symbol id of that name in the file
+        by_name: Dict[str, Dict[str, int]] = {}
+        offsets: Dict[str, int] = {}
+        
+        for file_index, path in enumerate(paths):
+            symbols = file_info[path].symbols
+            offsets[path] = len(names)
+            local = by_name[path] = {}
+            for i, name in enumerate(symbols.names):
+                local.setdefault(name.rpartition('.')[2], offsets[path] + i)
+            names.extend(symbols.names)
+            symbol_file.extend([file_index] * len(symbols))
+            complexity.extend(symbols.complexity)
+            loc.extend(symbols.loc)
+        
+        edges: List[tuple] = []
+        unresolved = 0
+        for path in paths:
+            symbols = file_info[path].symbols
+            scopes = [by_name[path]] + [by_name[target] for target in graph.successors(path) if target in by_name]
+            for caller, callee in zip(symbols.call_from, symbols.call_to):
+                target = next((scope[callee] for scope in scopes if callee in scope), None)
+                if target is None:
+                    unresolved += 1
+                else:
+                    edges.append((offsets[path] + caller, target))
+        
+        return SymbolGraph(
+            paths,
+            names,
+            np.array(symbol_file, dtype=np.int32),
+            np.array(complexity, dtype=np.int32),
+            np.array(loc, dtype=np.int32),
+            np.array(edges, dtype=np.int32).reshape(-1, 2),
+            unresolved
+        )
+    
+    def file_of(self, symbol: int) -> str:
+        return self.paths[self.symbol_file[symbol]]
+    
+    def caller_files(self) -> np.ndarray:
+        """Number of distinct other files calling each symbol."""
+        callers = self.symbol_file[self.edges[:, 0]].astype(np.int64)
+        callees = self.edges[:, 1].astype(np.int64)
+        external = callers != self.symbol_file[callees]
+        pairs = np.unique(callers[external] * len(self) + callees[external])
+        return np.bincount(pairs % len(self), minlength=len(self))
+    
+    def callers(self, symbol: int) -> np.ndarray:
+        return self.edges[self.edges[:, 1] == symbol, 0]
@@ -2,11 +2,19 @@ from fastapi import Header, HTTPException, Depends
 from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient
 from auth.jwt_handler import decode_access_token
+from config import get_settings
+from database import db as shared_db
+from services.metrics import MongoCommandMetrics
 import os
 
 async def get_database():
+    # Share the server's client once startup has created it; others (scripts, tests) get their own
+    if shared_db.database is not None:
+        yield shared_db.database
+        return
+    
     mongo_url = os.environ['MONGO_URL']
-    client = AsyncIOMotorClient(mongo_url)
+    client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandMetrics()])
     db = client[os.environ['DB_NAME']]
     try:
         yield db
@@ -34,3 +42,15 @@ async def get_current_user(
         raise HTTPException(status_code=401, detail="User not found")
     
     return user
+
+def is_admin(user: dict) -> bool:
+    admin_ids = {i.strip() for i in get_settings().admin_github_ids.split(",") if i.strip()}
+    return str(user.get("github_id")) in admin_ids
+
+async def get_admin_user(
+    current_user: dict = Depends(get_current_user)
+):
+    if not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return current_user
@@ -0,0 +1,204 @@
+"""
+Benchmark the analysis hot paths on synthetic repositories.
+
+Run from the backend directory:
+    python -m benchmarks.run_benchmarks --sizes 100 1000 --languages python js mixed --output bench.json
+    python -m benchmarks.run_benchmarks --sizes 10000 50000 --mode large --no-memory
+    python -m benchmarks.run_benchmarks --sizes 1000 --compare bench.json
+"""
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable
+import logging
+
+from benchmarks.synthetic_repo import SyntheticRepoGenerator
+from services.feasibility import FeasibilityChecker
+from analyzers.dependency_graph import DependencyGraphBuilder
+from analyzers.risk_detector import RiskDetector
+
+logger = logging.getLogger(__name__)
+
+PHASES = ('check_feasibility', 'build_graph', 'detect_risks')
+
+LANGUAGE_NAMES = {
+    'python': 'Python',
+    'js': 'JavaScript',
+    'mixed': 'unknown'
+}
+
+def _run_phases(repo_path: Path, language: str, mode: str, measure: Callable) -> Dict[str, Dict[str, float]]:
+    """Run the three phases in order, measuring each with `measure`."""
+    compact = mode == FeasibilityChecker.LARGE_MODE
+    builder = DependencyGraphBuilder(repo_path, language, compact=compact)
+    detector = RiskDetector(repo_path, language, compact=compact, graph_builder=builder)
+    
+    results = {}
+    results['check_feasibility'], _ = measure(lambda: FeasibilityChecker.check_feasibility(repo_path, mode))
+    results['build_graph'], graph = measure(builder.build_graph)
+    results['detect_risks'], risks = measure(detector.detect_risks)
+    results['counts'] = {
+        'nodes': graph.number_of_nodes(),
+        'edges': graph.number_of_edges(),
+        'risks': len(risks)
+    }
+    return results
+
+def _time_call(fn: Callable):
+    start = time.perf_counter()
+    value = fn()
+    return time.perf_counter() - start, value
+
+def _trace_call(fn: Callable):
+    tracemalloc.start()
+    try:
+        value = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, value
+
+def run_scenario(generator: SyntheticRepoGenerator, mode: str, repeat: int, memory: bool) -> Dict[str, Any]:
+    """Generate one repository and benchmark every phase on it."""
+    workdir = Path(tempfile.mkdtemp(prefix="pei_bench_"))
+    try:
+        generate_start = time.perf_counter()
+        repo_path = generator.generate(workdir / "repo")
+        generate_seconds = time.perf_counter() - generate_start
+        language = LANGUAGE_NAMES[generator.language]
+        
+        timings = {phase: [] for phase in PHASES}
+        counts = {}
+        for _ in range(repeat):
+            run = _run_phases(repo_path, language, mode, _time_call)
+            for phase in PHASES:
+                timings[phase].append(run[phase])
+            counts = run['counts']
+        
+        phases = {
+            phase: {
+                'min_seconds': round(min(values), 6),
+                'median_seconds': round(statistics.median(values), 6)
+            }
+            for phase, values in timings.items()
+        }
+        
+        # Peak memory is measured in a separate pass so tracing overhead does not skew timings
+        if memory:
+            peaks = _run_phases(repo_path, language, mode, _trace_call)
+            for phase in PHASES:
+                phases[phase]['peak_memory_bytes'] = peaks[phase]
+        
+        return {
+            'scenario': {**generator.describe(), 'mode': mode},
+            'generate_seconds': round(generate_seconds, 3),
+            'phases': phases,
+            'counts': counts
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def _scenario_key(result: Dict[str, Any]) -> str:
+    scenario = result['scenario']
+    return f"{scenario['language']}-{scenario['files']}-{scenario['mode']}"
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """List phases that got slower than the baseline by more than `threshold` (a ratio)."""
+    baseline_by_key = {_scenario_key(r): r for r in baseline.get('results', [])}
+    regressions = []
+    
+    for result in results:
+        key = _scenario_key(result)
+        previous = baseline_by_key.get(key)
+        if not previous:
+            continue
+        for phase in PHASES:
+            before = previous['phases'][phase]['min_seconds']
+            after = result['phases'][phase]['min_seconds']
+            if before > 0 and after / before > threshold:
+                regressions.append(f"{key} {phase}: {before:.4f}s -> {after:.4f}s ({after / before:.2f}x)")
+    
+    return regressions
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark PEI analysis phases on synthetic repositories")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000], help="File counts to generate")
+    parser.add_argument('--languages', nargs='+', default=['python'], choices=SyntheticRepoGenerator.LANGUAGES)
+    parser.add_argument('--loc-per-file', type=int, default=60)
+    parser.add_argument('--imports-per-file', type=int, default=4)
+    parser.add_argument('--cycles', type=int, default=5)
+    parser.add_argument('--cycle-length', type=int, default=3)
+    parser.add_argument('--mode', default=FeasibilityChecker.STANDARD_MODE, choices=FeasibilityChecker.MODES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak-memory pass")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write results as JSON to this file")
+    parser.add_argument('--compare', help="Baseline results JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.2, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    results = []
+    for language in args.languages:
+        for size in args.sizes:
+            generator = SyntheticRepoGenerator(
+                files=size,
+                language=language,
+                loc_per_file=args.loc_per_file,
+                imports_per_file=args.imports_per_file,
+                cycles=args.cycles,
+                cycle_length=args.cycle_length,
+                seed=args.seed
+            )
+            logger.info(f"Benchmarking {language} repository with {size} files ({args.mode} mode)")
+            result = run_scenario(generator, args.mode, args.repeat, not args.no_memory)
+            results.append(result)
+            logger.info(
+                ", ".join(f"{phase}={result['phases'][phase]['min_seconds']:.4f}s" for phase in PHASES)
+            )
+    
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results
+    }
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Wrote results to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for regression in regressions:
+            logger.warning(f"Regression: {regression}")
+        if regressions:
+            return 1
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
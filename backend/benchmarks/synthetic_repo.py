@@ -0,0 +1,124 @@
+import random
+from pathlib import Path
+from typing import Dict, Any, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SyntheticRepoGenerator:
+    """
+    Generates synthetic repositories with controlled size and import structure.
+    
+    Files are laid out as pkg_XXX/mod_XXXXX.<ext>, 100 modules per package. Imports
+    only point at lower-numbered modules, so the graph is acyclic except for the
+    requested number of cycles, each closed by one back edge.
+    """
+    
+    LANGUAGES = ('python', 'js', 'mixed')
+    FILES_PER_PACKAGE = 100
+    
+    def __init__(
+        self,
+        files: int,
+        language: str = 'python',
+        loc_per_file: int = 60,
+        imports_per_file: int = 4,
+        cycles: int = 5,
+        cycle_length: int = 3,
+        seed: int = 42
+    ):
+        if language not in self.LANGUAGES:
+            raise ValueError(f"Unknown language: {language}")
+        self.files = files
+        self.language = language
+        self.loc_per_file = loc_per_file
+        self.imports_per_file = imports_per_file
+        self.cycles = cycles
+        self.cycle_length = cycle_length
+        self.rng = random.Random(seed)
+    
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'files': self.files,
+            'language': self.language,
+            'loc_per_file': self.loc_per_file,
+            'imports_per_file': self.imports_per_file,
+            'cycles': self.cycles,
+            'cycle_length': self.cycle_length
+        }
+    
+    def generate(self, repo_path: Path) -> Path:
+        """Write the repository under repo_path and return it."""
+        repo_path = Path(repo_path)
+        imports = self._plan_imports()
+        
+        for i in range(self.files):
+            ext = self._extension(i)
+            file_path = repo_path / self._module_path(i, ext)
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(self._render(i, ext, imports[i]))
+        
+        logger.info(f"Generated {self.files} {self.language} files in {repo_path}")
+        return repo_path
+    
+    def _extension(self, i: int) -> str:
+        if self.language == 'python':
+            return '.py'
+        if self.language == 'js':
+            return '.js'
+        return '.py' if i % 2 == 0 else '.js'
+    
+    def _module_name(self, i: int) -> str:
+        # Zero padding keeps one module name from being a prefix of another
+        return f"pkg_{i // self.FILES_PER_PACKAGE:03d}/mod_{i:05d}"
+    
+    def _module_path(self, i: int, ext: str) -> str:
+        return self._module_name(i) + ext
+    
+    def _plan_imports(self) -> List[List[int]]:
+        """Pick import targets per file: a DAG plus back edges that close cycles."""
+        imports = [[] for _ in range(self.files)]
+        
+        for i in range(1, self.files):
+            count = min(i, self.imports_per_file)
+            imports[i] = self.rng.sample(range(i), count)
+        
+        for _ in range(self.cycles):
+            if self.files < self.cycle_length:
+                break
+            start = self.rng.randrange(0, self.files - self.cycle_length + 1)
+            chain = list(range(start, start + self.cycle_length))
+            # Forward chain i -> i - 1 ... and one back edge closing the loop
+            for a, b in zip(chain[1:], chain):
+                if b not in imports[a]:
+                    imports[a].append(b)
+            imports[chain[0]].append(chain[-1])
+        
+        return imports
+    
+    def _render(self, i: int, ext: str, targets: List[int]) -> str:
+        lines = []
+        for target in targets:
+            module = self._module_name(target)
+            if ext == '.py':
+                lines.append(f"from {module.replace('/', '.')} import value_{target}")
+            else:
+                lines.append(f"import {{ value_{target} }} from '{module}'")
+        lines.append("")
+        
+        functions = max(1, (self.loc_per_file - len(lines)) // 3)
+        for n in range(functions):
+            if ext == '.py':
+                lines.append(f"def func_{i}_{n}(x):")
+                lines.append(f"    return x + {n}")
+            else:
+                lines.append(f"function func_{i}_{n}(x) {{")
+                lines.append(f"  return x + {n};")
+                lines.append("}")
+        
+        if ext == '.py':
+            lines.append(f"value_{i} = {i}")
+        else:
+            lines.append(f"export const value_{i} = {i};")
+        return "\n".join(lines) + "\n"
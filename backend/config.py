@@ -11,6 +11,83 @@ class Settings(BaseSettings):
     jwt_secret: str = "change-this-to-random-secret-in-production"
     jwt_algorithm: str = "HS256"
     frontend_url: str = ""  # No default - must be set in env
+    admin_github_ids: str = ""  # Comma-separated GitHub user ids allowed to use admin features
+    github_webhook_secret: str = ""  # Secret configured on the GitHub push webhook
+    
+    # Feasibility limits for the default analysis mode
+    standard_max_files: int = 300
+    standard_max_loc: int = 40000
+    standard_max_folder_depth: int = 8
+    standard_warn_files: int = 200
+    standard_warn_loc: int = 30000
+    
+    # Feasibility limits and budget for the opt-in large-repository mode
+    large_max_files: int = 20000
+    large_max_loc: int = 3000000
+    large_max_folder_depth: int = 20
+    large_warn_files: int = 5000
+    large_warn_loc: int = 750000
+    large_time_budget_seconds: float = 300.0
+    large_memory_budget_mb: int = 1024
+    large_max_cycles: int = 200
+    
+    # "sparse": blobless partial clone checking out only analyzable files; "full": shallow clone of everything
+    clone_mode: str = "sparse"
+    
+    # Change history read for hotspot risks: days of commits fetched after the clone (0 turns it off)
+    history_days: int = 0
+    history_max_commits: int = 5000
+    
+    # Build a function-level call graph of Python files (non-compact runs only) for function risks
+    symbol_graph: bool = False
+    
+    # Fingerprint files while they are read and report duplicated code across the repository
+    duplicate_detection: bool = False
+    
+    # JSON file of risk rule thresholds: {"thresholds": {...}, "organizations": {"<owner>": {...}}}
+    risk_rules_file: str = ""
+    
+    # Files above this size are skipped or sampled ("skip" | "sample") by the analyzers
+    max_analyzed_file_bytes: int = 1_000_000
+    oversized_file_policy: str = "skip"
+    
+    # Analysis job queue consumed by worker.py
+    job_lease_seconds: int = 120
+    job_max_attempts: int = 3
+    job_retry_backoff_seconds: float = 30.0
+    worker_poll_interval_seconds: float = 2.0
+    webhook_debounce_seconds: float = 30.0
+    
+    # Deduplication of concurrent analyses of the same commit
+    single_flight_lease_seconds: int = 120
+    single_flight_poll_seconds: float = 1.0
+    single_flight_reuse_seconds: int = 60
+    
+    # Admission control for analyses run by this process
+    admission_max_concurrent: int = 4
+    admission_max_per_user: int = 1
+    admission_max_waiting: int = 32
+    admission_max_wait_seconds: float = 30.0
+    max_active_jobs_per_user: int = 10
+    
+    # Batch analysis pipeline: clones on threads, analyses in worker processes
+    batch_max_repositories: int = 500
+    batch_clone_concurrency: int = 4
+    batch_analyze_concurrency: int = 2
+    
+    # Disk budget for temporary checkouts, reserved from GitHub's reported repository size
+    checkout_disk_budget_mb: int = 10240
+    checkout_min_free_disk_mb: int = 1024
+    checkout_min_reservation_mb: int = 10
+    
+    # Blast-radius queries: largest graph given a reachability index, and indexes kept in memory
+    reachability_max_files: int = 20000
+    reachability_cache_size: int = 64
+    
+    # Response compression: brotli or gzip as the client prefers, for bodies of at least this size
+    compression_min_bytes: int = 1024
+    compression_brotli_quality: int = 4
+    compression_gzip_level: int = 6
     
     model_config = SettingsConfigDict(
         env_file=".env",
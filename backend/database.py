@@ -1,6 +1,8 @@
+import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.server_api import ServerApi
 from config import get_settings
+from services.metrics import MongoCommandMetrics
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,29 +10,42 @@ logger = logging.getLogger(__name__)
 class Database:
     client: AsyncIOMotorClient = None
     database = None
+    # "connecting" until the first ping answers, then "connected" or "unavailable"
+    status: str = "disconnected"
 
 db = Database()
 
-async def connect_to_mongo():
-    """Connect to MongoDB Atlas"""
+def connect_to_mongo():
+    """
+    Create the shared MongoDB Atlas client. The driver connects on first use, but a
+    mongodb+srv URL is resolved here, synchronously, and raises ConfigurationError if
+    the DNS lookup fails; warm_up_mongo therefore calls this on a thread.
+    """
+    settings = get_settings()
+    db.client = AsyncIOMotorClient(
+        settings.mongo_url, 
+        server_api=ServerApi('1'),
+        connectTimeoutMS=30000,
+        socketTimeoutMS=30000,
+        serverSelectionTimeoutMS=30000,
+        event_listeners=[MongoCommandMetrics()]
+    )
+    db.database = db.client[settings.db_name]
+
+async def warm_up_mongo():
+    """
+    Create the shared client off the event loop and ping MongoDB, so the first request
+    finds an open connection. Run in the background; until the client exists, requests
+    open their own (see auth.dependencies.get_database).
+    """
+    db.status = "connecting"
     try:
-        settings = get_settings()
-        db.client = AsyncIOMotorClient(
-            settings.mongo_url, 
-            server_api=ServerApi('1'),
-            connectTimeoutMS=30000,
-            socketTimeoutMS=30000,
-            serverSelectionTimeoutMS=30000
-        )
-        
-        # Test the connection
+        await asyncio.to_thread(connect_to_mongo)
         await db.client.admin.command('ping')
+        db.status = "connected"
         logger.info("Successfully connected to MongoDB Atlas!")
-        
-        # Set the database
-        db.database = db.client[settings.db_name]
-        
     except Exception as e:
+        db.status = "unavailable"
         logger.error(f"Failed to connect to MongoDB: {e}")
         # Don't raise the exception to allow the app to start without DB
         logger.warning("Application will continue without database connection")
@@ -39,6 +54,7 @@ async def close_mongo_connection():
     """Close MongoDB connection"""
     if db.client:
         db.client.close()
+        db.status = "disconnected"
         logger.info("MongoDB connection closed")
 
 def get_database():
@@ -0,0 +1,143 @@
+import zlib
+from typing import Optional
+import logging
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Content types worth compressing; others (images, archives, already-compressed data) pass through
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/msgpack", "application/javascript")
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick "br" or "gzip" from an Accept-Encoding header by quality value, preferring brotli on ties.
+    Returns None when the client accepts neither.
+    """
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in ("br", "gzip"):
+        quality = qualities.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+class _Encoder:
+    """Incremental brotli or gzip encoder."""
+    
+    def __init__(self, encoding: str, brotli_quality: int, gzip_level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 writes a gzip header and trailer
+            self.compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+    
+    def chunk(self, data: bytes) -> bytes:
+        """Compress data and flush it, so a streamed chunk reaches the client right away."""
+        if self.encoding == "br":
+            return self.compressor.process(data) + self.compressor.flush()
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self.compressor.process(data) + self.compressor.finish()
+        return self.compressor.compress(data) + self.compressor.flush()
+
+class CompressionMiddleware:
+    """
+    Compresses responses with brotli or gzip, as negotiated from Accept-Encoding.
+    
+    Complete bodies are compressed once they reach minimum_size. Streamed bodies
+    are compressed chunk by chunk, flushing after each chunk so records of a
+    stream are not held back in the compressor's buffer.
+    """
+    
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, brotli_quality: int = 4, gzip_level: int = 6):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        responder = _CompressingResponder(send, encoding, self)
+        await self.app(scope, receive, responder.send)
+
+class _CompressingResponder:
+    """Wraps send for one response, deciding on compression when the first body message arrives."""
+    
+    def __init__(self, send: Send, encoding: str, settings: CompressionMiddleware):
+        self._send = send
+        self.encoding = encoding
+        self.settings = settings
+        self.start: Optional[Message] = None
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+    
+    async def send(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Held until the first body message shows the response's size
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        
+        if self.passthrough:
+            await self._send(message)
+            return
+        
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        
+        if self.encoder is None:
+            headers = Headers(raw=self.start["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+                or (not more_body and len(body) < self.settings.minimum_size)
+            ):
+                self.passthrough = True
+                await self._send(self.start)
+                await self._send(message)
+                return
+            
+            self.encoder = _Encoder(self.encoding, self.settings.brotli_quality, self.settings.gzip_level)
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.encoder.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self._send(self.start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self.start)
+        
+        body = self.encoder.chunk(body) if more_body else self.encoder.finish(body)
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
@@ -30,3 +30,12 @@ class AnalysisResult(BaseModel):
     risks: List[Risk]
     analyzed_at: datetime
     analysis_time_seconds: float
+
+class BatchAnalysisRequest(BaseModel):
+    repo_ids: Optional[List[int]] = None
+    org: Optional[str] = None
+    large_repo: bool = False
+
+class BlastRadiusRequest(BaseModel):
+    paths: List[str]
+    commit_sha: Optional[str] = None
@@ -1,13 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from typing import List, Dict, Any
-import time
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Response, Header
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+import asyncio
 import logging
-from datetime import datetime, timezone
-from auth.dependencies import get_current_user, get_database
+import orjson
+from auth.dependencies import get_current_user, get_admin_user, get_database, is_admin
+from config import get_settings
+from services.admission import AdmissionRejected, get_admission_controller
 from services.github_service import GitHubService
-from services.cloner import RepositoryCloner
-from services.feasibility import FeasibilityChecker
-from analyzers.risk_detector import RiskDetector
+from models.analysis import BatchAnalysisRequest, BlastRadiusRequest
+from services.job_queue import AnalysisJobQueue
+from services.metric_series import MetricSeries
+from services.single_flight import AnalysisSingleFlight, analysis_key
+from services.metrics import AnalysisMetrics
+from services.profiler import AnalysisProfiler
+
+# The analysis stack (analysis_pipeline, batch, graph_store, reachability_store) pulls in
+# GitPython, networkx, numpy and msgpack. Routes import it on first use, so pods that only
+# serve auth and listings never load it; scripts/import_budget.py keeps it that way.
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/repos", tags=["repositories"])
@@ -34,112 +46,104 @@ async def list_repositories(
             detail="Failed to fetch repositories"
         )
 
+async def _find_repository(current_user: dict, repo_id: int) -> Dict[str, Any]:
+    """Find a repository the user can access, or raise 404."""
+    github_service = GitHubService(current_user["access_token"])
+    
+    # Get all repositories to find the one with matching ID
+    repositories = await github_service.list_repositories()
+    repo = next((r for r in repositories if r["id"] == repo_id), None)
+    
+    if not repo:
+        raise HTTPException(
+            status_code=404,
+            detail="Repository not found or you don't have access"
+        )
+    
+    return repo
+
 @router.post("/analyze/{repo_id}")
 async def analyze_repository(
     repo_id: int,
+    large_repo: bool = False,
+    profile: bool = False,
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database)
 ) -> Dict[str, Any]:
-    """Analyze a repository for engineering risks."""
-    start_time = time.time()
-    repo_path = None
+    """
+    Analyze a repository for engineering risks.
+    Set large_repo to opt into the large-repository limits and analysis budget.
+    Admins can set profile to run analysis under cProfile and tracemalloc; the
+    artifact is retrievable from /analyses/{analysis_id}/profile.
+    Requests for a commit that is already being analyzed wait for that analysis
+    and receive a copy of its result.
+    """
+    if profile and not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Profiling is restricted to admins")
+    
+    from services.analysis_pipeline import CloneError, run_repository_analysis, save_analysis, share_analysis
+    
+    metrics = AnalysisMetrics()
+    profiler = AnalysisProfiler() if profile else None
     
     try:
-        access_token = current_user["access_token"]
-        username = current_user["username"]
-        github_service = GitHubService(access_token)
-        
-        # Get all repositories to find the one with matching ID
-        repositories = await github_service.list_repositories()
-        repo = next((r for r in repositories if r["id"] == repo_id), None)
-        
-        if not repo:
-            raise HTTPException(
-                status_code=404,
-                detail="Repository not found or you don't have access"
-            )
-        
-        # Clone repository
-        logger.info(f"Cloning repository {repo['full_name']}")
-        repo_path, clone_error = RepositoryCloner.clone_repository(
-            repo["clone_url"],
-            access_token,
-            username
-        )
-        
-        if clone_error:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Failed to clone repository: {clone_error}"
-            )
+        repo = await _find_repository(current_user, repo_id)
         
-        # Run feasibility check
-        logger.info(f"Running feasibility check on {repo['full_name']}")
-        feasibility_result = FeasibilityChecker.check_feasibility(repo_path)
-        
-        # Prepare response with feasibility data
-        result = {
-            "repo_id": repo_id,
-            "repo_name": repo["name"],
-            "repo_full_name": repo["full_name"],
-            "user_github_id": current_user["github_id"],
-            "feasibility": feasibility_result,
-            "risks": [],
-            "analyzed_at": datetime.now(timezone.utc).isoformat(),
-            "analysis_time_seconds": 0
-        }
+        # Profiled runs must do their own work, so they are never deduplicated
+        commit_sha = None
+        if not profile:
+            github_service = GitHubService(current_user["access_token"])
+            commit_sha = await github_service.get_branch_head_sha(repo["full_name"], repo["default_branch"])
         
-        # If not feasible, return early
-        if not feasibility_result["is_feasible"]:
-            analysis_time = time.time() - start_time
-            result["analysis_time_seconds"] = round(analysis_time, 2)
+        async def analyze() -> Dict[str, Any]:
+            try:
+                # Clone and analysis hold an admission slot; GitHub reports repository size in KB
+                async with get_admission_controller().admit(current_user["github_id"], (repo.get("size") or 0) * 1024):
+                    result = await asyncio.to_thread(
+                        run_repository_analysis,
+                        repo,
+                        current_user,
+                        large_repo,
+                        metrics,
+                        profiler=profiler,
+                        commit_sha=commit_sha
+                    )
+            except AdmissionRejected as e:
+                raise HTTPException(
+                    status_code=429,
+                    detail=f"Analysis capacity is saturated: {str(e)}. Retry later or queue it via /api/repos/jobs/{repo_id}",
+                    headers={"Retry-After": str(e.retry_after)}
+                )
+            except CloneError as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Failed to clone repository: {str(e)}"
+                )
             
-            # Save to database
-            analyses_collection = db["analyses"]
-            insert_result = await analyses_collection.insert_one(result)
-            # Remove _id from result to avoid serialization issues
-            result.pop("_id", None)
-            
-            # Cleanup
-            if repo_path:
-                RepositoryCloner.cleanup_repository(repo_path)
+            if profiler:
+                await db["analysis_profiles"].insert_one({
+                    "analysis_id": result["analysis_id"],
+                    "repo_id": repo_id,
+                    "repo_full_name": repo["full_name"],
+                    **profiler.to_document()
+                })
             
-            return result
-        
-        # Run risk detection
-        logger.info(f"Running risk detection on {repo['full_name']}")
-        primary_language = feasibility_result["stats"].get("primary_language", "Python")
-        risk_detector = RiskDetector(repo_path, primary_language)
-        
-        detected_risks = risk_detector.detect_risks()
-        
-        # Convert Risk objects to dicts
-        risks_data = [
-            {
-                "title": risk.title,
-                "files": risk.files,
-                "evidence": risk.evidence,
-                "why_it_matters": risk.why_it_matters,
-                "suggested_action": risk.suggested_action,
-                "confidence": risk.confidence
-            }
-            for risk in detected_risks
-        ]
-        
-        analysis_time = time.time() - start_time
-        result["risks"] = risks_data
-        result["analysis_time_seconds"] = round(analysis_time, 2)
+            # Save to database
+            return await save_analysis(db, result, metrics)
         
-        # Save to database
-        analyses_collection = db["analyses"]
-        insert_result = await analyses_collection.insert_one(result)
-        # Remove _id from result to avoid serialization issues
-        result.pop("_id", None)
+        if commit_sha:
+            # Concurrent requests for the same commit share one clone and analysis
+            key = analysis_key(repo_id, commit_sha, large_repo)
+            result, shared = await AnalysisSingleFlight(db).run(key, analyze)
+            if shared:
+                result = await share_analysis(db, result, current_user["github_id"])
+        else:
+            result = await analyze()
         
-        logger.info(f"Analysis complete for {repo['full_name']}: {len(risks_data)} risks found")
+        logger.info(f"Analysis complete for {repo['full_name']}: {len(result['risks'])} risks found")
         
         return result
-        
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -148,34 +152,361 @@ async def analyze_repository(
             status_code=500,
             detail=f"Analysis failed: {str(e)}"
         )
-    finally:
-        # Always cleanup cloned repository
-        if repo_path:
-            RepositoryCloner.cleanup_repository(repo_path)
 
-@router.get("/analyses")
-async def get_analyses(
+@router.post("/batch")
+async def analyze_batch(
+    request: BatchAnalysisRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Analyze many repositories: the given repo_ids, or every repository of an org.
+    Streams newline-delimited JSON: a "result" record per repository as soon as
+    it completes, then a "summary" record aggregating the batch.
+    """
+    if bool(request.repo_ids) == bool(request.org):
+        raise HTTPException(status_code=400, detail="Provide either repo_ids or org")
+    
+    # Repositories are listed once for the whole batch
+    github_service = GitHubService(current_user["access_token"])
+    unresolved_ids = []
+    if request.org:
+        repos = await github_service.list_org_repositories(request.org)
+    else:
+        accessible = {r["id"]: r for r in await github_service.list_repositories()}
+        requested = list(dict.fromkeys(request.repo_ids))
+        repos = [accessible[repo_id] for repo_id in requested if repo_id in accessible]
+        unresolved_ids = [repo_id for repo_id in requested if repo_id not in accessible]
+    
+    max_repositories = get_settings().batch_max_repositories
+    if len(repos) > max_repositories:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch has {len(repos)} repositories; the limit is {max_repositories}"
+        )
+    
+    # The batch holds one admission slot for its whole run; its stages have their own bounds,
+    # and each repository reserves its checkout's disk as it is cloned (see BatchAnalyzer)
+    admission = AsyncExitStack()
+    try:
+        await admission.enter_async_context(get_admission_controller().admit(current_user["github_id"]))
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Analysis capacity is saturated: {str(e)}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    
+    from services.analysis_pipeline import save_analysis
+    from services.batch import BatchAnalyzer
+    
+    async def stream():
+        try:
+            # Dependencies are closed before a streamed body is sent, so the stream opens its own connection
+            async with asynccontextmanager(get_database)() as db:
+                async def save(analysis: Dict[str, Any], metrics: AnalysisMetrics) -> Dict[str, Any]:
+                    return await save_analysis(db, analysis, metrics)
+                
+                batch = BatchAnalyzer(current_user, request.large_repo)
+                async for record in batch.run(repos, save, unresolved_ids):
+                    yield orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS) + b"\n"
+        finally:
+            await admission.aclose()
+    
+    logger.info(f"Starting batch analysis of {len(repos)} repositories")
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@router.post("/jobs/{repo_id}", status_code=202)
+async def enqueue_analysis(
+    repo_id: int,
+    large_repo: bool = False,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+) -> Dict[str, Any]:
+    """
+    Queue a repository analysis for the worker fleet.
+    Poll /jobs/{job_id} for its status; the result is saved under the returned analysis_id.
+    """
+    repo = await _find_repository(current_user, repo_id)
+    queue = AnalysisJobQueue(db)
+    
+    active_jobs = await queue.count_active(current_user["github_id"])
+    if active_jobs >= get_settings().max_active_jobs_per_user:
+        raise HTTPException(
+            status_code=429,
+            detail=f"You already have {active_jobs} analyses queued or running",
+            headers={"Retry-After": str(queue.lease_seconds)}
+        )
+    
+    try:
+        job = await queue.enqueue(repo, current_user["github_id"], large_repo)
+    except Exception as e:
+        logger.error(f"Error queueing analysis: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail="Failed to queue analysis"
+        )
+    
+    logger.info(f"Queued analysis job {job['job_id']} for {repo['full_name']}")
+    return {
+        "job_id": job["job_id"],
+        "analysis_id": job["analysis_id"],
+        "status": job["status"]
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
     current_user: dict = Depends(get_current_user),
     db = Depends(get_database)
 ) -> Dict[str, Any]:
-    """Get all analyses for the current user."""
+    """Get the status of a queued analysis job."""
+    job = await AnalysisJobQueue(db).get(job_id, current_user["github_id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job
+
+@router.get("/analyses")
+async def get_analyses(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get all analyses for the current user.
+    The response is streamed, encoding each analysis as the cursor yields it.
+    """
+    # Dependencies are closed before a streamed body is sent, so the stream opens its own connection
+    connection = AsyncExitStack()
     try:
-        analyses_collection = db["analyses"]
-        cursor = analyses_collection.find(
+        db = await connection.enter_async_context(asynccontextmanager(get_database)())
+        cursor = db["analyses"].find(
             {"user_github_id": current_user["github_id"]},
             {"_id": 0}
         ).sort("analyzed_at", -1).limit(100)
-        analyses = []
-        async for doc in cursor:
-            analyses.append(doc)
-        
-        return {
-            "analyses": analyses,
-            "count": len(analyses)
-        }
+        # Fetching the first analysis up front still reports database errors as a 500
+        first = await anext(cursor, None)
     except Exception as e:
+        await connection.aclose()
         logger.error(f"Error fetching analyses: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail="Failed to fetch analyses"
         )
+    
+    async def stream():
+        try:
+            yield b'{"analyses":['
+            count = 0
+            if first is not None:
+                yield orjson.dumps(first)
+                count = 1
+                async for doc in cursor:
+                    yield b"," + orjson.dumps(doc)
+                    count += 1
+            yield b'],"count":%d}' % count
+        finally:
+            await connection.aclose()
+    
+    return StreamingResponse(stream(), media_type="application/json")
+
+@router.get("/analyses/{analysis_id}")
+async def get_analysis(
+    analysis_id: str,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+) -> Dict[str, Any]:
+    """Get one analysis of the current user."""
+    analysis = await db["analyses"].find_one(
+        {"analysis_id": analysis_id, "user_github_id": current_user["github_id"]},
+        {"_id": 0}
+    )
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    # Stored documents are plain JSON types; skip FastAPI's re-encoding pass
+    return ORJSONResponse(analysis)
+
+@router.get("/analyses/{base_id}/delta/{head_id}")
+async def get_analysis_delta(
+    base_id: str,
+    head_id: str,
+    limit: int = 100,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+) -> Dict[str, Any]:
+    """Compare two analyses of the same repository: repository totals, risk counts and the most-changed files."""
+    delta = await MetricSeries(db).delta(current_user["github_id"], base_id, head_id, max(1, min(limit, 1000)))
+    if not delta:
+        raise HTTPException(status_code=404, detail="Analyses not found or not of the same repository")
+    
+    return delta
+
+async def _blast_radius(db, analysis: Dict[str, Any], paths: List[str]) -> Dict[str, Any]:
+    """Answer a blast-radius query from an analysis's precomputed reachability index."""
+    from services.reachability_store import ReachabilityStore
+    
+    index = await ReachabilityStore(db).load(analysis)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Analysis has no reachability index")
+    
+    paths = [path.strip().removeprefix("./").lstrip("/") for path in paths]
+    affected, unknown = index.dependents(paths)
+    return {
+        "analysis_id": analysis["analysis_id"],
+        "commit_sha": analysis.get("commit_sha"),
+        "changed": [path for path in paths if path not in unknown],
+        "affected": affected,
+        "affected_count": len(affected),
+        "unknown_paths": unknown
+    }
+
+@router.get("/analyses/{analysis_id}/graph")
+async def get_analysis_graph(
+    analysis_id: str,
+    format: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """
+    Get the dependency graph of an analysis: a path table, (importer, imported) index
+    pairs and per-file metric columns. MessagePack (format=msgpack or Accept:
+    application/msgpack) carries edges as uint32 and columns as int32 little-endian
+    bytes; JSON spells them out as integer lists.
+    """
+    from services.graph_store import GraphStore
+    
+    if format is None:
+        format = GraphStore.MSGPACK if accept and GraphStore.MEDIA_TYPES[GraphStore.MSGPACK] in accept else GraphStore.JSON
+    if format not in GraphStore.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}. Use one of {list(GraphStore.FORMATS)}")
+    
+    analysis = await db["analyses"].find_one(
+        {"analysis_id": analysis_id, "user_github_id": current_user["github_id"]},
+        {"_id": 0, "analysis_id": 1, "shared_from": 1}
+    )
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    graph = await GraphStore(db).load(analysis)
+    if not graph:
+        raise HTTPException(status_code=404, detail="Analysis has no dependency graph")
+    
+    body, media_type = await asyncio.to_thread(GraphStore.encode, graph, format)
+    # Analyses never change, so clients may keep the graph
+    return Response(content=body, media_type=media_type, headers={"Cache-Control": "private, max-age=86400", "Vary": "Accept"})
+
+@router.get("/analyses/{analysis_id}/dependents")
+async def get_dependents(
+    analysis_id: str,
+    path: str,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+) -> Dict[str, Any]:
+    """Get the files that transitively depend on a file."""
+    analysis = await db["analyses"].find_one(
+        {"analysis_id": analysis_id, "user_github_id": current_user["github_id"]},
+        {"_id": 0, "analysis_id": 1, "commit_sha": 1, "shared_from": 1}
+    )
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    return await _blast_radius(db, analysis, [path])
+
+@router.post("/analyses/{analysis_id}/blast-radius")
+async def get_analysis_blast_radius(
+    analysis_id: str,
+    request: BlastRadiusRequest,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+) -> Dict[str, Any]:
+    """Get the files affected by a change set: every file that transitively depends on a changed one."""
+    analysis = await db["analyses"].find_one(
+        {"analysis_id": analysis_id, "user_github_id": current_user["github_id"]},
+        {"_id": 0, "analysis_id": 1, "commit_sha": 1, "shared_from": 1}
+    )
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
+    return await _blast_radius(db, analysis, request.paths)
+
+@router.post("/{repo_id}/blast-radius")
+async def get_repository_blast_radius(
+    repo_id: int,
+    request: BlastRadiusRequest,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+) -> Dict[str, Any]:
+    """
+    Get the files affected by a change set against the latest analysis of a repository,
+    or the latest one of commit_sha. Meant for CI, which knows the repository but not analysis ids.
+    """
+    query = {"repo_id": repo_id, "user_github_id": current_user["github_id"]}
+    if request.commit_sha:
+        query["commit_sha"] = request.commit_sha
+    analysis = await db["analyses"].find_one(
+        query,
+        {"_id": 0, "analysis_id": 1, "commit_sha": 1, "shared_from": 1},
+        sort=[("analyzed_at", -1)]
+    )
+    if not analysis:
+        raise HTTPException(status_code=404, detail="No analysis of this repository found")
+    
+    return await _blast_radius(db, analysis, request.paths)
+
+@router.get("/{repo_id}/trends")
+async def get_repository_trends(
+    repo_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    bucket: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+) -> Dict[str, Any]:
+    """
+    Get the metric history of a repository, oldest first.
+    bucket=day|week|month keeps the last analysis of each period.
+    """
+    if bucket and bucket not in MetricSeries.BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Unknown bucket: {bucket}. Use one of {list(MetricSeries.BUCKETS)}")
+    
+    points = await MetricSeries(db).trend(repo_id, current_user["github_id"], since, until, bucket)
+    return {"repo_id": repo_id, "points": points, "count": len(points)}
+
+@router.get("/{repo_id}/files/trend")
+async def get_file_trend(
+    repo_id: int,
+    path: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_user),
+    db = Depends(get_database)
+) -> Dict[str, Any]:
+    """Get the metric history of one file of a repository, oldest first."""
+    points = await MetricSeries(db).file_trend(repo_id, current_user["github_id"], path, since, until)
+    return {"repo_id": repo_id, "path": path, "points": points, "count": len(points)}
+
+@router.get("/analyses/{analysis_id}/profile")
+async def get_analysis_profile(
+    analysis_id: str,
+    format: str = "summary",
+    admin_user: dict = Depends(get_admin_user),
+    db = Depends(get_database)
+):
+    """
+    Get the profile captured for an analysis run (admin only).
+    format=summary returns the cumulative-time table and allocation peaks as JSON;
+    format=pstats downloads the raw profile for pstats/snakeviz.
+    """
+    profile = await db["analysis_profiles"].find_one({"analysis_id": analysis_id}, {"_id": 0})
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    if format == "pstats":
+        return Response(
+            content=bytes(profile["pstats_data"]),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{analysis_id}.prof"'}
+        )
+    
+    profile.pop("pstats_data", None)
+    return profile
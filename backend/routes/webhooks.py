@@ -0,0 +1,101 @@
+from fastapi import APIRouter, HTTPException, Depends, Request, Header
+from typing import Dict, Any, Optional
+import hashlib
+import hmac
+import json
+import logging
+from config import get_settings
+from auth.dependencies import get_database
+from services.feasibility import FeasibilityChecker
+from services.job_queue import AnalysisJobQueue
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/webhooks", tags=["webhooks"])
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check an X-Hub-Signature-256 header against the raw request body."""
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+def push_repository(payload: Any) -> Optional[Dict[str, Any]]:
+    """The pushed repository, or None if the payload lacks the fields a job needs."""
+    repo = payload.get("repository") if isinstance(payload, dict) else None
+    if not isinstance(repo, dict):
+        return None
+    if not isinstance(repo.get("id"), int) or not all(isinstance(repo.get(key), str) for key in ("full_name", "clone_url")):
+        return None
+    return repo
+
+@router.post("/github")
+async def github_webhook(
+    request: Request,
+    x_github_event: Optional[str] = Header(None),
+    x_github_delivery: Optional[str] = Header(None),
+    x_hub_signature_256: Optional[str] = Header(None),
+    db = Depends(get_database)
+) -> Dict[str, Any]:
+    """
+    Receive GitHub push events and queue a background re-analysis of the pushed commit.
+    Pushes to a repository's default branch are debounced per user and branch:
+    a burst of pushes becomes one job for the latest commit once pushes settle.
+    """
+    settings = get_settings()
+    if not settings.github_webhook_secret:
+        raise HTTPException(
+            status_code=503,
+            detail="GitHub webhook not configured. Please set GITHUB_WEBHOOK_SECRET."
+        )
+    
+    body = await request.body()
+    if not verify_signature(settings.github_webhook_secret, body, x_hub_signature_256):
+        logger.warning(f"Rejected webhook delivery {x_github_delivery}: invalid signature")
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    
+    if x_github_event == "ping":
+        return {"status": "pong"}
+    if x_github_event != "push":
+        return {"status": "ignored", "reason": f"Unhandled event {x_github_event}"}
+    
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        payload = None
+    # A valid signature only proves the sender; the body can still be unusable
+    repo = push_repository(payload)
+    if repo is None:
+        logger.warning(f"Rejected webhook delivery {x_github_delivery}: malformed push payload")
+        raise HTTPException(status_code=400, detail="Malformed push payload: repository id, full_name and clone_url are required")
+    ref = payload.get("ref", "")
+    
+    # Analyses always check out the default branch head, so other refs are not analyzed
+    if payload.get("deleted") or ref != f"refs/heads/{repo.get('default_branch')}":
+        return {"status": "ignored", "reason": f"Not a push to the default branch: {ref}"}
+    
+    # Re-analyze, in the mode of their latest analysis, for every user who has analyzed the
+    # repository; they share one analysis through deduplication and each gets it in their history
+    cursor = db["analyses"].aggregate([
+        {"$match": {"repo_id": repo["id"]}},
+        {"$sort": {"analyzed_at": -1}},
+        {"$group": {"_id": "$user_github_id", "mode": {"$first": "$mode"}}}
+    ])
+    subscribers = [doc async for doc in cursor]
+    if not subscribers:
+        return {"status": "ignored", "reason": "Repository has not been analyzed by any user"}
+    
+    queue = AnalysisJobQueue(db)
+    jobs = []
+    for subscriber in subscribers:
+        job = await queue.enqueue_coalesced(
+            repo,
+            subscriber["_id"],
+            coalesce_key=f"push:{repo['id']}:{ref}:{subscriber['_id']}",
+            commit_sha=payload.get("after"),
+            delay_seconds=settings.webhook_debounce_seconds,
+            large_repo=subscriber.get("mode") == FeasibilityChecker.LARGE_MODE
+        )
+        jobs.append(job["job_id"])
+    
+    logger.info(f"Queued re-analysis of {repo['full_name']}@{payload.get('after')} for {len(jobs)} users (delivery {x_github_delivery})")
+    return {"status": "queued", "jobs": jobs}
@@ -0,0 +1,178 @@
+"""
+Analyze a local checkout without the API, GitHub or MongoDB, e.g. as a CI step.
+
+Feasibility and risk detection run as they do for an analysis requested through the API,
+with files parsed in parallel worker processes and parse results cached on disk between
+runs, keyed by file content, so a fresh CI checkout reuses them. Writes JSON or SARIF.
+Exits 1 when more than --max-risks risks of at least --fail-on confidence are found,
+and 2 when the checkout is not feasible to analyze.
+
+Run from the backend directory:
+    python -m scripts.analyze /path/to/checkout
+    python -m scripts.analyze /path/to/checkout --format sarif --output pei.sarif --fail-on high
+    python -m scripts.analyze /path/to/checkout --rules-file rules.json --organization acme --fail-on medium --max-risks 10
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+# Settings require these; nothing connects to MongoDB
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'pei_cli')
+
+LEVELS = ['high', 'medium', 'low']
+SARIF_LEVELS = {'high': 'error', 'medium': 'warning', 'low': 'note'}
+
+def default_cache_dir() -> Path:
+    return Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'pei' / 'parse'
+
+def gate(risks: List[Dict[str, Any]], fail_on: str, max_risks: int) -> Tuple[int, bool]:
+    """Risks at or above fail_on confidence, and whether there are more than max_risks of them."""
+    if fail_on == 'none':
+        return 0, False
+    counted = sum(1 for risk in risks if LEVELS.index(risk['confidence']) <= LEVELS.index(fail_on))
+    return counted, counted > max_risks
+
+def to_sarif(risks: List[Dict[str, Any]], root: Path, version: str) -> Dict[str, Any]:
+    """SARIF 2.1.0 log with one rule per risk title and one result per risk, located in its files."""
+    rules: Dict[str, Dict[str, Any]] = {}
+    results = []
+    for risk in risks:
+        rule_id = re.sub(r'[^a-z0-9]+', '-', risk['title'].lower()).strip('-')
+        if rule_id not in rules:
+            rules[rule_id] = {
+                'id': rule_id,
+                'shortDescription': {'text': risk['title']},
+                'fullDescription': {'text': risk['why_it_matters']}
+            }
+        locations = [
+            {'physicalLocation': {'artifactLocation': {'uri': quote(Path(path).as_posix()), 'uriBaseId': 'SRCROOT'}}}
+            for path in risk['files']
+        ]
+        result = {
+            'ruleId': rule_id,
+            'ruleIndex': list(rules).index(rule_id),
+            'level': SARIF_LEVELS[risk['confidence']],
+            'message': {'text': f"{risk['evidence']} {risk['suggested_action']}"},
+            'locations': locations[:1]
+        }
+        # Cycles and duplicates span several files; the first is where the result is shown
+        if len(locations) > 1:
+            result['relatedLocations'] = [{'id': i, **location} for i, location in enumerate(locations[1:], 1)]
+        results.append(result)
+    
+    return {
+        '$schema': 'https://json.schemastore.org/sarif-2.1.0.json',
+        'version': '2.1.0',
+        'runs': [{
+            'tool': {'driver': {'name': 'PEI', 'version': version, 'rules': list(rules.values())}},
+            'originalUriBaseIds': {'SRCROOT': {'uri': root.as_uri() + '/'}},
+            'results': results
+        }]
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze a local checkout and report engineering risks")
+    parser.add_argument('path', help="Checkout to analyze")
+    parser.add_argument('--format', choices=('json', 'sarif'), default='json')
+    parser.add_argument('--output', help="File to write; stdout by default")
+    parser.add_argument('--large', action='store_true', help="Large-repository mode: higher limits, compact records, budget")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Parse worker processes")
+    parser.add_argument('--cache-dir', default=str(default_cache_dir()), help="Parse cache directory")
+    parser.add_argument('--no-cache', action='store_true', help="Parse every file, without reading or writing the cache")
+    parser.add_argument('--rules-file', help="Risk rule thresholds file (RISK_RULES_FILE)")
+    parser.add_argument('--organization', help="Organization whose thresholds in the rules file apply")
+    parser.add_argument('--fail-on', choices=('high', 'medium', 'low', 'none'), default='none',
+                        help="Lowest confidence counted towards --max-risks")
+    parser.add_argument('--max-risks', type=int, default=0, help="Counted risks allowed before exiting 1")
+    parser.add_argument('--symbols', action='store_true', help="Function-level risks (SYMBOL_GRAPH)")
+    parser.add_argument('--duplicates', action='store_true', help="Duplicated code (DUPLICATE_DETECTION)")
+    parser.add_argument('--history-days', type=int, help="Change hotspots from the checkout's own git history (HISTORY_DAYS)")
+    args = parser.parse_args(argv)
+    
+    repo_path = Path(args.path).resolve()
+    if not repo_path.is_dir():
+        parser.error(f"{args.path} is not a directory")
+    
+    # Options map onto settings, which parse workers read from the environment too
+    if args.rules_file:
+        os.environ['RISK_RULES_FILE'] = args.rules_file
+    if args.symbols:
+        os.environ['SYMBOL_GRAPH'] = 'true'
+    if args.duplicates:
+        os.environ['DUPLICATE_DETECTION'] = 'true'
+    if args.history_days is not None:
+        os.environ['HISTORY_DAYS'] = str(args.history_days)
+    
+    # The analysis stack is imported once settings are in place
+    from analyzers import ANALYZER_VERSION
+    from analyzers.parse_cache import ParseCache
+    from analyzers.rules import load_thresholds
+    from services.analysis_pipeline import analyze_checkout
+    from services.metrics import AnalysisMetrics
+    
+    start = time.perf_counter()
+    metrics = AnalysisMetrics()
+    fields = analyze_checkout(
+        repo_path,
+        args.large,
+        metrics,
+        thresholds=load_thresholds(args.organization),
+        workers=max(args.workers, 1),
+        parse_cache=None if args.no_cache else ParseCache(Path(args.cache_dir))
+    )
+    elapsed = time.perf_counter() - start
+    
+    feasibility = fields["feasibility"]
+    if not feasibility["is_feasible"]:
+        print(f"{repo_path} is not feasible to analyze in {fields['mode']} mode:", file=sys.stderr)
+        for reason in feasibility["reasons"]:
+            print(f"  {reason}", file=sys.stderr)
+        return 2
+    
+    risks = fields["risks"]
+    counted, failed = gate(risks, args.fail_on, args.max_risks)
+    
+    if args.format == 'sarif':
+        document = to_sarif(risks, repo_path, ANALYZER_VERSION)
+    else:
+        document = {
+            "path": str(repo_path),
+            "analyzer_version": ANALYZER_VERSION,
+            "mode": fields["mode"],
+            "feasibility": feasibility,
+            "risks": risks,
+            "degraded": fields["degraded"],
+            "monorepo": fields["monorepo"],
+            "history": fields["history"],
+            "analysis_time_seconds": round(elapsed, 2),
+            "metrics": metrics.to_dict(),
+            "gate": {"fail_on": args.fail_on, "max_risks": args.max_risks, "counted": counted, "failed": failed}
+        }
+    
+    output = json.dumps(document, indent=2, default=str)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    
+    by_level = {level: sum(1 for risk in risks if risk['confidence'] == level) for level in LEVELS}
+    counts = metrics.to_dict().get("counts", {})
+    print(
+        f"{len(risks)} risks ({', '.join(f'{n} {level}' for level, n in by_level.items())}) in {elapsed:.2f}s; "
+        f"{counts.get('parse_cache_hits', 0)} of {counts.get('files_parsed', 0)} files from the parse cache",
+        file=sys.stderr
+    )
+    if failed:
+        print(f"FAIL: {counted} risks of {args.fail_on} confidence or above, {args.max_risks} allowed", file=sys.stderr)
+    
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Check that the API imports within a time budget and without the analysis stack.
+
+Each run imports the module in a fresh interpreter. The best wall time of --repeat runs
+is compared against the budget, and a python -X importtime run lists the slowest imports.
+Exits 1 if the budget is exceeded or a forbidden module was loaded.
+
+Run from the backend directory:
+    python -m scripts.import_budget
+    python -m scripts.import_budget --budget-ms 700 --repeat 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Loaded by the analysis routes on first use; importing the API must not pull them in
+FORBIDDEN_MODULES = ['git', 'networkx', 'numpy', 'msgpack', 'services.analysis_pipeline', 'services.batch']
+
+MARKER = "--import-budget--"
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    # Settings require these; nothing connects during import
+    env.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+    env.setdefault('DB_NAME', 'import_budget')
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+
+def measure(module: str) -> Tuple[float, List[str]]:
+    """Import module in a fresh interpreter. Returns (seconds, loaded module names)."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print({MARKER!r}, elapsed, *sys.modules)\n"
+    )
+    output = _run(['-c', code]).stdout
+    line = next(line for line in output.splitlines() if line.startswith(MARKER))
+    _, elapsed, *modules = line.split()
+    return float(elapsed), modules
+
+def slowest_imports(module: str, top: int) -> List[Tuple[str, float]]:
+    """Direct imports of module by cumulative import time, slowest first."""
+    stderr = _run(['-X', 'importtime', '-c', f"import {module}"]).stderr
+    cumulative: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line[len("import time:"):].split("|")
+        # Direct imports are indented by three spaces in importtime's tree
+        if name.startswith("   ") and not name.startswith("    ") and total.strip().isdigit():
+            cumulative[name.strip()] = int(total) / 1000
+    return sorted(cumulative.items(), key=lambda x: -x[1])[:top]
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the API's import time and loaded modules")
+    parser.add_argument('--module', default='server', help="Module to import")
+    parser.add_argument('--budget-ms', type=float, default=800.0, help="Allowed import time of the best run")
+    parser.add_argument('--repeat', type=int, default=3, help="Fresh-interpreter runs; the fastest counts")
+    parser.add_argument('--top', type=int, default=10, help="Slowest direct imports to list")
+    args = parser.parse_args(argv)
+    
+    runs = [measure(args.module) for _ in range(args.repeat)]
+    elapsed_ms = min(elapsed for elapsed, _ in runs) * 1000
+    loaded = set(runs[0][1])
+    forbidden = [name for name in FORBIDDEN_MODULES if name in loaded]
+    
+    print(f"import {args.module}: {elapsed_ms:.0f} ms (budget {args.budget_ms:.0f} ms, best of {args.repeat})")
+    for name, ms in slowest_imports(args.module, args.top):
+        print(f"  {ms:8.1f} ms  {name}")
+    
+    failed = False
+    if elapsed_ms > args.budget_ms:
+        print(f"FAIL: import time exceeds the budget by {elapsed_ms - args.budget_ms:.0f} ms")
+        failed = True
+    if forbidden:
+        print(f"FAIL: importing {args.module} loads {', '.join(forbidden)}; import them where they are used")
+        failed = True
+    
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
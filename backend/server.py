@@ -1,14 +1,19 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Response
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 import os
 import logging
 from pathlib import Path
 
 # Import routes
-from routes import auth, repos
-from database import connect_to_mongo, close_mongo_connection
+from routes import auth, repos, webhooks
+from config import get_settings
+from database import db, warm_up_mongo, close_mongo_connection
+from middleware.compression import CompressionMiddleware
+from services.metrics import render_metrics
 
 
 ROOT_DIR = Path(__file__).parent
@@ -21,7 +26,8 @@ print(f"MONGO_URL from env: {os.environ.get('MONGO_URL', 'NOT FOUND')}")
 app = FastAPI(
     title="PEI - Predictive Engineering Intelligence",
     description="AI-assisted repository analysis for detecting engineering risks",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Create a router with the /api prefix for health checks
@@ -38,14 +44,38 @@ async def root():
 async def health():
     return {"status": "ok"}
 
+@api_router.get("/ready")
+async def ready():
+    """
+    Readiness probe: the app is ready once started, without waiting for MongoDB.
+    mongo reports the warm-up: connecting, connected or unavailable.
+    """
+    return {"status": "ready", "mongo": db.status}
+
 @app.get("/")
 async def app_root():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics: analysis phase timings, GitHub API and MongoDB latencies."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # Include routers
 app.include_router(api_router)
 app.include_router(auth.router)
 app.include_router(repos.router)
+app.include_router(webhooks.router)
+
+# Compress large responses; analyses repeat long risk text and file lists
+settings = get_settings()
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_bytes,
+    brotli_quality=settings.compression_brotli_quality,
+    gzip_level=settings.compression_gzip_level
+)
 
 # Configure CORS
 app.add_middleware(
@@ -64,12 +94,18 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Startup and shutdown events
+warm_up_task = None
+
 @app.on_event("startup")
 async def startup_event():
-    await connect_to_mongo()
+    global warm_up_task
+    # Readiness must not wait out a slow or unreachable MongoDB, nor its SRV lookup
+    warm_up_task = asyncio.create_task(warm_up_mongo())
     logger.info("Application startup complete")
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    if warm_up_task:
+        warm_up_task.cancel()
     await close_mongo_connection()
     logger.info("Application shutdown complete")
\ No newline at end of file
@@ -0,0 +1,243 @@
+import asyncio
+import math
+import shutil
+import tempfile
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional, AsyncIterator
+import logging
+from config import get_settings
+from services.metrics import ADMISSION_RUNNING, ADMISSION_WAITING, ADMISSION_REJECTIONS
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+class AdmissionRejected(Exception):
+    """Raised when an analysis cannot be admitted. retry_after is a hint in seconds."""
+    
+    def __init__(self, reason: str, message: str, retry_after: int):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Limits how many analyses run at once, globally and per user, and how much
+    disk their checkouts may take.
+    
+    Requests over the limits wait in per-user queues that are served round-robin,
+    so one user's burst cannot starve everyone else. Requests that find the queue
+    full, wait longer than max_wait_seconds, or would overrun the disk budget are
+    rejected immediately with a retry hint instead of piling up.
+    """
+    
+    DEFAULT_RUN_SECONDS = 30.0
+    
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_user: int,
+        max_waiting: int,
+        max_wait_seconds: float,
+        disk_budget_bytes: int,
+        min_free_disk_bytes: int,
+        min_reservation_bytes: int = 0,
+        checkout_dir: Optional[str] = None
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_waiting = max_waiting
+        self.max_wait_seconds = max_wait_seconds
+        self.disk_budget_bytes = disk_budget_bytes
+        self.min_free_disk_bytes = min_free_disk_bytes
+        self.min_reservation_bytes = min_reservation_bytes
+        self.checkout_dir = checkout_dir or tempfile.gettempdir()
+        
+        self.running: Dict[Any, int] = {}
+        self.running_total = 0
+        self.reserved_bytes = 0
+        self.waiting: "OrderedDict[Any, Deque[asyncio.Future]]" = OrderedDict()
+        self.waiting_total = 0
+        self.disk_waiters: List[asyncio.Future] = []
+        self.avg_run_seconds: Optional[float] = None
+    
+    @classmethod
+    def from_settings(cls, max_concurrent: Optional[int] = None) -> "AdmissionController":
+        settings = get_settings()
+        return cls(
+            max_concurrent=max_concurrent or settings.admission_max_concurrent,
+            max_per_user=settings.admission_max_per_user,
+            max_waiting=settings.admission_max_waiting,
+            max_wait_seconds=settings.admission_max_wait_seconds,
+            disk_budget_bytes=settings.checkout_disk_budget_mb * MB,
+            min_free_disk_bytes=settings.checkout_min_free_disk_mb * MB,
+            min_reservation_bytes=settings.checkout_min_reservation_mb * MB
+        )
+    
+    @asynccontextmanager
+    async def admit(self, user_id: Any, estimated_bytes: int = 0) -> AsyncIterator[None]:
+        """
+        Hold an analysis slot and a disk reservation for the duration of the block.
+        Raises AdmissionRejected when capacity is saturated.
+        """
+        reservation = max(estimated_bytes, self.min_reservation_bytes)
+        # Fail fast before queueing, and again once admitted since checkouts change while waiting
+        self._check_disk(reservation)
+        await self._acquire(user_id)
+        try:
+            self._check_disk(reservation)
+        except AdmissionRejected:
+            self._release(user_id)
+            raise
+        
+        self.reserved_bytes += reservation
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release_disk(reservation)
+            self._record_run(time.monotonic() - start)
+            self._release(user_id)
+    
+    async def reserve_disk(self, estimated_bytes: int = 0) -> int:
+        """
+        Reserve disk for one more checkout of an admitted analysis, such as a batch.
+        Waits while other checkouts hold the budget, rather than rejecting; raises
+        AdmissionRejected when the reservation can never fit or free disk is short.
+        Returns the reservation, to be passed to release_disk once the checkout is removed.
+        """
+        reservation = max(estimated_bytes, self.min_reservation_bytes)
+        if reservation > self.disk_budget_bytes:
+            self._reject(
+                "disk_budget",
+                f"Checkout of {reservation // MB} MB exceeds the {self.disk_budget_bytes // MB} MB disk budget"
+            )
+        
+        while self.reserved_bytes + reservation > self.disk_budget_bytes:
+            future = asyncio.get_running_loop().create_future()
+            self.disk_waiters.append(future)
+            try:
+                await future
+            finally:
+                if future in self.disk_waiters:
+                    self.disk_waiters.remove(future)
+        
+        self._check_disk(reservation)
+        self.reserved_bytes += reservation
+        return reservation
+    
+    def release_disk(self, reservation: int):
+        self.reserved_bytes -= reservation
+        # Every waiter rechecks the budget; whoever still does not fit waits again
+        waiters, self.disk_waiters = self.disk_waiters, []
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
+    
+    def retry_after(self) -> int:
+        """Seconds until a new request is likely to be admitted."""
+        run_seconds = self.avg_run_seconds or self.DEFAULT_RUN_SECONDS
+        waves = max(1.0, (self.waiting_total + 1) / self.max_concurrent)
+        return max(1, math.ceil(run_seconds * waves))
+    
+    def _reject(self, reason: str, message: str):
+        ADMISSION_REJECTIONS.labels(reason=reason).inc()
+        logger.warning(f"Admission rejected ({reason}): {message}")
+        raise AdmissionRejected(reason, message, self.retry_after())
+    
+    def _check_disk(self, reservation: int):
+        if self.reserved_bytes + reservation > self.disk_budget_bytes:
+            self._reject(
+                "disk_budget",
+                f"Checkout disk budget in use ({self.reserved_bytes // MB} of {self.disk_budget_bytes // MB} MB reserved)"
+            )
+        
+        free = shutil.disk_usage(self.checkout_dir).free
+        if free - reservation < self.min_free_disk_bytes:
+            self._reject("disk_free", f"Only {free // MB} MB free for checkouts in {self.checkout_dir}")
+    
+    def _can_run(self, user_id: Any) -> bool:
+        return self.running_total < self.max_concurrent and self.running.get(user_id, 0) < self.max_per_user
+    
+    def _start(self, user_id: Any):
+        self.running[user_id] = self.running.get(user_id, 0) + 1
+        self.running_total += 1
+        ADMISSION_RUNNING.set(self.running_total)
+    
+    async def _acquire(self, user_id: Any):
+        # Free capacity always goes to waiters first, so a user with queued requests queues behind them
+        if user_id not in self.waiting and self._can_run(user_id):
+            self._start(user_id)
+            return
+        
+        if self.waiting_total >= self.max_waiting:
+            self._reject("queue_full", f"{self.waiting_total} analyses already waiting")
+        
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.setdefault(user_id, deque()).append(future)
+        self.waiting_total += 1
+        ADMISSION_WAITING.set(self.waiting_total)
+        
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            if not future.done():
+                self._remove_waiter(user_id, future)
+                self._reject("wait_timeout", f"No analysis slot within {self.max_wait_seconds:g}s")
+        except asyncio.CancelledError:
+            # A slot granted to a caller that went away is handed on
+            if future.done():
+                self._release(user_id)
+            else:
+                self._remove_waiter(user_id, future)
+            raise
+    
+    def _remove_waiter(self, user_id: Any, future: asyncio.Future):
+        queue = self.waiting.get(user_id)
+        if queue and future in queue:
+            queue.remove(future)
+            self.waiting_total -= 1
+            if not queue:
+                del self.waiting[user_id]
+            ADMISSION_WAITING.set(self.waiting_total)
+    
+    def _release(self, user_id: Any):
+        self.running[user_id] -= 1
+        if not self.running[user_id]:
+            del self.running[user_id]
+        self.running_total -= 1
+        ADMISSION_RUNNING.set(self.running_total)
+        self._dispatch()
+    
+    def _dispatch(self):
+        """Hand free slots to waiting users, one request per user per round."""
+        while self.running_total < self.max_concurrent:
+            user_id = next((u for u in self.waiting if self._can_run(u)), None)
+            if user_id is None:
+                return
+            
+            queue = self.waiting[user_id]
+            future = queue.popleft()
+            self.waiting_total -= 1
+            if queue:
+                self.waiting.move_to_end(user_id)
+            else:
+                del self.waiting[user_id]
+            ADMISSION_WAITING.set(self.waiting_total)
+            
+            self._start(user_id)
+            future.set_result(None)
+    
+    def _record_run(self, seconds: float):
+        if self.avg_run_seconds is None:
+            self.avg_run_seconds = seconds
+        else:
+            self.avg_run_seconds = 0.8 * self.avg_run_seconds + 0.2 * seconds
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    """The controller shared by every request handled by this process."""
+    return AdmissionController.from_settings()
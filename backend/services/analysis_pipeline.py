@@ -0,0 +1,326 @@
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import logging
+from analyzers import ANALYZER_VERSION
+from config import get_settings
+from services.cloner import RepositoryCloner
+from services.feasibility import FeasibilityChecker
+from services.graph_store import GraphStore
+from services.history import GitHistory
+from services.metric_series import MetricSeries
+from services.metrics import AnalysisMetrics
+from services.monorepo import MonorepoAnalyzer
+from services.profiler import AnalysisProfiler
+from services.reachability_store import ReachabilityStore
+from analyzers.budget import AnalysisBudget
+from analyzers.parse_cache import ParseCache
+from analyzers.reachability import ReachabilityIndex
+from analyzers.risk_detector import RiskDetector
+from analyzers.rules import load_thresholds
+from models.analysis import Risk
+
+logger = logging.getLogger(__name__)
+
+# Analyzer stats -> phase names used for timings and the metrics endpoint
+STAT_PHASES = {
+    'parse_seconds': 'parse',
+    'edge_resolution_seconds': 'edge_resolution',
+    'cycle_detection_seconds': 'cycle_detection',
+    'symbol_graph_seconds': 'symbol_graph',
+    'duplicate_detection_seconds': 'duplicate_detection',
+    'risk_rules_seconds': 'risk_rules'
+}
+STAT_COUNTS = (
+    'files_parsed', 'bytes_read', 'edges', 'cycles', 'symbols', 'call_edges', 'fingerprints', 'clone_clusters',
+    'parse_cache_hits'
+)
+
+class CloneError(Exception):
+    """Raised when a repository cannot be cloned."""
+
+def serialize_risks(risks: List[Risk]) -> List[Dict[str, Any]]:
+    """Convert Risk objects to dicts"""
+    return [
+        {
+            "title": risk.title,
+            "files": risk.files,
+            "evidence": risk.evidence,
+            "why_it_matters": risk.why_it_matters,
+            "suggested_action": risk.suggested_action,
+            "confidence": risk.confidence
+        }
+        for risk in risks
+    ]
+
+def analyze_checkout(
+    repo_path: Path,
+    large_repo: bool = False,
+    metrics: Optional[AnalysisMetrics] = None,
+    thresholds: Optional[Dict[str, float]] = None,
+    workers: int = 1,
+    parse_cache: Optional[ParseCache] = None
+) -> Dict[str, Any]:
+    """
+    Run feasibility and risk detection on a cloned repository, with the given risk rule thresholds or the defaults.
+    workers parse files of a single-package repository in parallel; monorepo packages are analyzed in parallel regardless.
+    Returns the analysis result fields: {feasibility, mode, risks, degraded, monorepo, history, file_metrics, edges, reachability}
+    file_metrics holds per-file columns, with commit counts when the history stage ran, edges the dependency edges as packed uint32
+    index pairs into file_metrics['paths'] and reachability the serialized
+    ReachabilityIndex; save_analysis moves them out of the analysis document.
+    """
+    metrics = metrics or AnalysisMetrics()
+    mode = FeasibilityChecker.LARGE_MODE if large_repo else FeasibilityChecker.STANDARD_MODE
+    
+    with metrics.phase("feasibility"):
+        feasibility_result = FeasibilityChecker.check_feasibility(repo_path, mode)
+    
+    fields = {
+        "feasibility": feasibility_result,
+        "mode": mode,
+        "risks": [],
+        "degraded": None,
+        "monorepo": None,
+        "history": None,
+        "file_metrics": None,
+        "edges": None,
+        "reachability": None
+    }
+    
+    # If not feasible, skip risk detection
+    if not feasibility_result["is_feasible"]:
+        return fields
+    
+    settings = get_settings()
+    stats = feasibility_result["stats"]
+    
+    if stats["is_monorepo"]:
+        # Run risk detection per package, in parallel
+        logger.info(f"Running per-package risk detection on {repo_path} ({len(stats['packages'])} packages)")
+        monorepo_result = MonorepoAnalyzer.analyze(
+            repo_path,
+            stats["packages"],
+            budget_seconds=settings.large_time_budget_seconds if large_repo else None,
+            budget_memory_mb=settings.large_memory_budget_mb if large_repo else None,
+            max_cycles=settings.large_max_cycles if large_repo else None,
+            thresholds=thresholds,
+            parse_cache=parse_cache
+        )
+        detected_risks = monorepo_result["risks"]
+        analyzer_stats = monorepo_result["stats"]
+        fields["file_metrics"] = monorepo_result["file_metrics"]
+        edges = monorepo_result["edges"]
+        fields["monorepo"] = {
+            "packages": monorepo_result["packages"],
+            "dependencies": monorepo_result["dependencies"]
+        }
+    else:
+        # Run risk detection
+        logger.info(f"Running risk detection on {repo_path}")
+        primary_language = stats.get("primary_language", "Python")
+        if large_repo:
+            risk_detector = RiskDetector(
+                repo_path,
+                primary_language,
+                budget=AnalysisBudget(
+                    max_seconds=settings.large_time_budget_seconds,
+                    max_memory_mb=settings.large_memory_budget_mb
+                ),
+                compact=True,
+                max_cycles=settings.large_max_cycles,
+                thresholds=thresholds,
+                workers=workers,
+                parse_cache=parse_cache
+            )
+        else:
+            risk_detector = RiskDetector(
+                repo_path, primary_language, thresholds=thresholds, workers=workers, parse_cache=parse_cache
+            )
+        
+        detected_risks = risk_detector.detect_risks()
+        analyzer_stats = {**risk_detector.graph_builder.stats, **risk_detector.stats}
+        fields["file_metrics"] = risk_detector.file_metrics()
+        edges = risk_detector.edges
+        fields["degraded"] = risk_detector.graph_builder.degraded
+    
+    for key, phase in STAT_PHASES.items():
+        if key in analyzer_stats:
+            metrics.record_phase(phase, analyzer_stats[key])
+    metrics.add_counts(**{key: analyzer_stats[key] for key in STAT_COUNTS if key in analyzer_stats})
+    
+    # Churn from the commits the cloner fetched turns large, complex files that keep changing into hotspots
+    if settings.history_days:
+        try:
+            with metrics.phase("history"):
+                history = GitHistory.churn(
+                    repo_path,
+                    fields["file_metrics"]["paths"],
+                    settings.history_days,
+                    settings.history_max_commits
+                )
+            fields["file_metrics"]["commits"] = history.pop("file_commits").tolist()
+            churned_lines = history.pop("churned_lines")
+            if churned_lines is not None:
+                fields["file_metrics"]["churned_lines"] = churned_lines.tolist()
+            fields["history"] = history
+            metrics.add_counts(history_commits=history["commits"])
+            detected_risks = detected_risks + RiskDetector.detect_hotspots(
+                fields["file_metrics"], settings.history_days, thresholds
+            )
+            detected_risks.sort(key=lambda r: ['high', 'medium', 'low'].index(r.confidence))
+        except Exception as e:
+            logger.warning(f"Skipping history stage for {repo_path}: {str(e)}")
+    
+    fields["edges"] = edges.astype("<u4").tobytes()
+    
+    # The closure takes files^2 / 8 bytes, so very large graphs go without blast-radius queries
+    paths = fields["file_metrics"]["paths"]
+    if len(paths) <= settings.reachability_max_files:
+        with metrics.phase("reachability"):
+            fields["reachability"] = ReachabilityIndex.build(paths, edges).to_document()
+    else:
+        logger.warning(f"Skipping reachability index for {repo_path}: {len(paths)} files exceed {settings.reachability_max_files}")
+    
+    fields["risks"] = serialize_risks(detected_risks)
+    return fields
+
+def build_analysis_document(
+    repo: Dict[str, Any],
+    user: Dict[str, Any],
+    analysis_fields: Dict[str, Any],
+    metrics: AnalysisMetrics,
+    elapsed_seconds: float,
+    analysis_id: Optional[str] = None,
+    commit_sha: Optional[str] = None,
+    profiled: bool = False
+) -> Dict[str, Any]:
+    """Assemble the stored analysis document from analyze_checkout's fields."""
+    return {
+        "analysis_id": analysis_id or uuid.uuid4().hex,
+        "repo_id": repo["id"],
+        "repo_name": repo["name"],
+        "repo_full_name": repo["full_name"],
+        "user_github_id": user["github_id"],
+        "commit_sha": commit_sha,
+        "analyzer_version": ANALYZER_VERSION,
+        **analysis_fields,
+        "analyzed_at": datetime.now(timezone.utc).isoformat(),
+        "analysis_time_seconds": round(elapsed_seconds, 2),
+        "metrics": metrics.to_dict(),
+        "profiled": profiled
+    }
+
+def run_repository_analysis(
+    repo: Dict[str, Any],
+    user: Dict[str, Any],
+    large_repo: bool = False,
+    metrics: Optional[AnalysisMetrics] = None,
+    analysis_id: Optional[str] = None,
+    profiler: Optional[AnalysisProfiler] = None,
+    commit_sha: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Clone a repository, analyze it and remove the checkout. Blocking.
+    repo needs id, name, full_name and clone_url; user needs github_id, username and access_token.
+    With commit_sha, that commit is analyzed rather than the branch head at clone time.
+    Returns the analysis document, ready for save_analysis.
+    """
+    start_time = time.time()
+    metrics = metrics or AnalysisMetrics()
+    repo_path = None
+    
+    try:
+        logger.info(f"Cloning repository {repo['full_name']}")
+        with metrics.phase("clone"):
+            repo_path, clone_error = RepositoryCloner.clone_repository(
+                repo["clone_url"],
+                user["access_token"],
+                user["username"],
+                commit_sha=commit_sha
+            )
+        
+        if clone_error:
+            raise CloneError(clone_error)
+        
+        # Run feasibility check and, if feasible, risk detection with the owner's thresholds
+        logger.info(f"Analyzing {repo['full_name']}")
+        thresholds = load_thresholds(repo["full_name"].split("/")[0])
+        if profiler:
+            with profiler:
+                analysis_fields = analyze_checkout(repo_path, large_repo, metrics, thresholds)
+        else:
+            analysis_fields = analyze_checkout(repo_path, large_repo, metrics, thresholds)
+        
+        return build_analysis_document(
+            repo,
+            user,
+            analysis_fields,
+            metrics,
+            time.time() - start_time,
+            analysis_id=analysis_id,
+            commit_sha=commit_sha,
+            profiled=profiler is not None
+        )
+    finally:
+        # Always cleanup cloned repository
+        if repo_path:
+            RepositoryCloner.cleanup_repository(repo_path)
+
+async def save_analysis(db, result: Dict[str, Any], metrics: AnalysisMetrics) -> Dict[str, Any]:
+    """
+    Save an analysis document, keyed by analysis_id so a retried job overwrites
+    rather than duplicates, with its dependency graph and reachability index,
+    and append its metrics to the time series.
+    Returns the document with refreshed metrics.
+    """
+    file_metrics = result.pop("file_metrics", None)
+    edges = result.pop("edges", None)
+    reachability = result.pop("reachability", None)
+    with metrics.phase("mongo_write"):
+        await db["analyses"].replace_one({"analysis_id": result["analysis_id"]}, result, upsert=True)
+        if file_metrics and edges is not None:
+            await GraphStore(db).save(result["analysis_id"], GraphStore.build_document(file_metrics, edges))
+        if reachability:
+            await ReachabilityStore(db).save(result["analysis_id"], reachability)
+    result.pop("_id", None)
+    
+    # History is secondary to the analysis itself; a failed write only costs one point
+    try:
+        with metrics.phase("metric_series_write"):
+            await MetricSeries(db).record(result, file_metrics)
+    except Exception as e:
+        logger.warning(f"Could not record metric series for {result['analysis_id']}: {str(e)}")
+    
+    result["metrics"] = metrics.to_dict()
+    return result
+
+async def share_analysis(
+    db,
+    analysis: Dict[str, Any],
+    user_github_id: int,
+    analysis_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Save a copy of an analysis produced for another request under the user's id.
+    Returns the analysis unchanged if it already is the user's (and has the requested analysis_id).
+    """
+    if analysis["user_github_id"] == user_github_id and analysis_id in (None, analysis["analysis_id"]):
+        return analysis
+    
+    shared = {
+        **analysis,
+        "analysis_id": analysis_id or uuid.uuid4().hex,
+        "user_github_id": user_github_id,
+        "shared_from": analysis["analysis_id"]
+    }
+    await db["analyses"].replace_one({"analysis_id": shared["analysis_id"]}, shared, upsert=True)
+    shared.pop("_id", None)
+    
+    try:
+        await MetricSeries(db).copy(analysis, shared)
+    except Exception as e:
+        logger.warning(f"Could not record metric series for {shared['analysis_id']}: {str(e)}")
+    
+    return shared
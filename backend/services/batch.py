@@ -0,0 +1,268 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, AsyncIterator, Callable, Awaitable
+import logging
+from config import get_settings
+from services.admission import AdmissionController, AdmissionRejected, get_admission_controller
+from services.analysis_pipeline import analyze_checkout, build_analysis_document
+from services.cloner import RepositoryCloner
+from services.metrics import AnalysisMetrics
+from analyzers.rules import load_thresholds
+
+logger = logging.getLogger(__name__)
+
+def _analyze_in_process(repo_path: str, large_repo: bool, thresholds: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Run analyze_checkout in a worker process.
+    Returns: {fields, metrics}; metrics are replayed in the parent, whose registry /metrics serves.
+    """
+    metrics = AnalysisMetrics()
+    fields = analyze_checkout(Path(repo_path), large_repo, metrics, thresholds)
+    return {"fields": fields, "metrics": metrics.to_dict()}
+
+def _cleanup_when_done(future, on_removed: Callable[[], None], repo_path: Optional[Path] = None):
+    """Remove a checkout once an abandoned clone or analysis finishes in the background, then call on_removed."""
+    def cleanup(done):
+        path = repo_path
+        if path is None and not done.cancelled() and done.exception() is None:
+            path = done.result()[0]
+        if path:
+            RepositoryCloner.cleanup_repository(path)
+        on_removed()
+    future.add_done_callback(cleanup)
+
+class BatchSummary:
+    """Aggregates batch results as they arrive."""
+    
+    TOP_REPOSITORIES = 10
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = 0
+        self.status_counts: Dict[str, int] = {}
+        self.risks_by_confidence: Dict[str, int] = {}
+        self.risks_by_title: Dict[str, int] = {}
+        self.repositories: List[Dict[str, Any]] = []
+        self.clone_seconds = 0.0
+        self.analyze_seconds = 0.0
+    
+    def add(self, record: Dict[str, Any]):
+        self.total += 1
+        self.status_counts[record["status"]] = self.status_counts.get(record["status"], 0) + 1
+        
+        analysis = record.get("analysis")
+        if not analysis:
+            return
+        
+        timings = analysis["metrics"]["timings"]
+        self.clone_seconds += timings.get("clone", 0)
+        self.analyze_seconds += record.get("analyze_seconds", 0)
+        for risk in analysis["risks"]:
+            self.risks_by_confidence[risk["confidence"]] = self.risks_by_confidence.get(risk["confidence"], 0) + 1
+            self.risks_by_title[risk["title"]] = self.risks_by_title.get(risk["title"], 0) + 1
+        self.repositories.append({
+            "repo_id": analysis["repo_id"],
+            "repo_full_name": analysis["repo_full_name"],
+            "is_feasible": analysis["feasibility"]["is_feasible"],
+            "risk_count": len(analysis["risks"])
+        })
+    
+    def to_dict(self) -> Dict[str, Any]:
+        analyzed = self.repositories
+        return {
+            "type": "summary",
+            "repositories": self.total,
+            "succeeded": self.status_counts.get(BatchAnalyzer.SUCCEEDED, 0),
+            "failed": self.status_counts.get(BatchAnalyzer.FAILED, 0),
+            "infeasible": sum(1 for r in analyzed if not r["is_feasible"]),
+            "total_risks": sum(r["risk_count"] for r in analyzed),
+            "risks_by_confidence": self.risks_by_confidence,
+            "risks_by_title": dict(sorted(self.risks_by_title.items(), key=lambda x: -x[1])),
+            "top_repositories": sorted(analyzed, key=lambda r: -r["risk_count"])[:self.TOP_REPOSITORIES],
+            # Stage times are summed per repository; with overlap they exceed the wall time
+            "elapsed_seconds": round(time.perf_counter() - self.start, 2),
+            "clone_seconds": round(self.clone_seconds, 2),
+            "analyze_seconds": round(self.analyze_seconds, 2)
+        }
+
+class BatchAnalyzer:
+    """
+    Analyzes many repositories through a two-stage pipeline.
+    
+    Clones are network-bound and run on threads, at most clone_concurrency at a
+    time; analyses are CPU-bound and run in a pool of analyze_concurrency worker
+    processes. A hand-off queue as deep as the pool lets cloning run ahead of
+    analysis without piling checkouts up on disk. Each checkout also reserves its
+    repository's size against the admission controller's disk budget, shared with
+    every other analysis in the process, until it is removed.
+    """
+    
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    
+    def __init__(
+        self,
+        user: Dict[str, Any],
+        large_repo: bool = False,
+        clone_concurrency: Optional[int] = None,
+        analyze_concurrency: Optional[int] = None,
+        admission: Optional[AdmissionController] = None
+    ):
+        settings = get_settings()
+        self.user = user
+        self.large_repo = large_repo
+        self.clone_concurrency = clone_concurrency or settings.batch_clone_concurrency
+        self.analyze_concurrency = analyze_concurrency or settings.batch_analyze_concurrency
+        self.admission = admission or get_admission_controller()
+    
+    async def run(
+        self,
+        repos: List[Dict[str, Any]],
+        save: Optional[Callable[[Dict[str, Any], AnalysisMetrics], Awaitable[Dict[str, Any]]]] = None,
+        unresolved_ids: Optional[List[int]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield one result record per repository as it completes, then the summary record.
+        save(analysis, metrics) is awaited for each analysis before its record is yielded.
+        """
+        summary = BatchSummary()
+        
+        for repo_id in unresolved_ids or []:
+            record = self._failure({"id": repo_id, "full_name": None}, "Repository not found or you don't have access")
+            summary.add(record)
+            yield record
+        
+        results: asyncio.Queue = asyncio.Queue()
+        handoff: asyncio.Queue = asyncio.Queue(maxsize=self.analyze_concurrency)
+        clone_slots = asyncio.Semaphore(self.clone_concurrency)
+        pool = ProcessPoolExecutor(max_workers=self.analyze_concurrency)
+        
+        tasks = [asyncio.create_task(self._clone_stage(repo, clone_slots, handoff, results)) for repo in repos]
+        tasks += [asyncio.create_task(self._analyze_stage(pool, handoff, results)) for _ in range(self.analyze_concurrency)]
+        
+        try:
+            for _ in range(len(repos)):
+                record, metrics = await results.get()
+                if save and record["status"] == self.SUCCEEDED:
+                    record["analysis"] = await save(record["analysis"], metrics)
+                summary.add(record)
+                yield record
+        finally:
+            # Also reached when the client disconnects mid-stream
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            pool.shutdown(wait=False, cancel_futures=True)
+            # Checkouts cloned but never picked up for analysis
+            while not handoff.empty():
+                _, repo_path, reservation, _ = handoff.get_nowait()
+                RepositoryCloner.cleanup_repository(repo_path)
+                self.admission.release_disk(reservation)
+        
+        logger.info(f"Batch of {len(repos)} repositories complete")
+        yield summary.to_dict()
+    
+    async def _clone_stage(
+        self,
+        repo: Dict[str, Any],
+        clone_slots: asyncio.Semaphore,
+        handoff: asyncio.Queue,
+        results: asyncio.Queue
+    ):
+        async with clone_slots:
+            try:
+                # GitHub reports repository size in KB
+                reservation = await self.admission.reserve_disk((repo.get("size") or 0) * 1024)
+            except AdmissionRejected as e:
+                await results.put((self._failure(repo, f"Analysis capacity is saturated: {str(e)}"), None))
+                return
+            
+            start = time.perf_counter()
+            future = asyncio.get_running_loop().run_in_executor(
+                None,
+                RepositoryCloner.clone_repository,
+                repo["clone_url"],
+                self.user["access_token"],
+                self.user["username"]
+            )
+            try:
+                repo_path, clone_error = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                _cleanup_when_done(future, lambda: self.admission.release_disk(reservation))
+                raise
+            except Exception as e:
+                repo_path, clone_error = None, str(e)
+            
+            if clone_error:
+                # A failed clone removes its own directory
+                self.admission.release_disk(reservation)
+                await results.put((self._failure(repo, f"Failed to clone repository: {clone_error}"), None))
+                return
+            
+            try:
+                # Waits while the analyzers are busy, which holds this clone slot
+                await handoff.put((repo, repo_path, reservation, time.perf_counter() - start))
+            except asyncio.CancelledError:
+                RepositoryCloner.cleanup_repository(repo_path)
+                self.admission.release_disk(reservation)
+                raise
+    
+    async def _analyze_stage(self, pool: ProcessPoolExecutor, handoff: asyncio.Queue, results: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            repo, repo_path, reservation, clone_seconds = await handoff.get()
+            start = time.perf_counter()
+            # Thresholds are resolved here, so workers need not read the rules file
+            thresholds = load_thresholds(repo["full_name"].split("/")[0])
+            future = loop.run_in_executor(pool, _analyze_in_process, str(repo_path), self.large_repo, thresholds)
+            try:
+                output = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # A finished analysis is cleaned up below
+                if not future.done():
+                    _cleanup_when_done(future, lambda: self.admission.release_disk(reservation), repo_path)
+                raise
+            except Exception as e:
+                logger.error(f"Error analyzing {repo['full_name']}: {str(e)}")
+                await results.put((self._failure(repo, f"Analysis failed: {str(e)}"), None))
+                continue
+            finally:
+                if future.done():
+                    # Shielded, so a batch cancelled meanwhile still removes the checkout before releasing its disk
+                    removal = loop.run_in_executor(None, RepositoryCloner.cleanup_repository, repo_path)
+                    removal.add_done_callback(lambda _, reservation=reservation: self.admission.release_disk(reservation))
+                    await asyncio.shield(removal)
+            
+            analyze_seconds = time.perf_counter() - start
+            metrics = AnalysisMetrics()
+            metrics.record_phase("clone", clone_seconds)
+            for phase, seconds in output["metrics"]["timings"].items():
+                metrics.record_phase(phase, seconds)
+            metrics.add_counts(**output["metrics"]["counts"])
+            
+            analysis = build_analysis_document(
+                repo,
+                self.user,
+                output["fields"],
+                metrics,
+                clone_seconds + analyze_seconds
+            )
+            await results.put(({
+                "type": "result",
+                "repo_id": repo["id"],
+                "repo_full_name": repo["full_name"],
+                "status": self.SUCCEEDED,
+                "analyze_seconds": round(analyze_seconds, 2),
+                "analysis": analysis
+            }, metrics))
+    
+    def _failure(self, repo: Dict[str, Any], error: str) -> Dict[str, Any]:
+        return {
+            "type": "result",
+            "repo_id": repo["id"],
+            "repo_full_name": repo["full_name"],
+            "status": self.FAILED,
+            "error": error
+        }
@@ -2,24 +2,52 @@ import os
 import shutil
 import tempfile
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Tuple, Optional, List
 import git
 from git import Repo
 import logging
+from config import get_settings
+from services.feasibility import FeasibilityChecker
+from services.history import GitHistory
+from analyzers.dependency_graph import DependencyGraphBuilder
+from analyzers.registry import ANALYZERS
 
 logger = logging.getLogger(__name__)
 
 class RepositoryCloner:
+    FULL_MODE = "full"
+    SPARSE_MODE = "sparse"
+    MODES = (FULL_MODE, SPARSE_MODE)
+    
+    @staticmethod
+    def sparse_patterns() -> List[str]:
+        """
+        Non-cone sparse-checkout patterns for the files feasibility and the analyzers read.
+        Manifests match at any depth so monorepo packages are still found.
+        """
+        extensions = FeasibilityChecker.CODE_EXTENSIONS | set(ANALYZERS)
+        patterns = [f"*{ext}" for ext in sorted(extensions)]
+        patterns += sorted(FeasibilityChecker.PACKAGE_MANIFESTS)
+        patterns += [f"!**/{d}/**" for d in sorted(DependencyGraphBuilder.SKIP_DIRS - {'.git'})]
+        return patterns
+    
     @staticmethod
     def clone_repository(
         clone_url: str,
         access_token: str,
-        username: str
+        username: str,
+        mode: Optional[str] = None,
+        commit_sha: Optional[str] = None
     ) -> Tuple[Optional[Path], Optional[str]]:
         """
         Clone a repository to a temporary directory.
+        mode defaults to the clone_mode setting; sparse falls back to a full shallow clone if it fails.
+        With commit_sha, that commit is checked out instead of the default branch's head.
+        With history_days set, the clone is then deepened to that window of commits.
         Returns (path, error_message)
         """
+        settings = get_settings()
+        mode = mode or settings.clone_mode
         temp_dir = None
         try:
             temp_dir = tempfile.mkdtemp(prefix="pei_analysis_")
@@ -33,16 +61,33 @@ class RepositoryCloner:
             else:
                 auth_url = clone_url
             
-            logger.info(f"Cloning repository to {temp_dir}")
+            logger.info(f"Cloning repository to {temp_dir} ({mode} mode)")
+            if mode == RepositoryCloner.SPARSE_MODE:
+                try:
+                    RepositoryCloner._sparse_clone(auth_url, temp_dir)
+                    if commit_sha:
+                        RepositoryCloner._check_out_commit(temp_dir, commit_sha)
+                    if settings.history_days:
+                        GitHistory.fetch(Path(temp_dir), settings.history_days, commit_sha)
+                    return Path(temp_dir), None
+                except git.GitCommandError as e:
+                    logger.warning(f"Sparse clone failed (exit {e.status}), falling back to a full shallow clone")
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+                    os.makedirs(temp_dir)
+            
             Repo.clone_from(
                 auth_url,
                 temp_dir,
                 depth=1,
                 single_branch=True
             )
+            if commit_sha:
+                RepositoryCloner._check_out_commit(temp_dir, commit_sha)
+            if settings.history_days:
+                GitHistory.fetch(Path(temp_dir), settings.history_days, commit_sha)
             
             return Path(temp_dir), None
-            
+        
         except git.GitCommandError as e:
             logger.error(f"Git clone error: {str(e)}")
             if temp_dir and os.path.exists(temp_dir):
@@ -54,6 +99,36 @@ class RepositoryCloner:
                 shutil.rmtree(temp_dir, ignore_errors=True)
             return None, f"Unexpected error: {str(e)}"
     
+    @staticmethod
+    def _sparse_clone(auth_url: str, temp_dir: str):
+        """
+        Blobless shallow clone that only checks out files matching sparse_patterns(), so
+        only their blobs are downloaded. Servers without filter support send every blob;
+        git then proceeds as a plain shallow clone and only the checkout is limited.
+        """
+        repo = Repo.clone_from(
+            auth_url,
+            temp_dir,
+            depth=1,
+            single_branch=True,
+            no_checkout=True,
+            filter="blob:none"
+        )
+        repo.git.sparse_checkout("set", "--no-cone", *RepositoryCloner.sparse_patterns())
+        repo.git.checkout()
+    
+    @staticmethod
+    def _check_out_commit(temp_dir: str, commit_sha: str):
+        """
+        Check out commit_sha, fetching it first when the branch has moved on since it was
+        pushed or looked up. A commit no longer on the server fails the clone.
+        """
+        repo = Repo(temp_dir)
+        if repo.head.commit.hexsha == commit_sha:
+            return
+        repo.git.fetch("--depth=1", "origin", commit_sha)
+        repo.git.checkout(commit_sha)
+    
     @staticmethod
     def cleanup_repository(repo_path: Path):
         """
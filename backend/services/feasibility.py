@@ -2,18 +2,19 @@ import os
 from pathlib import Path
 from typing import Dict, Any, List
 import logging
+from config import get_settings
+from analyzers.file_reader import FileReader
 
 logger = logging.getLogger(__name__)
 
 class FeasibilityChecker:
-    # Hard limits from PRD
-    MAX_FILES = 300
-    MAX_LOC = 40000
-    MAX_FOLDER_DEPTH = 8
+    # Analysis modes; limits for each are read from settings
+    STANDARD_MODE = 'standard'
+    LARGE_MODE = 'large'
+    MODES = (STANDARD_MODE, LARGE_MODE)
     
-    # Soft limits
-    WARN_FILES = 200
-    WARN_LOC = 30000
+    # Manifests that mark the root of a package
+    PACKAGE_MANIFESTS = {'package.json', 'pyproject.toml', 'Cargo.toml', 'pom.xml', 'build.gradle'}
     
     # File extensions to analyze
     CODE_EXTENSIONS = {
@@ -22,35 +23,66 @@ class FeasibilityChecker:
     }
     
     @staticmethod
-    def check_feasibility(repo_path: Path) -> Dict[str, Any]:
+    def get_limits(mode: str = STANDARD_MODE) -> Dict[str, int]:
         """
-        Check if repository meets feasibility constraints.
-        Returns: {is_feasible, reasons, stats}
+        Get the configured hard and soft limits for an analysis mode.
         """
+        if mode not in FeasibilityChecker.MODES:
+            raise ValueError(f"Unknown analysis mode: {mode}")
+        
+        settings = get_settings()
+        return {
+            'max_files': getattr(settings, f"{mode}_max_files"),
+            'max_loc': getattr(settings, f"{mode}_max_loc"),
+            'max_folder_depth': getattr(settings, f"{mode}_max_folder_depth"),
+            'warn_files': getattr(settings, f"{mode}_warn_files"),
+            'warn_loc': getattr(settings, f"{mode}_warn_loc")
+        }
+    
+    @staticmethod
+    def check_feasibility(repo_path: Path, mode: str = STANDARD_MODE) -> Dict[str, Any]:
+        """
+        Check if repository meets feasibility constraints for the given mode.
+        Returns: {is_feasible, reasons, warnings, stats, mode, limits}
+        """
+        limits = FeasibilityChecker.get_limits(mode)
         stats = FeasibilityChecker._collect_stats(repo_path)
         reasons = []
         warnings = []
         
+        # Monorepos are analyzed per package, so size limits apply to the largest package
+        if stats['is_monorepo']:
+            packages = stats['packages']
+            unit_files = max((p['files'] for p in packages), default=0)
+            unit_loc = max((p['loc'] for p in packages), default=0)
+            unit = "Largest package"
+        else:
+            unit_files = stats['total_files']
+            unit_loc = stats['total_loc']
+            unit = "Repository"
+        
         # Hard limit checks
-        if stats['total_files'] > FeasibilityChecker.MAX_FILES:
+        if unit_files > limits['max_files']:
             reasons.append(
-                f"Repository has {stats['total_files']} files, exceeding limit of {FeasibilityChecker.MAX_FILES}"
+                f"{unit} has {unit_files} files, exceeding limit of {limits['max_files']}"
             )
         
-        if stats['total_loc'] > FeasibilityChecker.MAX_LOC:
+        if unit_loc > limits['max_loc']:
             reasons.append(
-                f"Repository has {stats['total_loc']} lines of code, exceeding limit of {FeasibilityChecker.MAX_LOC}"
+                f"{unit} has {unit_loc} lines of code, exceeding limit of {limits['max_loc']}"
             )
         
-        if stats['max_depth'] > FeasibilityChecker.MAX_FOLDER_DEPTH:
+        if stats['max_depth'] > limits['max_folder_depth']:
             reasons.append(
-                f"Repository folder depth is {stats['max_depth']}, exceeding limit of {FeasibilityChecker.MAX_FOLDER_DEPTH}"
+                f"Repository folder depth is {stats['max_depth']}, exceeding limit of {limits['max_folder_depth']}"
             )
         
         if stats['is_monorepo']:
-            reasons.append("Repository appears to be a monorepo, which is not supported")
-        
-        if len(stats['languages']) > 1:
+            warnings.append(
+                f"Repository appears to be a monorepo; its {len(stats['packages'])} packages will be analyzed separately"
+            )
+        elif len(stats['languages']) > 1:
+            # Each monorepo package gets its own primary language, so this only applies to single projects
             primary_lang = max(stats['languages'].items(), key=lambda x: x[1])
             if primary_lang[1] / stats['total_loc'] < 0.7:
                 reasons.append(
@@ -58,19 +90,24 @@ class FeasibilityChecker:
                 )
         
         # Soft limit warnings
-        if FeasibilityChecker.WARN_FILES < stats['total_files'] <= FeasibilityChecker.MAX_FILES:
+        if limits['warn_files'] < unit_files <= limits['max_files']:
             warnings.append("Repository is large; analysis may take longer")
         
-        if FeasibilityChecker.WARN_LOC < stats['total_loc'] <= FeasibilityChecker.MAX_LOC:
+        if limits['warn_loc'] < unit_loc <= limits['max_loc']:
             warnings.append("High LOC count; explanations may be limited")
         
+        if mode == FeasibilityChecker.LARGE_MODE:
+            warnings.append("Large-repository mode: peripheral directories may be summarized if the analysis budget is exceeded")
+        
         is_feasible = len(reasons) == 0
         
         return {
             'is_feasible': is_feasible,
             'reasons': reasons,
             'warnings': warnings,
-            'stats': stats
+            'stats': stats,
+            'mode': mode,
+            'limits': limits
         }
     
     @staticmethod
@@ -87,8 +124,11 @@ class FeasibilityChecker:
         monorepo_indicators = {
             'packages', 'apps', 'microservices', 'libs'
         }
-        is_monorepo = False
+        has_monorepo_indicator = False
         package_config_files = 0
+        # Package roots below the repository root, with their own file/LOC/language counts
+        packages = {}
+        package_of_dir = {}
         
         for root, dirs, files in os.walk(repo_path):
             # Skip common non-code directories
@@ -98,15 +138,22 @@ class FeasibilityChecker:
             }]
             
             # Count package config files across the entire repo
-            config_files = [f for f in files if f in ['package.json', 'pyproject.toml', 'Cargo.toml', 'pom.xml', 'build.gradle']]
+            config_files = [f for f in files if f in FeasibilityChecker.PACKAGE_MANIFESTS]
             package_config_files += len(config_files)
             
-            # Only consider monorepo if we find strong indicators AND multiple package files
-            if any(indicator in dirs for indicator in monorepo_indicators) and package_config_files > 1:
-                is_monorepo = True
+            # The outermost manifest directory below the root owns everything beneath it
+            relative_root = Path(root).relative_to(repo_path)
+            package = package_of_dir.get(str(relative_root.parent)) if relative_root.parts else None
+            if package is None and config_files and relative_root.parts:
+                package = str(relative_root)
+                packages[package] = {'files': 0, 'loc': 0, 'languages': {}, 'manifests': config_files}
+            package_of_dir[str(relative_root)] = package
+            
+            if any(indicator in dirs for indicator in monorepo_indicators):
+                has_monorepo_indicator = True
             
             # Calculate depth
-            depth = len(Path(root).relative_to(repo_path).parts)
+            depth = len(relative_root.parts)
             max_depth = max(max_depth, depth)
             
             for file in files:
@@ -114,19 +161,30 @@ class FeasibilityChecker:
                 ext = file_path.suffix.lower()
                 
                 if ext in FeasibilityChecker.CODE_EXTENSIONS:
-                    total_files += 1
-                    
-                    # Count lines of code
+                    # Count lines of code by streaming, skipping binaries with code extensions
                     try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            lines = len([l for l in f if l.strip()])
-                            total_loc += lines
-                            
-                            # Track language
-                            lang = FeasibilityChecker._extension_to_language(ext)
-                            languages[lang] = languages.get(lang, 0) + lines
+                        lines = FileReader.count_loc(file_path)
                     except Exception as e:
                         logger.warning(f"Could not read file {file_path}: {e}")
+                        continue
+                    if lines is None:
+                        continue
+                    
+                    total_files += 1
+                    total_loc += lines
+                    
+                    # Track language
+                    lang = FeasibilityChecker._extension_to_language(ext)
+                    languages[lang] = languages.get(lang, 0) + lines
+                    
+                    if package is not None:
+                        package_stats = packages[package]
+                        package_stats['files'] += 1
+                        package_stats['loc'] += lines
+                        package_stats['languages'][lang] = package_stats['languages'].get(lang, 0) + lines
+        
+        # Only consider monorepo if we find strong indicators AND multiple package files
+        is_monorepo = has_monorepo_indicator and package_config_files > 1 and len(packages) > 0
         
         return {
             'total_files': total_files,
@@ -134,6 +192,7 @@ class FeasibilityChecker:
             'max_depth': max_depth,
             'languages': languages,
             'is_monorepo': is_monorepo,
+            'packages': [{'path': path, **package_stats} for path, package_stats in packages.items()],
             'primary_language': max(languages.items(), key=lambda x: x[1])[0] if languages else 'unknown'
         }
     
@@ -1,7 +1,9 @@
+import time
 import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from fastapi import HTTPException
 import logging
+from services.metrics import GITHUB_API_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -15,12 +17,20 @@ class GitHubService:
             "Accept": "application/json"
         }
     
+    async def _get(self, client: httpx.AsyncClient, endpoint: str, path: str, **kwargs) -> httpx.Response:
+        """GET a GitHub API path, recording latency under a low-cardinality endpoint label."""
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = await client.get(f"{self.BASE_URL}{path}", headers=self.headers, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            GITHUB_API_SECONDS.labels(endpoint=endpoint, status=status).observe(time.perf_counter() - start)
+    
     async def get_user_info(self) -> Dict[str, Any]:
         async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/user",
-                headers=self.headers
-            )
+            response = await self._get(client, "/user", "/user")
             
             if response.status_code != 200:
                 raise HTTPException(
@@ -32,10 +42,7 @@ class GitHubService:
     
     async def get_user_email(self) -> str:
         async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/user/emails",
-                headers=self.headers
-            )
+            response = await self._get(client, "/user/emails", "/user/emails")
             
             if response.status_code == 200:
                 emails = response.json()
@@ -48,9 +55,10 @@ class GitHubService:
     
     async def list_repositories(self) -> List[Dict[str, Any]]:
         async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/user/repos",
-                headers=self.headers,
+            response = await self._get(
+                client,
+                "/user/repos",
+                "/user/repos",
                 params={
                     "visibility": "all",
                     "affiliation": "owner,collaborator,organization_member",
@@ -72,45 +80,72 @@ class GitHubService:
             for repo in repos:
                 # Get additional repository details
                 repo_details = await self._get_repo_details(repo["full_name"])
-                
-                formatted_repo = {
-                    "id": repo["id"],
-                    "name": repo["name"],
-                    "full_name": repo["full_name"],
-                    "private": repo["private"],
-                    "clone_url": repo["clone_url"],
-                    "description": repo.get("description"),
-                    "default_branch": repo.get("default_branch", "main"),
-                    "language": repo.get("language"),
-                    "updated_at": repo.get("updated_at"),
-                    "stargazers_count": repo.get("stargazers_count", 0),
-                    "forks_count": repo.get("forks_count", 0),
-                    "open_issues_count": repo.get("open_issues_count", 0),
-                }
-                
-                # Add additional details if available
-                if repo_details:
-                    formatted_repo.update({
-                        "size": repo_details.get("size", 0),
-                        "created_at": repo_details.get("created_at"),
-                        "pushed_at": repo_details.get("pushed_at"),
-                        "homepage": repo_details.get("homepage"),
-                        "topics": repo_details.get("topics", []),
-                        "license": repo_details.get("license", {}).get("name") if repo_details.get("license") else None,
-                    })
-                
-                formatted_repos.append(formatted_repo)
+                formatted_repos.append(self._format_repository(repo, repo_details))
             
             return formatted_repos
     
+    async def list_org_repositories(self, org: str) -> List[Dict[str, Any]]:
+        """List every repository of an organization visible to the user, following pagination."""
+        formatted_repos = []
+        page = 1
+        async with httpx.AsyncClient() as client:
+            while True:
+                response = await self._get(
+                    client,
+                    "/orgs/{org}/repos",
+                    f"/orgs/{org}/repos",
+                    params={"type": "all", "per_page": 100, "page": page}
+                )
+                
+                if response.status_code != 200:
+                    logger.error(f"GitHub API error: {response.status_code} - {response.text}")
+                    raise HTTPException(
+                        status_code=response.status_code,
+                        detail=f"Failed to fetch repositories of {org}"
+                    )
+                
+                repos = response.json()
+                # The list response already carries size and pushed_at, so no per-repo detail calls
+                formatted_repos.extend(self._format_repository(repo, repo) for repo in repos)
+                if len(repos) < 100:
+                    return formatted_repos
+                page += 1
+    
+    @staticmethod
+    def _format_repository(repo: Dict[str, Any], repo_details: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        formatted_repo = {
+            "id": repo["id"],
+            "name": repo["name"],
+            "full_name": repo["full_name"],
+            "private": repo["private"],
+            "clone_url": repo["clone_url"],
+            "description": repo.get("description"),
+            "default_branch": repo.get("default_branch", "main"),
+            "language": repo.get("language"),
+            "updated_at": repo.get("updated_at"),
+            "stargazers_count": repo.get("stargazers_count", 0),
+            "forks_count": repo.get("forks_count", 0),
+            "open_issues_count": repo.get("open_issues_count", 0),
+        }
+        
+        # Add additional details if available
+        if repo_details:
+            formatted_repo.update({
+                "size": repo_details.get("size", 0),
+                "created_at": repo_details.get("created_at"),
+                "pushed_at": repo_details.get("pushed_at"),
+                "homepage": repo_details.get("homepage"),
+                "topics": repo_details.get("topics", []),
+                "license": repo_details.get("license", {}).get("name") if repo_details.get("license") else None,
+            })
+        
+        return formatted_repo
+    
     async def _get_repo_details(self, full_name: str) -> Dict[str, Any]:
         """Get additional repository details."""
         try:
             async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/repos/{full_name}",
-                    headers=self.headers
-                )
+                response = await self._get(client, "/repos/{owner}/{repo}", f"/repos/{full_name}")
                 
                 if response.status_code == 200:
                     return response.json()
@@ -121,12 +156,28 @@ class GitHubService:
             logger.warning(f"Error getting details for {full_name}: {str(e)}")
             return None
     
+    async def get_branch_head_sha(self, full_name: str, branch: str) -> Optional[str]:
+        """Get the commit SHA at the head of a branch, or None if it cannot be resolved."""
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await self._get(
+                    client,
+                    "/repos/{owner}/{repo}/branches/{branch}",
+                    f"/repos/{full_name}/branches/{branch}"
+                )
+                
+                if response.status_code == 200:
+                    return response.json()["commit"]["sha"]
+                else:
+                    logger.warning(f"Failed to get head of {full_name}@{branch}: {response.status_code}")
+                    return None
+        except Exception as e:
+            logger.warning(f"Error getting head of {full_name}@{branch}: {str(e)}")
+            return None
+    
     async def get_repository_info(self, owner: str, repo: str) -> Dict[str, Any]:
         async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/repos/{owner}/{repo}",
-                headers=self.headers
-            )
+            response = await self._get(client, "/repos/{owner}/{repo}", f"/repos/{owner}/{repo}")
             
             if response.status_code != 200:
                 raise HTTPException(
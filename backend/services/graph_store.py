@@ -0,0 +1,93 @@
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+import msgpack
+import numpy as np
+import orjson
+from pymongo import ASCENDING
+
+logger = logging.getLogger(__name__)
+
+class GraphStore:
+    """
+    Persists the dependency graph of each analysis in a compact columnar layout.
+    
+    A graph is a path table, a flat uint32 array of (importer, imported) path
+    indexes and one int32 column per file metric, indexed like the path table.
+    The arrays are stored as little-endian bytes in analysis_graphs and served
+    as-is in MessagePack, so clients can view them as typed arrays without parsing.
+    """
+    
+    COLLECTION = "analysis_graphs"
+    FORMAT_VERSION = 1
+    
+    MSGPACK = "msgpack"
+    JSON = "json"
+    FORMATS = (MSGPACK, JSON)
+    MEDIA_TYPES = {MSGPACK: "application/msgpack", JSON: "application/json"}
+    
+    # Stay under MongoDB's 16MB document limit
+    MAX_DOCUMENT_BYTES = 15 * 1024 * 1024
+    
+    _indexes_ready = False
+    
+    def __init__(self, db):
+        self.collection = db[self.COLLECTION]
+    
+    @staticmethod
+    def build_document(file_metrics: Dict[str, List], edges: bytes) -> Dict[str, Any]:
+        """Graph document from analyze_checkout's file_metrics columns and packed edges."""
+        paths = file_metrics["paths"]
+        return {
+            "version": GraphStore.FORMAT_VERSION,
+            "nodes": len(paths),
+            "edge_count": len(edges) // 8,
+            "paths": paths,
+            "edges": edges,
+            "columns": {
+                name: np.asarray(column, dtype="<i4").tobytes()
+                for name, column in file_metrics.items() if name != "paths"
+            }
+        }
+    
+    async def save(self, analysis_id: str, document: Dict[str, Any]):
+        size = len(document["edges"]) + sum(len(c) for c in document["columns"].values()) + sum(len(p) for p in document["paths"])
+        if size > self.MAX_DOCUMENT_BYTES:
+            logger.warning(f"Dependency graph of {analysis_id} is {size} bytes, too large to store")
+            return
+        
+        if not GraphStore._indexes_ready:
+            await self.collection.create_index([("analysis_id", ASCENDING)], unique=True)
+            GraphStore._indexes_ready = True
+        await self.collection.replace_one(
+            {"analysis_id": analysis_id},
+            {"analysis_id": analysis_id, **document},
+            upsert=True
+        )
+    
+    async def load(self, analysis: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Graph document of an analysis, or None if it has none. Shared copies use their source's graph."""
+        analysis_id = analysis.get("shared_from") or analysis["analysis_id"]
+        return await self.collection.find_one({"analysis_id": analysis_id}, {"_id": 0, "analysis_id": 0})
+    
+    @staticmethod
+    def encode(document: Dict[str, Any], format: str) -> Tuple[bytes, str]:
+        """
+        Encode a graph document for the wire. Returns (body, media_type).
+        MessagePack keeps edges and columns as binary; JSON spells them out as integer lists.
+        """
+        if format == GraphStore.MSGPACK:
+            body = msgpack.packb({
+                **document,
+                "edges": bytes(document["edges"]),
+                "columns": {name: bytes(column) for name, column in document["columns"].items()}
+            })
+        else:
+            body = orjson.dumps({
+                **document,
+                "edges": np.frombuffer(document["edges"], dtype="<u4"),
+                "columns": {
+                    name: np.frombuffer(column, dtype="<i4")
+                    for name, column in document["columns"].items()
+                }
+            }, option=orjson.OPT_SERIALIZE_NUMPY)
+        return body, GraphStore.MEDIA_TYPES[format]
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+import os
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+import logging
+import git
+from git import Repo
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class GitHistory:
+    """
+    Churn of each analyzed file over a recent window of commits.
+    
+    Checkouts are depth-1 clones, so fetch() first deepens them to the window with
+    --shallow-since, fetching commits and trees only. churn() then streams git log
+    one line at a time into per-file counters, so memory is bounded by the number
+    of analyzed files however deep the window. Blobless clones are read with
+    --name-only, which needs no file contents; full clones with --numstat, which
+    also counts changed lines. repo_path may be a subdirectory of the checkout, in
+    which case only its files are counted, with paths relative to it.
+    """
+    
+    # Starts each commit's header line in the log output
+    COMMIT_MARKER = "\x1e"
+    
+    NUMSTAT = "numstat"
+    NAME_ONLY = "name-only"
+    
+    @staticmethod
+    def window_start(days: int) -> str:
+        """Start of the window in a date format git log and git fetch both accept."""
+        start = datetime.now(timezone.utc) - timedelta(days=days)
+        return start.strftime("%Y-%m-%d %H:%M:%S +0000")
+    
+    @staticmethod
+    def fetch(repo_path: Path, days: int, commit_sha: Optional[str] = None) -> bool:
+        """
+        Deepen a shallow clone to the commits of the last days, from commit_sha if given
+        or else the fetched branch. Returns False if the fetch failed.
+        """
+        try:
+            Repo(repo_path, search_parent_directories=True).git.fetch(
+                f"--shallow-since={GitHistory.window_start(days)}", "origin", *([commit_sha] if commit_sha else [])
+            )
+            return True
+        except git.GitCommandError as e:
+            # Also raised when no commit falls inside the window
+            logger.info(f"Could not fetch {days} days of history into {repo_path} (exit {e.status})")
+            return False
+    
+    @staticmethod
+    def churn(repo_path: Path, paths: List[str], days: int, max_commits: int) -> Dict[str, Any]:
+        """
+        Count the commits of the last days touching each of paths.
+        Returns: {since, days, mode, commits, truncated, file_commits, churned_lines}
+        file_commits and churned_lines are int32 columns indexed like paths;
+        churned_lines (lines added plus deleted) is None in name-only mode.
+        """
+        repo = Repo(repo_path, search_parent_directories=True)
+        mode = GitHistory.NAME_ONLY if GitHistory._is_partial_clone(repo) else GitHistory.NUMSTAT
+        since = GitHistory.window_start(days)
+        index = {path: i for i, path in enumerate(paths)}
+        file_commits = np.zeros(len(paths), dtype=np.int32)
+        churned_lines = np.zeros(len(paths), dtype=np.int32) if mode == GitHistory.NUMSTAT else None
+        # The oldest fetched commits have no parents here, so they would list every file as added
+        boundary = GitHistory._shallow_boundary(repo)
+        # git log lists paths from the root of the checkout; for a subdirectory, only
+        # commits touching it are read and its files are listed relative to it
+        prefix = Path(os.path.relpath(Path(repo_path).resolve(), Path(repo.working_tree_dir).resolve())).as_posix()
+        scope = [f"--relative={prefix}", "--", prefix] if prefix != "." else []
+        
+        process = repo.git(c="core.quotepath=off").log(
+            f"--since={since}",
+            f"--max-count={max_commits}",
+            "--no-merges",
+            "--no-renames",
+            f"--format={GitHistory.COMMIT_MARKER}%H",
+            f"--{mode}",
+            *scope,
+            as_process=True
+        )
+        seen = 0
+        commits = 0
+        skip = False
+        for raw_line in process.stdout:
+            line = raw_line.decode("utf-8", "replace").rstrip("\n")
+            if not line:
+                continue
+            
+            if line.startswith(GitHistory.COMMIT_MARKER):
+                seen += 1
+                skip = line[1:] in boundary
+                commits += 0 if skip else 1
+                continue
+            if skip:
+                continue
+            
+            if churned_lines is None:
+                i = index.get(line)
+            else:
+                added, deleted, path = line.split("\t", 2)
+                i = index.get(path)
+                # Binary files report "-" for both counts
+                if i is not None and added != "-":
+                    churned_lines[i] += int(added) + int(deleted)
+            if i is not None:
+                file_commits[i] += 1
+        process.wait()
+        
+        return {
+            "since": since,
+            "days": days,
+            "mode": mode,
+            "commits": commits,
+            "truncated": seen >= max_commits,
+            "file_commits": file_commits,
+            "churned_lines": churned_lines
+        }
+    
+    @staticmethod
+    def _is_partial_clone(repo: Repo) -> bool:
+        return bool(repo.config_reader("repository").get_value('remote "origin"', "promisor", False))
+    
+    @staticmethod
+    def _shallow_boundary(repo: Repo) -> Set[str]:
+        shallow_file = Path(repo.git_dir) / "shallow"
+        if not shallow_file.exists():
+            return set()
+        return set(shallow_file.read_text().split())
@@ -0,0 +1,254 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional
+import logging
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+class AnalysisJobQueue:
+    """
+    Analysis jobs stored in MongoDB and claimed by workers under a lease.
+    
+    A claimed job belongs to its worker until lease_expires_at, which the worker
+    extends with heartbeats. If the worker dies the lease runs out and the job is
+    claimable again, until it has used up max_attempts.
+    """
+    
+    COLLECTION = "analysis_jobs"
+    
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    
+    def __init__(self, db):
+        settings = get_settings()
+        self.collection = db[self.COLLECTION]
+        self.lease_seconds = settings.job_lease_seconds
+        self.max_attempts = settings.job_max_attempts
+        self.retry_backoff_seconds = settings.job_retry_backoff_seconds
+    
+    async def ensure_indexes(self):
+        await self.collection.create_index("job_id", unique=True)
+        await self.collection.create_index([("status", ASCENDING), ("not_before", ASCENDING)])
+        await self.collection.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+        await self.collection.create_index([("user_github_id", ASCENDING), ("created_at", DESCENDING)])
+        # At most one queued job per coalesce key; running and finished jobs leave the index
+        await self.collection.create_index(
+            "coalesce_key",
+            unique=True,
+            partialFilterExpression={"status": self.QUEUED, "coalesce_key": {"$exists": True}}
+        )
+    
+    async def enqueue(self, repo: Dict[str, Any], user_github_id: int, large_repo: bool = False) -> Dict[str, Any]:
+        """Queue an analysis of repo (id, name, full_name, clone_url, default_branch, size) for a user."""
+        now = _now()
+        job = {
+            **self._new_job(user_github_id, large_repo, now),
+            "repo": self._job_repo(repo),
+            "not_before": now,
+            "updated_at": now
+        }
+        await self.collection.insert_one(job)
+        job.pop("_id", None)
+        return job
+    
+    async def enqueue_coalesced(
+        self,
+        repo: Dict[str, Any],
+        user_github_id: int,
+        coalesce_key: str,
+        commit_sha: Optional[str],
+        delay_seconds: float,
+        large_repo: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Queue an analysis, merging it into the queued job with the same coalesce_key.
+        Every merge moves the job's start to delay_seconds from now and points it at
+        the latest commit, so a burst of triggers runs once, after it settles.
+        """
+        now = _now()
+        new_job = self._new_job(user_github_id, large_repo, now)
+        new_job.pop("status")
+        
+        for attempt in range(2):
+            try:
+                job = await self.collection.find_one_and_update(
+                    {"coalesce_key": coalesce_key, "status": self.QUEUED},
+                    {
+                        "$set": {
+                            "repo": self._job_repo(repo),
+                            "commit_sha": commit_sha,
+                            "not_before": now + timedelta(seconds=delay_seconds),
+                            "updated_at": now
+                        },
+                        "$setOnInsert": new_job,
+                        "$inc": {"coalesced": 1}
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                job.pop("_id", None)
+                return job
+            except DuplicateKeyError:
+                # A concurrent upsert created the job first; merge into it
+                if attempt:
+                    raise
+    
+    def _new_job(self, user_github_id: int, large_repo: bool, now: datetime) -> Dict[str, Any]:
+        return {
+            "job_id": uuid.uuid4().hex,
+            "analysis_id": uuid.uuid4().hex,
+            "user_github_id": user_github_id,
+            "large_repo": large_repo,
+            "status": self.QUEUED,
+            "attempts": 0,
+            "max_attempts": self.max_attempts,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "error": None,
+            "created_at": now
+        }
+    
+    @staticmethod
+    def _job_repo(repo: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: repo.get(key) for key in ("id", "name", "full_name", "clone_url", "default_branch", "size")}
+    
+    async def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Atomically claim the oldest runnable job: queued and due, or running with an expired lease.
+        Returns the claimed job, or None if there is nothing to do.
+        """
+        now = _now()
+        job = await self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": self.QUEUED, "not_before": {"$lte": now}},
+                    {"status": self.RUNNING, "lease_expires_at": {"$lt": now}}
+                ],
+                "$expr": {"$lt": ["$attempts", "$max_attempts"]}
+            },
+            {
+                "$set": {
+                    "status": self.RUNNING,
+                    "lease_owner": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "started_at": now,
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            job.pop("_id", None)
+        return job
+    
+    async def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease. Returns False if the worker no longer holds it."""
+        now = _now()
+        result = await self.collection.update_one(
+            {"job_id": job_id, "lease_owner": worker_id, "status": self.RUNNING},
+            {"$set": {
+                "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                "updated_at": now
+            }}
+        )
+        return result.matched_count == 1
+    
+    async def complete(self, job_id: str, worker_id: str) -> bool:
+        now = _now()
+        result = await self.collection.update_one(
+            {"job_id": job_id, "lease_owner": worker_id, "status": self.RUNNING},
+            {"$set": {
+                "status": self.SUCCEEDED,
+                "lease_expires_at": None,
+                "error": None,
+                "finished_at": now,
+                "updated_at": now
+            }}
+        )
+        return result.matched_count == 1
+    
+    async def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True) -> bool:
+        """
+        Release a job after an error. It is queued again with exponential backoff
+        while it has attempts left and retry is set, and marked failed otherwise.
+        """
+        job = await self.collection.find_one(
+            {"job_id": job_id, "lease_owner": worker_id, "status": self.RUNNING},
+            {"attempts": 1, "max_attempts": 1}
+        )
+        if not job:
+            return False
+        
+        now = _now()
+        update = {"error": error, "lease_expires_at": None, "updated_at": now}
+        if retry and job["attempts"] < job["max_attempts"]:
+            backoff = self.retry_backoff_seconds * 2 ** (job["attempts"] - 1)
+            update.update(status=self.QUEUED, not_before=now + timedelta(seconds=backoff))
+        else:
+            update.update(status=self.FAILED, finished_at=now)
+        
+        result = await self.collection.update_one(
+            {"job_id": job_id, "lease_owner": worker_id, "status": self.RUNNING},
+            {"$set": update}
+        )
+        return result.matched_count == 1
+    
+    async def release(self, job_id: str, worker_id: str, delay_seconds: float) -> bool:
+        """Put a claimed job back without counting the attempt, e.g. when the worker is out of capacity."""
+        now = _now()
+        result = await self.collection.update_one(
+            {"job_id": job_id, "lease_owner": worker_id, "status": self.RUNNING},
+            {
+                "$set": {
+                    "status": self.QUEUED,
+                    "not_before": now + timedelta(seconds=delay_seconds),
+                    "lease_expires_at": None,
+                    "updated_at": now
+                },
+                "$inc": {"attempts": -1}
+            }
+        )
+        return result.matched_count == 1
+    
+    async def count_active(self, user_github_id: int) -> int:
+        """Number of the user's jobs that are queued or running."""
+        return await self.collection.count_documents({
+            "user_github_id": user_github_id,
+            "status": {"$in": [self.QUEUED, self.RUNNING]}
+        })
+    
+    async def fail_expired(self) -> int:
+        """Mark jobs whose lease expired on their last attempt as failed. Returns how many."""
+        now = _now()
+        result = await self.collection.update_many(
+            {
+                "status": self.RUNNING,
+                "lease_expires_at": {"$lt": now},
+                "$expr": {"$gte": ["$attempts", "$max_attempts"]}
+            },
+            {"$set": {
+                "status": self.FAILED,
+                "error": "Worker lease expired on the final attempt",
+                "finished_at": now,
+                "updated_at": now
+            }}
+        )
+        if result.modified_count:
+            logger.warning(f"Failed {result.modified_count} jobs whose lease expired on the final attempt")
+        return result.modified_count
+    
+    async def get(self, job_id: str, user_github_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        query = {"job_id": job_id}
+        if user_github_id is not None:
+            query["user_github_id"] = user_github_id
+        return await self.collection.find_one(query, {"_id": 0})
@@ -0,0 +1,274 @@
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import logging
+from pymongo import ASCENDING
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+def _key(value: Any) -> str:
+    # Risk confidences may still be RiskLevel members before they are stored
+    return getattr(value, "value", value)
+
+class MetricSeries:
+    """
+    Compact per-repository and per-file metric history, written on every analysis.
+    
+    Points live in MongoDB time-series collections, bucketed by (repo_id, user_github_id)
+    and, for files, path. metric_points holds one small document per analysis;
+    file_metric_points one per analyzed file. Trends and deltas are computed by
+    aggregation so full analysis documents are never loaded.
+    """
+    
+    REPO_COLLECTION = "metric_points"
+    FILE_COLLECTION = "file_metric_points"
+    FILE_FIELDS = ("loc", "complexity", "fan_in", "fan_out", "risk_count")
+    BUCKETS = ("day", "week", "month")
+    
+    _collections_ready = False
+    
+    def __init__(self, db):
+        self.db = db
+        self.points = db[self.REPO_COLLECTION]
+        self.file_points = db[self.FILE_COLLECTION]
+    
+    async def ensure_collections(self):
+        """Create the time-series collections and their indexes once per process."""
+        if MetricSeries._collections_ready:
+            return
+        
+        for name in (self.REPO_COLLECTION, self.FILE_COLLECTION):
+            try:
+                await self.db.create_collection(
+                    name,
+                    timeseries={"timeField": "ts", "metaField": "meta", "granularity": "hours"}
+                )
+            except CollectionInvalid:
+                pass
+            except OperationFailure as e:
+                # Servers before MongoDB 5.0 get regular collections with the same indexes
+                logger.warning(f"Could not create time-series collection {name}, using a regular one: {e}")
+        
+        await self.points.create_index([("meta.repo_id", ASCENDING), ("meta.user_github_id", ASCENDING), ("ts", ASCENDING)])
+        await self.points.create_index([("analysis_id", ASCENDING)])
+        await self.file_points.create_index([
+            ("meta.repo_id", ASCENDING), ("meta.user_github_id", ASCENDING), ("meta.path", ASCENDING), ("ts", ASCENDING)
+        ])
+        await self.file_points.create_index([
+            ("meta.repo_id", ASCENDING), ("meta.user_github_id", ASCENDING), ("analysis_id", ASCENDING)
+        ])
+        MetricSeries._collections_ready = True
+    
+    async def record(self, analysis: Dict[str, Any], file_metrics: Optional[Dict[str, List]]):
+        """Write the repository point and the file points of a saved analysis."""
+        await self.ensure_collections()
+        ts = datetime.fromisoformat(analysis["analyzed_at"])
+        meta = {"repo_id": analysis["repo_id"], "user_github_id": analysis["user_github_id"]}
+        
+        # A retried job saves the same analysis again; its points are already written
+        if await self.points.find_one({"meta.repo_id": meta["repo_id"], "analysis_id": analysis["analysis_id"]}):
+            return
+        
+        stats = analysis["feasibility"]["stats"]
+        
+        risks_by_title: Dict[str, int] = {}
+        risks_by_confidence: Dict[str, int] = {}
+        risks_by_file: Dict[str, int] = {}
+        for risk in analysis["risks"]:
+            risks_by_title[risk["title"]] = risks_by_title.get(risk["title"], 0) + 1
+            confidence = _key(risk["confidence"])
+            risks_by_confidence[confidence] = risks_by_confidence.get(confidence, 0) + 1
+            for path in risk["files"]:
+                risks_by_file[path] = risks_by_file.get(path, 0) + 1
+        
+        file_metrics = file_metrics or {}
+        paths = file_metrics.get("paths", [])
+        complexity = file_metrics.get("complexity", [])
+        
+        await self.points.insert_one({
+            "ts": ts,
+            "meta": meta,
+            "analysis_id": analysis["analysis_id"],
+            "is_feasible": analysis["feasibility"]["is_feasible"],
+            "files": stats.get("total_files", 0),
+            "loc": stats.get("total_loc", 0),
+            "complexity": sum(complexity),
+            "max_complexity": max(complexity, default=0),
+            "edges": sum(file_metrics.get("fan_out", [])),
+            "risk_count": len(analysis["risks"]),
+            "risks_by_title": risks_by_title,
+            "risks_by_confidence": risks_by_confidence
+        })
+        
+        if paths:
+            columns = {name: file_metrics.get(name, [0] * len(paths)) for name in ("loc", "complexity", "fan_in", "fan_out")}
+            await self.file_points.insert_many(
+                [
+                    {
+                        "ts": ts,
+                        "meta": {**meta, "path": path},
+                        "analysis_id": analysis["analysis_id"],
+                        **{name: column[i] for name, column in columns.items()},
+                        "risk_count": risks_by_file.get(path, 0)
+                    }
+                    for i, path in enumerate(paths)
+                ],
+                ordered=False
+            )
+    
+    async def copy(self, source: Dict[str, Any], target: Dict[str, Any]):
+        """Record a shared copy of an analysis under the target's id and user."""
+        await self.ensure_collections()
+        meta = {"repo_id": target["repo_id"], "user_github_id": target["user_github_id"]}
+        source_query = {
+            "meta.repo_id": source["repo_id"],
+            "meta.user_github_id": source["user_github_id"],
+            "analysis_id": source["analysis_id"]
+        }
+        
+        point = await self.points.find_one(source_query, {"_id": 0})
+        if point:
+            await self.points.insert_one({**point, "meta": meta, "analysis_id": target["analysis_id"]})
+        
+        batch = []
+        async for file_point in self.file_points.find(source_query, {"_id": 0}):
+            batch.append({
+                **file_point,
+                "meta": {**meta, "path": file_point["meta"]["path"]},
+                "analysis_id": target["analysis_id"]
+            })
+        if batch:
+            await self.file_points.insert_many(batch, ordered=False)
+    
+    async def trend(
+        self,
+        repo_id: int,
+        user_github_id: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        bucket: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Repository metrics over time, oldest first.
+        With a bucket (day, week, month), each bucket reports its last analysis.
+        """
+        pipeline = [
+            {"$match": self._range_match({"meta.repo_id": repo_id, "meta.user_github_id": user_github_id}, since, until)},
+            {"$sort": {"ts": 1}}
+        ]
+        if bucket:
+            pipeline += [
+                {"$group": {
+                    "_id": {"$dateTrunc": {"date": "$ts", "unit": bucket}},
+                    "point": {"$last": "$$ROOT"},
+                    "analyses": {"$sum": 1}
+                }},
+                {"$replaceWith": {"$mergeObjects": ["$point", {"bucket": "$_id", "analyses": "$analyses"}]}},
+                {"$sort": {"ts": 1}}
+            ]
+        pipeline.append({"$project": {"_id": 0, "meta": 0}})
+        return [point async for point in self.points.aggregate(pipeline)]
+    
+    async def file_trend(
+        self,
+        repo_id: int,
+        user_github_id: int,
+        path: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Metrics of one file over time, oldest first."""
+        pipeline = [
+            {"$match": self._range_match(
+                {"meta.repo_id": repo_id, "meta.user_github_id": user_github_id, "meta.path": path}, since, until
+            )},
+            {"$sort": {"ts": 1}},
+            {"$project": {"_id": 0, "meta": 0}}
+        ]
+        return [point async for point in self.file_points.aggregate(pipeline)]
+    
+    async def delta(
+        self,
+        user_github_id: int,
+        base_id: str,
+        head_id: str,
+        limit: int = 100
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Compare two analyses of the same repository.
+        Returns repository-level differences and the files that changed most, or None if either is missing.
+        """
+        points = {}
+        async for point in self.points.find(
+            {"analysis_id": {"$in": [base_id, head_id]}, "meta.user_github_id": user_github_id},
+            {"_id": 0}
+        ):
+            points[point["analysis_id"]] = point
+        base, head = points.get(base_id), points.get(head_id)
+        if not base or not head or base["meta"]["repo_id"] != head["meta"]["repo_id"]:
+            return None
+        
+        repository = {
+            name: {"base": base[name], "head": head[name], "delta": head[name] - base[name]}
+            for name in ("files", "loc", "complexity", "max_complexity", "edges", "risk_count")
+        }
+        titles = set(base["risks_by_title"]) | set(head["risks_by_title"])
+        risks_by_title = {
+            title: head["risks_by_title"].get(title, 0) - base["risks_by_title"].get(title, 0)
+            for title in titles
+        }
+        
+        is_head = {"$eq": ["$analysis_id", head_id]}
+        group = {"_id": "$meta.path", "in_base": {"$max": {"$cond": [is_head, 0, 1]}}, "in_head": {"$max": {"$cond": [is_head, 1, 0]}}}
+        for name in self.FILE_FIELDS:
+            group[f"base_{name}"] = {"$sum": {"$cond": [is_head, 0, f"${name}"]}}
+            group[f"head_{name}"] = {"$sum": {"$cond": [is_head, f"${name}", 0]}}
+        
+        changes = {name: {"$subtract": [f"$head_{name}", f"$base_{name}"]} for name in self.FILE_FIELDS}
+        pipeline = [
+            {"$match": {
+                "meta.repo_id": head["meta"]["repo_id"],
+                "meta.user_github_id": user_github_id,
+                "analysis_id": {"$in": [base_id, head_id]}
+            }},
+            {"$group": group},
+            {"$project": {
+                "_id": 0,
+                "path": "$_id",
+                "status": {"$switch": {
+                    "branches": [
+                        {"case": {"$eq": ["$in_base", 0]}, "then": "added"},
+                        {"case": {"$eq": ["$in_head", 0]}, "then": "removed"}
+                    ],
+                    "default": "changed"
+                }},
+                **{f"{name}_delta": change for name, change in changes.items()},
+                **{f"head_{name}": 1 for name in self.FILE_FIELDS},
+                "magnitude": {"$add": [{"$abs": change} for change in changes.values()]}
+            }},
+            {"$match": {"$or": [{"status": {"$ne": "changed"}}, {"magnitude": {"$gt": 0}}]}},
+            {"$sort": {"magnitude": -1, "path": 1}},
+            {"$limit": limit},
+            {"$project": {"magnitude": 0}}
+        ]
+        files = [change async for change in self.file_points.aggregate(pipeline)]
+        
+        return {
+            "repo_id": head["meta"]["repo_id"],
+            "base": {"analysis_id": base_id, "ts": base["ts"]},
+            "head": {"analysis_id": head_id, "ts": head["ts"]},
+            "repository": repository,
+            "risks_by_title": {title: change for title, change in risks_by_title.items() if change},
+            "files": files
+        }
+    
+    @staticmethod
+    def _range_match(query: Dict[str, Any], since: Optional[datetime], until: Optional[datetime]) -> Dict[str, Any]:
+        ts = {}
+        if since:
+            ts["$gte"] = since
+        if until:
+            ts["$lte"] = until
+        if ts:
+            query["ts"] = ts
+        return query
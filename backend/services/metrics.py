@@ -0,0 +1,104 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Tuple
+import logging
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Phase durations cover seconds-long parses as well as sub-millisecond steps
+_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+_COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000, 10000000, 100000000, 1000000000)
+
+ANALYSIS_PHASE_SECONDS = Histogram(
+    'pei_analysis_phase_seconds',
+    'Duration of each analysis phase',
+    ['phase'],
+    buckets=_DURATION_BUCKETS
+)
+
+ANALYSIS_ITEMS = Histogram(
+    'pei_analysis_items',
+    'Per-analysis counts (files parsed, bytes read, edges, cycles)',
+    ['kind'],
+    buckets=_COUNT_BUCKETS
+)
+
+GITHUB_API_SECONDS = Histogram(
+    'pei_github_api_seconds',
+    'GitHub API request latency',
+    ['endpoint', 'status'],
+    buckets=_DURATION_BUCKETS
+)
+
+MONGO_COMMAND_SECONDS = Histogram(
+    'pei_mongo_command_seconds',
+    'MongoDB command latency',
+    ['command', 'status'],
+    buckets=_DURATION_BUCKETS
+)
+
+ADMISSION_RUNNING = Gauge(
+    'pei_admission_running',
+    'Analyses currently holding an admission slot'
+)
+
+ADMISSION_WAITING = Gauge(
+    'pei_admission_waiting',
+    'Analyses waiting for an admission slot'
+)
+
+ADMISSION_REJECTIONS = Counter(
+    'pei_admission_rejections_total',
+    'Analyses rejected by admission control',
+    ['reason']
+)
+
+class AnalysisMetrics:
+    """Collects per-phase timings and counts for one analysis run."""
+    
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+    
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block as the named phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, time.perf_counter() - start)
+    
+    def record_phase(self, name: str, seconds: float):
+        """Record a phase timed elsewhere, e.g. inside an analyzer."""
+        self.timings[name] = round(self.timings.get(name, 0) + seconds, 4)
+        ANALYSIS_PHASE_SECONDS.labels(phase=name).observe(seconds)
+    
+    def add_counts(self, **counts: int):
+        for kind, value in counts.items():
+            self.counts[kind] = self.counts.get(kind, 0) + value
+            ANALYSIS_ITEMS.labels(kind=kind).observe(value)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'timings': dict(self.timings),
+            'counts': dict(self.counts)
+        }
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records the latency of every MongoDB command a client issues."""
+    
+    def started(self, event):
+        pass
+    
+    def succeeded(self, event):
+        MONGO_COMMAND_SECONDS.labels(command=event.command_name, status='ok').observe(event.duration_micros / 1e6)
+    
+    def failed(self, event):
+        MONGO_COMMAND_SECONDS.labels(command=event.command_name, status='error').observe(event.duration_micros / 1e6)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format. Returns (body, content_type)."""
+    return generate_latest(), CONTENT_TYPE_LATEST
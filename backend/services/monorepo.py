@@ -0,0 +1,272 @@
+import os
+import re
+import json
+import tomllib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import logging
+import networkx as nx
+import numpy as np
+from analyzers.budget import AnalysisBudget
+from analyzers.parse_cache import ParseCache
+from analyzers.risk_detector import RiskDetector
+from models.analysis import Risk, RiskLevel
+
+logger = logging.getLogger(__name__)
+
+def _analyze_package(
+    repo_path: str,
+    package: Dict[str, Any],
+    budget_seconds: Optional[float] = None,
+    budget_memory_mb: Optional[int] = None,
+    max_cycles: Optional[int] = None,
+    thresholds: Optional[Dict[str, float]] = None,
+    parse_cache: Optional[ParseCache] = None
+) -> Dict[str, Any]:
+    """
+    Analyze one package as its own unit. Runs in a worker process.
+    """
+    package_path = Path(repo_path) / package['path']
+    languages = package.get('languages') or {}
+    primary_language = max(languages.items(), key=lambda x: x[1])[0] if languages else 'unknown'
+    
+    budget = None
+    if budget_seconds is not None or budget_memory_mb is not None:
+        budget = AnalysisBudget(max_seconds=budget_seconds, max_memory_mb=budget_memory_mb)
+    
+    detector = RiskDetector(
+        package_path,
+        primary_language,
+        budget=budget,
+        compact=budget is not None,
+        max_cycles=max_cycles,
+        thresholds=thresholds,
+        parse_cache=parse_cache
+    )
+    risks = detector.detect_risks()
+    
+    # Re-root file paths at the repository so merged results are unambiguous
+    for risk in risks:
+        risk.files = [str(Path(package['path']) / f) for f in risk.files]
+    
+    file_metrics = detector.file_metrics()
+    file_metrics['paths'] = [str(Path(package['path']) / f) for f in file_metrics['paths']]
+    
+    imports = set()
+    for info in detector.file_info.values():
+        imports.update(info.imports)
+    
+    return {
+        'path': package['path'],
+        'primary_language': primary_language,
+        'files_analyzed': len(detector.file_info),
+        'edge_count': detector.graph.number_of_edges(),
+        'risks': risks,
+        'imports': imports,
+        'degraded': detector.graph_builder.degraded,
+        'stats': {**detector.graph_builder.stats, **detector.stats},
+        'file_metrics': file_metrics,
+        # (importer, imported) index pairs into file_metrics['paths'], merged into the reachability index
+        'edges': detector.edges
+    }
+
+class MonorepoAnalyzer:
+    """Analyzes monorepo packages concurrently and merges them into a cross-package view."""
+    
+    @staticmethod
+    def analyze(
+        repo_path: Path,
+        packages: List[Dict[str, Any]],
+        budget_seconds: Optional[float] = None,
+        budget_memory_mb: Optional[int] = None,
+        max_cycles: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        thresholds: Optional[Dict[str, float]] = None,
+        parse_cache: Optional[ParseCache] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze every package in parallel.
+        Returns: {risks, packages, dependencies, stats, file_metrics, edges}
+        edges index file_metrics['paths']; packages are not linked at file level.
+        Timings in stats are summed across packages, so they measure CPU time rather than wall time.
+        """
+        packages = [
+            {**package, **MonorepoAnalyzer._read_manifests(repo_path, package)}
+            for package in packages
+        ]
+        
+        max_workers = max_workers or min(len(packages), os.cpu_count() or 1) or 1
+        results = {}
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(
+                    _analyze_package,
+                    str(repo_path),
+                    package,
+                    budget_seconds,
+                    budget_memory_mb,
+                    max_cycles,
+                    thresholds,
+                    parse_cache
+                ): package['path']
+                for package in packages
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    logger.error(f"Error analyzing package {path}: {str(e)}")
+                    results[path] = None
+        
+        risks = []
+        package_summaries = []
+        stats = {}
+        file_metrics = {}
+        edges = []
+        for package in packages:
+            result = results.get(package['path'])
+            if result:
+                risks.extend(result['risks'])
+                for key, value in result['stats'].items():
+                    stats[key] = stats.get(key, 0) + value
+                # Package edges index the package's paths; shift them past the packages merged so far
+                edges.append(result['edges'] + len(file_metrics.get('paths', [])))
+                for key, column in result['file_metrics'].items():
+                    file_metrics.setdefault(key, []).extend(column)
+            package_summaries.append({
+                'name': package['name'],
+                'path': package['path'],
+                'files': package['files'],
+                'loc': package['loc'],
+                'primary_language': result['primary_language'] if result else None,
+                'files_analyzed': result['files_analyzed'] if result else 0,
+                'edge_count': result['edge_count'] if result else 0,
+                'risk_count': len(result['risks']) if result else 0,
+                'degraded': result['degraded'] if result else None,
+                'error': None if result else "Package analysis failed"
+            })
+        
+        dependencies = MonorepoAnalyzer._build_package_dependencies(packages, results)
+        risks.extend(MonorepoAnalyzer._detect_package_cycles(packages, dependencies))
+        risks.sort(key=lambda r: ['high', 'medium', 'low'].index(r.confidence))
+        
+        return {
+            'risks': risks,
+            'packages': package_summaries,
+            'dependencies': dependencies,
+            'stats': stats,
+            'file_metrics': file_metrics,
+            'edges': np.concatenate(edges) if edges else np.empty((0, 2), dtype=np.int64)
+        }
+    
+    @staticmethod
+    def _read_manifests(repo_path: Path, package: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Read the package name and declared dependency names from its manifests.
+        """
+        package_dir = Path(repo_path) / package['path']
+        name = None
+        declared = set()
+        
+        for manifest in package.get('manifests', []):
+            try:
+                if manifest == 'package.json':
+                    with open(package_dir / manifest, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    name = name or data.get('name')
+                    for key in ('dependencies', 'devDependencies', 'peerDependencies'):
+                        declared.update((data.get(key) or {}).keys())
+                
+                elif manifest in ('pyproject.toml', 'Cargo.toml'):
+                    with open(package_dir / manifest, 'rb') as f:
+                        data = tomllib.load(f)
+                    if manifest == 'pyproject.toml':
+                        project = data.get('project', {})
+                        poetry = data.get('tool', {}).get('poetry', {})
+                        name = name or project.get('name') or poetry.get('name')
+                        for requirement in project.get('dependencies', []):
+                            match = re.match(r"\s*([A-Za-z0-9_.\-]+)", requirement)
+                            if match:
+                                declared.add(match.group(1))
+                        declared.update(poetry.get('dependencies', {}).keys())
+                    else:
+                        name = name or data.get('package', {}).get('name')
+                        declared.update(data.get('dependencies', {}).keys())
+                        declared.update(data.get('dev-dependencies', {}).keys())
+            except Exception as e:
+                logger.warning(f"Could not read manifest {package_dir / manifest}: {e}")
+        
+        return {
+            'name': name or Path(package['path']).name,
+            'declared_dependencies': declared
+        }
+    
+    @staticmethod
+    def _normalize(name: str) -> str:
+        return name.lower().replace('-', '_')
+    
+    @staticmethod
+    def _build_package_dependencies(
+        packages: List[Dict[str, Any]],
+        results: Dict[str, Optional[Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Link packages through declared manifest dependencies and resolved imports.
+        """
+        by_name = {MonorepoAnalyzer._normalize(p['name']): p['path'] for p in packages}
+        dependencies = []
+        
+        for package in packages:
+            targets = {}
+            
+            for declared in package['declared_dependencies']:
+                target = by_name.get(MonorepoAnalyzer._normalize(declared))
+                if target and target != package['path']:
+                    targets.setdefault(target, set()).add('manifest')
+            
+            result = results.get(package['path'])
+            for imp in (result['imports'] if result else set()):
+                # Match the import root: "@scope/pkg/sub" -> "@scope/pkg", "pkg.sub" -> "pkg"
+                parts = re.split(r"[./]", imp)
+                roots = ['/'.join(parts[:2])] if imp.startswith('@') else [parts[0]]
+                for root in roots:
+                    target = by_name.get(MonorepoAnalyzer._normalize(root))
+                    if target and target != package['path']:
+                        targets.setdefault(target, set()).add('import')
+            
+            for target, via in targets.items():
+                dependencies.append({
+                    'source': package['path'],
+                    'target': target,
+                    'via': sorted(via)
+                })
+        
+        return dependencies
+    
+    @staticmethod
+    def _detect_package_cycles(
+        packages: List[Dict[str, Any]],
+        dependencies: List[Dict[str, Any]]
+    ) -> List[Risk]:
+        """Detect circular dependencies between packages."""
+        graph = nx.DiGraph()
+        graph.add_nodes_from(p['path'] for p in packages)
+        graph.add_edges_from((d['source'], d['target']) for d in dependencies)
+        
+        risks = []
+        for cycle in RiskDetector.canonical_cycles(nx.simple_cycles(graph)):
+            if len(cycle) > 1:
+                risks.append(Risk(
+                    title="Circular Package Dependency",
+                    files=cycle,
+                    evidence=f"Packages form a circular dependency chain: {' -> '.join(cycle)} -> {cycle[0]}",
+                    why_it_matters="Packages that depend on each other cannot be built, versioned or released independently, "
+                                   "which defeats the purpose of splitting the monorepo.",
+                    suggested_action="Extract the shared code into a lower-level package that both depend on, "
+                                     "or invert one of the dependencies through an interface.",
+                    confidence=RiskLevel.HIGH
+                ))
+        return risks
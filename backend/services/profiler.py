@@ -0,0 +1,68 @@
+import io
+import marshal
+import cProfile
+import pstats
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, Any, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AnalysisProfiler:
+    """
+    Profiles a block of analysis code with cProfile and tracemalloc.
+    Only code running in the current thread is profiled; monorepo packages
+    analyzed in worker processes show up as time spent waiting on the pool.
+    """
+    
+    TOP_FUNCTIONS = 50
+    TOP_ALLOCATIONS = 25
+    
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.peak_memory_bytes = 0
+        self.top_allocations: List[Dict[str, Any]] = []
+        self._started_tracemalloc = False
+    
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self.profile.enable()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.disable()
+        try:
+            _, self.peak_memory_bytes = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            self.top_allocations = [
+                {
+                    "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    "size_bytes": stat.size,
+                    "count": stat.count
+                }
+                for stat in snapshot.statistics("lineno")[:self.TOP_ALLOCATIONS]
+            ]
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        return False
+    
+    def to_document(self) -> Dict[str, Any]:
+        """
+        Build the stored profile artifact.
+        pstats_data is in the dump_stats format, so it loads with pstats.Stats(path) once written to disk.
+        """
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.TOP_FUNCTIONS)
+        return {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "summary": stream.getvalue(),
+            "pstats_data": marshal.dumps(stats.stats),
+            "tracemalloc_peak_bytes": self.peak_memory_bytes,
+            "top_allocations": self.top_allocations
+        }
@@ -0,0 +1,64 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import logging
+from config import get_settings
+from analyzers.reachability import ReachabilityIndex
+
+logger = logging.getLogger(__name__)
+
+class ReachabilityStore:
+    """
+    Persists each analysis's ReachabilityIndex and keeps recently queried ones in memory.
+    
+    Indexes are stored in analysis_reachability, one document per analysis, apart
+    from the analysis documents that list endpoints return. Analyses never change,
+    so a loaded index is cached for the life of the process, least recently used
+    evicted first.
+    """
+    
+    COLLECTION = "analysis_reachability"
+    
+    # Stay under MongoDB's 16MB document limit
+    MAX_DOCUMENT_BYTES = 15 * 1024 * 1024
+    
+    _cache: "OrderedDict[str, ReachabilityIndex]" = OrderedDict()
+    _indexes_ready = False
+    
+    def __init__(self, db):
+        self.collection = db[self.COLLECTION]
+        self.cache_size = get_settings().reachability_cache_size
+    
+    async def save(self, analysis_id: str, document: Dict[str, Any]):
+        size = len(document["rows"]) + len(document["components"]) + sum(len(p) for p in document["paths"])
+        if size > self.MAX_DOCUMENT_BYTES:
+            logger.warning(f"Reachability index of {analysis_id} is {size} bytes, too large to store")
+            return
+        
+        if not ReachabilityStore._indexes_ready:
+            await self.collection.create_index("analysis_id", unique=True)
+            ReachabilityStore._indexes_ready = True
+        await self.collection.replace_one(
+            {"analysis_id": analysis_id},
+            {"analysis_id": analysis_id, **document},
+            upsert=True
+        )
+    
+    async def load(self, analysis: Dict[str, Any]) -> Optional[ReachabilityIndex]:
+        """Index of an analysis, or None if it has none. Shared copies use their source's index."""
+        analysis_id = analysis.get("shared_from") or analysis["analysis_id"]
+        index = self._cache.get(analysis_id)
+        if index is not None:
+            self._cache.move_to_end(analysis_id)
+            return index
+        
+        document = await self.collection.find_one({"analysis_id": analysis_id}, {"_id": 0})
+        if not document:
+            return None
+        
+        # Decompressing a large index takes milliseconds; keep it off the event loop
+        index = await asyncio.to_thread(ReachabilityIndex.from_document, document)
+        self._cache[analysis_id] = index
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return index
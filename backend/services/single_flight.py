@@ -0,0 +1,176 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+import logging
+from pymongo.errors import DuplicateKeyError
+from analyzers import ANALYZER_VERSION
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def analysis_key(repo_id: int, commit_sha: str, large_repo: bool = False) -> str:
+    """Key of an analysis: same repository, commit, analyzer version and mode give the same result."""
+    mode = "large" if large_repo else "standard"
+    return f"{repo_id}:{commit_sha}:{ANALYZER_VERSION}:{mode}"
+
+class AnalysisSingleFlight:
+    """
+    Runs at most one analysis per key at a time.
+    
+    Within a process, callers with the same key await one shared task. Across
+    processes, the leader holds a lease on the key in the analysis_flights
+    collection, renewed while it runs; other processes poll the flight and read
+    the leader's saved analysis when it is done. A finished flight keeps answering
+    for single_flight_reuse_seconds, and a flight whose leader died or failed is
+    taken over by the next caller. Leases are stamped and checked with each node's
+    own clock, so node clocks must be kept synchronised (e.g. NTP): a node running
+    a lease length ahead takes over flights that are still running.
+    """
+    
+    COLLECTION = "analysis_flights"
+    
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    
+    _local: Dict[str, asyncio.Task] = {}
+    _indexes_ready = False
+    
+    def __init__(self, db):
+        settings = get_settings()
+        self.db = db
+        self.collection = db[self.COLLECTION]
+        self.lease_seconds = settings.single_flight_lease_seconds
+        self.poll_seconds = settings.single_flight_poll_seconds
+        self.reuse_seconds = settings.single_flight_reuse_seconds
+        self.owner = f"{socket.gethostname()}-{os.getpid()}"
+    
+    async def run(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Run compute() once for everyone asking for key. compute must save and return the analysis.
+        Returns (analysis, shared); shared is True if the analysis was produced for another caller.
+        """
+        task = self._local.get(key)
+        if task is not None:
+            logger.info(f"Attaching to in-process analysis {key}")
+            analysis, _ = await asyncio.shield(task)
+            return analysis, True
+        
+        task = asyncio.ensure_future(self._run_flight(key, compute))
+        self._local[key] = task
+        task.add_done_callback(lambda t: self._local.pop(key, None) if self._local.get(key) is t else None)
+        return await asyncio.shield(task)
+    
+    async def _ensure_indexes(self):
+        if not AnalysisSingleFlight._indexes_ready:
+            # Flights are only coordination state; MongoDB drops them once they expire
+            await self.collection.create_index("expires_at", expireAfterSeconds=0)
+            AnalysisSingleFlight._indexes_ready = True
+    
+    async def _run_flight(self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        await self._ensure_indexes()
+        while True:
+            token = uuid.uuid4().hex
+            leading, flight = await self._acquire(key, token)
+            if leading:
+                return await self._lead(key, token, compute), False
+            
+            if flight:
+                analysis = await self._follow(key, flight)
+                if analysis is not None:
+                    return analysis, True
+            # The flight failed, lapsed or vanished; try to take it over
+    
+    async def _acquire(self, key: str, token: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Take the flight for key if it is free, failed or expired.
+        Returns (leading, flight); flight is the one to follow when not leading.
+        """
+        now = _now()
+        lease = {
+            "status": self.RUNNING,
+            "token": token,
+            "owner": self.owner,
+            "analysis_id": None,
+            "started_at": now,
+            "expires_at": now + timedelta(seconds=self.lease_seconds)
+        }
+        try:
+            await self.collection.insert_one({"_id": key, **lease})
+            return True, None
+        except DuplicateKeyError:
+            pass
+        
+        taken = await self.collection.find_one_and_update(
+            {"_id": key, "$or": [{"status": self.FAILED}, {"expires_at": {"$lt": now}}]},
+            {"$set": lease}
+        )
+        if taken:
+            return True, None
+        
+        return False, await self.collection.find_one({"_id": key})
+    
+    async def _lead(self, key: str, token: str, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        heartbeat = asyncio.create_task(self._heartbeat(key, token))
+        try:
+            analysis = await compute()
+        except BaseException:
+            heartbeat.cancel()
+            await self._release(key, token, {"status": self.FAILED})
+            raise
+        
+        heartbeat.cancel()
+        await self._release(key, token, {
+            "status": self.DONE,
+            "analysis_id": analysis["analysis_id"],
+            "expires_at": _now() + timedelta(seconds=self.reuse_seconds)
+        })
+        return analysis
+    
+    async def _release(self, key: str, token: str, update: Dict[str, Any]):
+        try:
+            await self.collection.update_one({"_id": key, "token": token}, {"$set": update})
+        except Exception as e:
+            # Followers fall back to waiting out the lease
+            logger.warning(f"Could not release analysis flight {key}: {str(e)}")
+    
+    async def _heartbeat(self, key: str, token: str):
+        interval = max(1.0, self.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.collection.update_one(
+                    {"_id": key, "token": token, "status": self.RUNNING},
+                    {"$set": {"expires_at": _now() + timedelta(seconds=self.lease_seconds)}}
+                )
+            except Exception as e:
+                logger.warning(f"Heartbeat for analysis flight {key} failed: {str(e)}")
+    
+    async def _follow(self, key: str, flight: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Wait for a flight led by another process.
+        Returns its analysis, or None if the flight failed or its lease lapsed.
+        """
+        logger.info(f"Attaching to analysis {key} running on {flight['owner']}")
+        token = flight["token"]
+        
+        while True:
+            if flight["status"] == self.DONE:
+                analysis = await self.db["analyses"].find_one({"analysis_id": flight["analysis_id"]}, {"_id": 0})
+                if analysis is None:
+                    await self._release(key, token, {"status": self.FAILED})
+                return analysis
+            if flight["status"] != self.RUNNING:
+                return None
+            
+            await asyncio.sleep(self.poll_seconds)
+            # The leader's expiry against this node's clock; see the class docstring on skew
+            flight = await self.collection.find_one({"_id": key, "token": token, "expires_at": {"$gte": _now()}})
+            if not flight:
+                return None
@@ -0,0 +1,190 @@
+"""
+Standalone analysis worker. Claims jobs from the analysis_jobs collection,
+runs clone -> feasibility -> risk detection and saves the result.
+
+Run from the backend directory; start as many processes, on as many nodes, as needed:
+    python worker.py
+    python worker.py --concurrency 2 --metrics-port 9100
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import logging
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from prometheus_client import start_http_server
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from config import get_settings
+from services.admission import AdmissionController, AdmissionRejected
+from services.analysis_pipeline import CloneError, run_repository_analysis, save_analysis, share_analysis
+from services.github_service import GitHubService
+from services.job_queue import AnalysisJobQueue
+from services.metrics import AnalysisMetrics, MongoCommandMetrics
+from services.single_flight import AnalysisSingleFlight, analysis_key
+
+logger = logging.getLogger(__name__)
+
+class LeaseLost(Exception):
+    """Raised when a job's lease passed to another worker while it was running."""
+
+class AnalysisWorker:
+    """Runs queued analysis jobs, `concurrency` at a time, until stopped."""
+    
+    def __init__(self, db, worker_id: str, concurrency: int = 1, poll_interval: Optional[float] = None):
+        self.db = db
+        self.queue = AnalysisJobQueue(db)
+        self.worker_id = worker_id
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval or get_settings().worker_poll_interval_seconds
+        self.admission = AdmissionController.from_settings(max_concurrent=concurrency)
+        self._stopping = asyncio.Event()
+    
+    def stop(self):
+        """Stop claiming jobs; running jobs are finished first."""
+        if not self._stopping.is_set():
+            logger.info(f"Worker {self.worker_id} stopping after in-flight jobs")
+            self._stopping.set()
+    
+    async def run(self):
+        await self.queue.ensure_indexes()
+        logger.info(f"Worker {self.worker_id} started with concurrency {self.concurrency}")
+        await asyncio.gather(*(self._run_slot() for _ in range(self.concurrency)))
+        logger.info(f"Worker {self.worker_id} stopped")
+    
+    async def _run_slot(self):
+        while not self._stopping.is_set():
+            try:
+                job = await self.queue.claim(self.worker_id)
+                if job:
+                    await self.process(job)
+                    continue
+                await self.queue.fail_expired()
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} queue error: {str(e)}")
+            
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def process(self, job: Dict[str, Any]):
+        """Run one claimed job while heartbeating its lease."""
+        job_id = job["job_id"]
+        repo = job["repo"]
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, lease_lost))
+        logger.info(f"Running job {job_id} for {repo['full_name']} (attempt {job['attempts']}/{job['max_attempts']})")
+        
+        try:
+            user = await self.db["users"].find_one({"github_id": job["user_github_id"]})
+            if not user:
+                await self.queue.fail(job_id, self.worker_id, "User not found", retry=False)
+                return
+            
+            metrics = AnalysisMetrics()
+            # Push-triggered jobs carry the pushed commit; others analyze the branch head
+            commit_sha = job.get("commit_sha")
+            if not commit_sha and repo.get("default_branch"):
+                github_service = GitHubService(user["access_token"])
+                commit_sha = await github_service.get_branch_head_sha(repo["full_name"], repo["default_branch"])
+            
+            async def analyze() -> Dict[str, Any]:
+                async with self.admission.admit(job["user_github_id"], (repo.get("size") or 0) * 1024):
+                    result = await asyncio.to_thread(
+                        run_repository_analysis,
+                        repo,
+                        user,
+                        job["large_repo"],
+                        metrics,
+                        job["analysis_id"],
+                        commit_sha=commit_sha
+                    )
+                # Another worker owns the job now; let it write the result
+                if lease_lost.is_set():
+                    raise LeaseLost(job_id)
+                return await save_analysis(self.db, result, metrics)
+            
+            if commit_sha:
+                # Jobs and API requests for the same commit share one analysis
+                key = analysis_key(repo["id"], commit_sha, job["large_repo"])
+                result, shared = await AnalysisSingleFlight(self.db).run(key, analyze)
+                if shared:
+                    result = await share_analysis(self.db, result, job["user_github_id"], job["analysis_id"])
+            else:
+                result = await analyze()
+            
+            await self.queue.complete(job_id, self.worker_id)
+            logger.info(f"Job {job_id} complete: {len(result['risks'])} risks found")
+        
+        except LeaseLost:
+            logger.warning(f"Lost lease on job {job_id}, discarding result")
+        except AdmissionRejected as e:
+            # Out of slots or disk on this node; leave the job to a later claim
+            logger.warning(f"Requeueing job {job_id}: {str(e)}")
+            await self.queue.release(job_id, self.worker_id, e.retry_after)
+        except CloneError as e:
+            logger.error(f"Job {job_id} failed to clone: {str(e)}")
+            await self.queue.fail(job_id, self.worker_id, f"Failed to clone repository: {str(e)}")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            await self.queue.fail(job_id, self.worker_id, f"Analysis failed: {str(e)}")
+        finally:
+            heartbeat.cancel()
+    
+    async def _heartbeat(self, job_id: str, lease_lost: asyncio.Event):
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await self.queue.heartbeat(job_id, self.worker_id):
+                    lease_lost.set()
+                    return
+            except Exception as e:
+                # Keep trying; the lease only lapses if heartbeats fail for a whole lease period
+                logger.warning(f"Heartbeat for job {job_id} failed: {str(e)}")
+
+async def _main(args: argparse.Namespace):
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongo_url, event_listeners=[MongoCommandMetrics()])
+    worker = AnalysisWorker(
+        client[settings.db_name],
+        args.worker_id,
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval
+    )
+    
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    
+    try:
+        await worker.run()
+    finally:
+        client.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run PEI analysis jobs from the MongoDB queue")
+    parser.add_argument('--worker-id', default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument('--concurrency', type=int, default=1, help="Jobs run at the same time by this process")
+    parser.add_argument('--poll-interval', type=float, help="Seconds to wait when the queue is empty")
+    parser.add_argument('--metrics-port', type=int, help="Serve Prometheus metrics on this port")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+    
+    asyncio.run(_main(args))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+# The backend runs from its own directory, importing e.g. `services.job_queue`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+# Settings require these; tests use an in-memory database
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "pei_test")
+
+class Clock:
+    """Stands in for job_queue._now, so leases, backoff and debounce expire without sleeping."""
+    
+    def __init__(self):
+        self.now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    
+    def __call__(self) -> datetime:
+        return self.now
+    
+    def advance(self, seconds: float):
+        self.now += timedelta(seconds=seconds)
+    
+    def stored(self, seconds: float = 0) -> datetime:
+        """The time seconds from now as MongoDB returns it: naive, in UTC."""
+        return (self.now + timedelta(seconds=seconds)).replace(tzinfo=None)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+def clock(monkeypatch):
+    from services import job_queue
+    
+    clock = Clock()
+    monkeypatch.setattr(job_queue, "_now", clock)
+    return clock
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["pei_test"]
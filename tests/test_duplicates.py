@@ -0,0 +1,149 @@
+import numpy as np
+
+from analyzers.code_parser import PythonAnalyzer
+from analyzers.duplicates import TOKEN_PATTERN, CloneIndex, Winnower
+from analyzers.file_record import FileRecord
+
+PROCESS = '''def process(items, limit):
+    total = 0
+    for item in items:
+        if item.value > limit:
+            total += item.value * 2
+        elif item.value < 0:
+            raise ValueError("negative value")
+        else:
+            total -= 1
+    result = {"total": total, "count": len(items)}
+    return result
+'''
+
+CACHE = '''class Cache:
+    def __init__(self, size):
+        self.size = size
+        self.entries = {}
+
+    def get(self, key, default=None):
+        if key in self.entries:
+            return self.entries[key]
+        return default
+
+    def put(self, key, value):
+        if len(self.entries) >= self.size:
+            self.entries.pop(next(iter(self.entries)))
+        self.entries[key] = value
+'''
+
+# Short idioms, each below CloneIndex.MIN_RUN_TOKENS
+IDIOMS = [
+    "    if key not in cache or cache[key] is None:\n        cache[key] = loader(key, timeout=30)\n",
+    "    if not isinstance(value, (int, float)) or value < 0:\n        raise TypeError(f'bad {value}')\n"
+]
+
+def fingerprint(text: str):
+    winnower = Winnower()
+    winnower.feed_text(text, PythonAnalyzer.COMMENT_PATTERN)
+    return winnower.finish()
+
+def clone_index(files):
+    return CloneIndex.build(list(files), {path: FileRecord(fingerprints=fingerprint(text)) for path, text in files.items()})
+
+def scattered(name: str, body: str) -> str:
+    """Six functions alternating the idioms, each followed by body."""
+    return "".join(f"def {name}_{i}(value, key, cache):\n" + IDIOMS[i % 2] + body + "\n" for i in range(6))
+
+SCATTERED = {
+    "x.py": scattered("check", "    found = [v for v in range(10) if v % 3]\n    return {k: v for k, v in enumerate(found)}\n"),
+    "y.py": scattered("validate", "    with open(value) as f:\n        data = f.read().split(',')\n    return len(data) - 1\n")
+}
+
+def lines_of(text: str, snippet: str):
+    """First and last line of snippet in text."""
+    first = text[:text.index(snippet)].count("\n") + 1
+    return first, first + snippet.count("\n") - 1
+
+def test_renamed_copies_fingerprint_alike():
+    renamed = PROCESS.replace("items", "rows").replace("total", "acc").replace("negative value", "below zero")
+    
+    original, copy = fingerprint(PROCESS), fingerprint(renamed)
+    assert np.array_equal(original.hashes, copy.hashes)
+    assert np.array_equal(original.lines, copy.lines)
+
+def test_comments_are_dropped_and_keep_line_numbers():
+    commented = "# Process items\n# over two lines\n" + PROCESS.replace("total = 0", "total = 0  # running total")
+    
+    original, copy = fingerprint(PROCESS), fingerprint(commented)
+    assert np.array_equal(original.hashes, copy.hashes)
+    assert np.array_equal(original.lines + 2, copy.lines)
+    assert np.array_equal(original.end_lines + 2, copy.end_lines)
+
+def test_winnowing_keeps_a_fingerprint_in_every_window():
+    text = PROCESS + CACHE
+    tokens = len(TOKEN_PATTERN.findall(PythonAnalyzer.COMMENT_PATTERN.sub("", text)))
+    prints = fingerprint(text)
+    
+    kgrams = tokens - Winnower.K + 1
+    assert prints.positions[0] < Winnower.WINDOW
+    assert prints.positions[-1] >= kgrams - Winnower.WINDOW
+    assert np.all(np.diff(prints.positions) <= Winnower.WINDOW)
+    assert len(prints) < kgrams / 3
+
+def test_line_by_line_feeding_matches_whole_text():
+    text = "import os\n\n" + PROCESS
+    winnower = Winnower()
+    for number, line in enumerate(text.split("\n"), 1):
+        winnower.feed(line, number)
+    
+    by_line, whole = winnower.finish(), fingerprint(text)
+    for column in ("hashes", "positions", "lines", "end_lines"):
+        assert np.array_equal(getattr(by_line, column), getattr(whole, column))
+
+def test_files_shorter_than_one_kgram_have_no_fingerprints():
+    assert fingerprint("x = 1\n") is None
+
+def test_duplicated_snippets_are_reported_as_separate_runs():
+    # Each file's copies of CACHE and PROCESS, with different code between them
+    snippets = {
+        "a.py": (CACHE, PROCESS),
+        "b.py": (CACHE.replace("entries", "slots"), PROCESS.replace("items", "rows"))
+    }
+    files = {
+        "a.py": "import os\n# header\n\n" + PROCESS + "\n" + "".join(f"def f{i}():\n    return [{i}]\n" for i in range(12)) + "\n" + CACHE,
+        "b.py": "import sys\n\n\n\n\n" + snippets["b.py"][1] + "\n" + "\n".join(
+            f"with open(path_{i}) as f:\n    data = f.read().split(',')" for i in range(8)
+        ) + "\n" + snippets["b.py"][0],
+        "unrelated.py": "".join(f"while queue_{i}:\n    node = queue_{i}.pop()\n" for i in range(10))
+    }
+    
+    index = clone_index(files)
+    
+    assert len(index) == 1
+    cluster = index.clusters[0]
+    assert cluster.paths == ["a.py", "b.py"]
+    for path, runs in zip(cluster.paths, cluster.runs):
+        # One run per snippet, longest first, never spanning the code between them
+        assert len(runs) == 2
+        for (first, last), snippet in zip(runs, snippets[path]):
+            start, end = lines_of(files[path], snippet)
+            assert start <= first < last <= end
+            # Winnowing can miss the last K tokens of a snippet, not more
+            assert last - first + 1 >= snippet.count("\n") - 3
+    assert cluster.matched_lines() == min(last - first + 1 for (first, last), *_ in cluster.runs)
+
+def test_three_copies_form_one_cluster():
+    files = {f"{name}.py": f"# {name}\n" * i + PROCESS.replace("process", name) for i, name in enumerate(("a", "b", "c"))}
+    
+    index = clone_index(files)
+    
+    assert [cluster.paths for cluster in index.clusters] == [["a.py", "b.py", "c.py"]]
+    assert [runs[0][0] for runs in index.clusters[0].runs] == [1, 2, 3]
+
+def test_scattered_short_idioms_are_not_a_clone():
+    assert len(clone_index(SCATTERED)) == 0
+
+def test_scattered_idioms_would_cluster_without_the_run_length(monkeypatch):
+    # Guards the test above: the idioms share enough fingerprints to make a cluster
+    monkeypatch.setattr(CloneIndex, "MIN_RUN_TOKENS", 0)
+    
+    index = clone_index(SCATTERED)
+    assert len(index) == 1
+    assert all(len(runs) == 6 for runs in index.clusters[0].runs)
@@ -0,0 +1,88 @@
+import pytest
+from git import Actor, Repo
+
+from services.history import GitHistory
+
+AUTHOR = Actor("Dev", "dev@example.com")
+
+# Each commit's files and their contents, oldest first; a.py exists both at the root and in sub/
+COMMITS = [
+    {"a.py": "x = 1\n", "sub/a.py": "y = 1\n", "sub/b.py": "z = 1\n"},
+    {"a.py": "x = 2\nx = 3\n"},
+    {"sub/a.py": "y = 2\n"},
+    {"a.py": "x = 4\n", "sub/b.py": "z = 2\nz = 3\n"},
+    {"sub/a.py": "y = 3\ny = 4\n"}
+]
+
+@pytest.fixture
+def checkout(tmp_path):
+    path = tmp_path / "repo"
+    repo = Repo.init(path)
+    for i, files in enumerate(COMMITS):
+        for name, text in files.items():
+            (path / name).parent.mkdir(exist_ok=True)
+            (path / name).write_text(text)
+        repo.index.add(list(files))
+        repo.index.commit(f"commit {i}", author=AUTHOR, committer=AUTHOR)
+    return path
+
+def churn(path, paths, max_commits=100):
+    history = GitHistory.churn(path, paths, 30, max_commits)
+    churned_lines = history["churned_lines"]
+    return history, history["file_commits"].tolist(), churned_lines.tolist() if churned_lines is not None else None
+
+def test_counts_commits_and_changed_lines(checkout):
+    history, commits, lines = churn(checkout, ["a.py", "sub/a.py", "sub/b.py", "missing.py"])
+    
+    assert history["mode"] == GitHistory.NUMSTAT
+    assert history["commits"] == 5
+    assert not history["truncated"]
+    assert commits == [3, 3, 2, 0]
+    # a.py: +1, then -1 +2, then -2 +1
+    assert lines == [1 + 3 + 3, 1 + 2 + 3, 1 + 3, 0]
+
+def test_subdirectory_counts_its_own_files(checkout):
+    history, commits, lines = churn(checkout / "sub", ["a.py", "b.py"])
+    
+    # Only commits touching sub/, and the root a.py is not mistaken for sub/a.py
+    assert history["commits"] == 4
+    assert commits == [3, 2]
+    assert lines == [1 + 2 + 3, 1 + 3]
+
+def test_max_commits_truncates_the_window(checkout):
+    history, commits, _ = churn(checkout, ["a.py", "sub/a.py", "sub/b.py"], max_commits=2)
+    
+    assert history["commits"] == 2
+    assert history["truncated"]
+    assert commits == [1, 1, 1]
+
+def test_partial_clones_are_read_by_name_only(checkout):
+    with Repo(checkout).config_writer() as config:
+        config.set_value('remote "origin"', "promisor", "true")
+    
+    history, commits, lines = churn(checkout / "sub", ["a.py", "b.py"])
+    
+    assert history["mode"] == GitHistory.NAME_ONLY
+    assert commits == [3, 2]
+    assert lines is None
+
+@pytest.mark.parametrize("subdirectory", ["", "sub"])
+def test_shallow_boundary_commit_is_not_counted(checkout, tmp_path, subdirectory):
+    # A depth-3 clone: the oldest fetched commit has no parent and would list every file as added
+    clone = tmp_path / "clone"
+    Repo.clone_from(checkout.as_uri(), clone, depth=3)
+    
+    history, commits, _ = churn(clone / subdirectory, ["a.py"] if subdirectory else ["a.py", "sub/a.py", "sub/b.py"])
+    
+    if subdirectory:
+        assert (history["commits"], commits) == (2, [1])
+    else:
+        assert (history["commits"], commits) == (2, [1, 1, 1])
+
+def test_fetch_deepens_a_clone_from_a_subdirectory(checkout, tmp_path):
+    clone = tmp_path / "clone"
+    Repo.clone_from(checkout.as_uri(), clone, depth=1)
+    
+    assert GitHistory.fetch(clone / "sub", 30)
+    
+    assert len(list(Repo(clone).iter_commits())) == len(COMMITS)
@@ -0,0 +1,175 @@
+import pytest
+
+from services.job_queue import AnalysisJobQueue
+
+pytestmark = pytest.mark.anyio
+
+REPO = {
+    "id": 1,
+    "name": "api",
+    "full_name": "acme/api",
+    "clone_url": "https://github.com/acme/api.git",
+    "default_branch": "main",
+    "size": 120
+}
+
+@pytest.fixture
+async def queue(db, clock):
+    queue = AnalysisJobQueue(db)
+    queue.lease_seconds = 60
+    queue.max_attempts = 3
+    queue.retry_backoff_seconds = 10
+    await queue.ensure_indexes()
+    return queue
+
+async def test_enqueue_queues_a_due_job(queue, clock):
+    job = await queue.enqueue(REPO, 7, large_repo=True)
+    
+    stored = await queue.get(job["job_id"], user_github_id=7)
+    assert stored["status"] == AnalysisJobQueue.QUEUED
+    assert stored["attempts"] == 0
+    assert stored["not_before"] == clock.stored()
+    assert stored["large_repo"] is True
+    assert stored["repo"] == REPO
+    assert await queue.get(job["job_id"], user_github_id=8) is None
+    assert await queue.count_active(7) == 1
+
+async def test_enqueue_coalesced_merges_into_the_queued_job(queue, clock):
+    first = await queue.enqueue_coalesced(REPO, 7, "push:1:main", "sha1", delay_seconds=30)
+    clock.advance(5)
+    second = await queue.enqueue_coalesced(REPO, 7, "push:1:main", "sha2", delay_seconds=30)
+    
+    assert second["job_id"] == first["job_id"]
+    assert second["coalesced"] == 2
+    assert second["commit_sha"] == "sha2"
+    # Each merge restarts the delay
+    assert second["not_before"] == clock.stored(30)
+    assert await queue.count_active(7) == 1
+    
+    other = await queue.enqueue_coalesced(REPO, 7, "push:1:dev", "sha3", delay_seconds=30)
+    assert other["job_id"] != first["job_id"]
+
+async def test_enqueue_coalesced_after_claim_queues_a_new_job(queue, clock):
+    first = await queue.enqueue_coalesced(REPO, 7, "push:1:main", "sha1", delay_seconds=0)
+    assert (await queue.claim("w1"))["job_id"] == first["job_id"]
+    
+    # The running job has left the coalescing index; a later push runs again
+    second = await queue.enqueue_coalesced(REPO, 7, "push:1:main", "sha2", delay_seconds=0)
+    assert second["job_id"] != first["job_id"]
+    assert second["coalesced"] == 1
+    assert await queue.count_active(7) == 2
+
+async def test_claim_takes_due_jobs_oldest_first(queue, clock):
+    delayed = await queue.enqueue_coalesced(REPO, 7, "push:1:main", "sha1", delay_seconds=30)
+    clock.advance(1)
+    older = await queue.enqueue(REPO, 7)
+    clock.advance(1)
+    newer = await queue.enqueue(REPO, 8)
+    
+    claimed = await queue.claim("w1")
+    assert claimed["job_id"] == older["job_id"]
+    assert claimed["status"] == AnalysisJobQueue.RUNNING
+    assert claimed["lease_owner"] == "w1"
+    assert claimed["attempts"] == 1
+    assert claimed["lease_expires_at"] == clock.stored(60)
+    
+    assert (await queue.claim("w2"))["job_id"] == newer["job_id"]
+    # The coalesced job is not due yet
+    assert await queue.claim("w3") is None
+    clock.advance(30)
+    assert (await queue.claim("w3"))["job_id"] == delayed["job_id"]
+
+async def test_heartbeat_extends_the_lease(queue, clock):
+    job = await queue.enqueue(REPO, 7)
+    await queue.claim("w1")
+    
+    clock.advance(50)
+    assert await queue.heartbeat(job["job_id"], "w1")
+    clock.advance(50)
+    # Past the original lease, but within the extended one
+    assert await queue.claim("w2") is None
+    assert not await queue.heartbeat(job["job_id"], "w2")
+
+async def test_expired_lease_is_reclaimed_by_another_worker(queue, clock):
+    job = await queue.enqueue(REPO, 7)
+    await queue.claim("w1")
+    
+    clock.advance(59)
+    assert await queue.claim("w2") is None
+    clock.advance(2)
+    reclaimed = await queue.claim("w2")
+    assert reclaimed["job_id"] == job["job_id"]
+    assert reclaimed["lease_owner"] == "w2"
+    assert reclaimed["attempts"] == 2
+    
+    # The first worker lost the job and can no longer change it
+    assert not await queue.heartbeat(job["job_id"], "w1")
+    assert not await queue.complete(job["job_id"], "w1")
+    assert not await queue.fail(job["job_id"], "w1", "late")
+    assert await queue.complete(job["job_id"], "w2")
+    
+    stored = await queue.get(job["job_id"])
+    assert stored["status"] == AnalysisJobQueue.SUCCEEDED
+    assert stored["lease_expires_at"] is None
+    assert await queue.count_active(7) == 0
+
+async def test_failures_back_off_exponentially_then_fail_the_job(queue, clock):
+    job = await queue.enqueue(REPO, 7)
+    
+    for attempt, backoff in ((1, 10), (2, 20)):
+        claimed = await queue.claim("w1")
+        assert claimed["attempts"] == attempt
+        assert await queue.fail(job["job_id"], "w1", f"boom {attempt}")
+        
+        stored = await queue.get(job["job_id"])
+        assert stored["status"] == AnalysisJobQueue.QUEUED
+        assert stored["error"] == f"boom {attempt}"
+        assert stored["not_before"] == clock.stored(backoff)
+        
+        clock.advance(backoff - 1)
+        assert await queue.claim("w1") is None
+        clock.advance(1)
+    
+    assert (await queue.claim("w1"))["attempts"] == 3
+    assert await queue.fail(job["job_id"], "w1", "boom 3")
+    
+    stored = await queue.get(job["job_id"])
+    assert stored["status"] == AnalysisJobQueue.FAILED
+    assert stored["error"] == "boom 3"
+    assert stored["finished_at"] == clock.stored()
+    clock.advance(3600)
+    assert await queue.claim("w1") is None
+
+async def test_fail_without_retry_fails_at_once(queue, clock):
+    job = await queue.enqueue(REPO, 7)
+    await queue.claim("w1")
+    
+    assert await queue.fail(job["job_id"], "w1", "User not found", retry=False)
+    assert (await queue.get(job["job_id"]))["status"] == AnalysisJobQueue.FAILED
+
+async def test_release_does_not_count_the_attempt(queue, clock):
+    job = await queue.enqueue(REPO, 7)
+    await queue.claim("w1")
+    
+    assert await queue.release(job["job_id"], "w1", delay_seconds=15)
+    stored = await queue.get(job["job_id"])
+    assert stored["status"] == AnalysisJobQueue.QUEUED
+    assert stored["attempts"] == 0
+    
+    assert await queue.claim("w2") is None
+    clock.advance(15)
+    assert (await queue.claim("w2"))["attempts"] == 1
+
+async def test_lease_expired_on_the_final_attempt_fails_the_job(queue, clock):
+    job = await queue.enqueue(REPO, 7)
+    for _ in range(3):
+        assert (await queue.claim("w1"))["job_id"] == job["job_id"]
+        clock.advance(61)
+    
+    # Out of attempts: not claimable, and failed by the sweep instead
+    assert await queue.claim("w2") is None
+    assert await queue.fail_expired() == 1
+    stored = await queue.get(job["job_id"])
+    assert stored["status"] == AnalysisJobQueue.FAILED
+    assert stored["error"] == "Worker lease expired on the final attempt"
+    assert await queue.fail_expired() == 0
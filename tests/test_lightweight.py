@@ -0,0 +1,181 @@
+import pytest
+
+from analyzers.lightweight import CAnalyzer, GoAnalyzer, PHPAnalyzer, RustAnalyzer
+from analyzers.registry import get_analyzer
+
+# One small file per language: (file name, source, imports, classes, functions, package).
+# Imports inside comments must not be picked up.
+SOURCES = [
+    ("Store.java", """package com.acme.store;
+import java.util.List;
+import static com.acme.util.Strings.join;
+import com.acme.cache.*;
+/* A store
+   import com.acme.ignored.Thing; */
+public class Store implements Repository {
+    private final List<String> items;
+    public Store(List<String> items) { this.items = items; }
+    public static String render(List<String> rows) {
+        return join(rows); // import com.acme.nope;
+    }
+}
+interface Repository {}
+""", ["java.util.List", "com.acme.util.Strings.join", "com.acme.cache"], ["Store", "Repository"], ["Store", "render"], "com.acme.store"),
+    ("Store.kt", """package com.acme.store
+import com.acme.cache.Lru
+import com.acme.util.*
+import com.acme.net.Client as HttpClient
+data class Store(val items: List<String>) {
+    fun render(): String = items.joinToString()
+}
+fun String.shout(): String = uppercase()
+object Registry
+""", ["com.acme.cache.Lru", "com.acme.util", "com.acme.net.Client"], ["Store", "Registry"], ["render", "shout"], "com.acme.store"),
+    ("Store.scala", """package com.acme.store
+import com.acme.cache.Lru
+import com.acme.util._
+import com.acme.net.{Client, Server}
+trait Repository
+class Store(items: List[String]) extends Repository {
+  def render: String = items.mkString
+  def size(): Int = items.length
+}
+object Registry
+""", ["com.acme.cache.Lru", "com.acme.util", "com.acme.net"], ["Repository", "Store", "Registry"], ["render", "size"], "com.acme.store"),
+    ("Store.cs", """namespace Acme.Store;
+using System.Collections.Generic;
+global using static Acme.Util.Strings;
+public class Store : IRepository
+{
+    public static string Render(List<string> rows) => Join(rows);
+    private async Task<int> CountAsync() { return 0; }
+}
+public interface IRepository {}
+""", ["System.Collections.Generic", "Acme.Util.Strings"], ["Store", "IRepository"], ["Render", "CountAsync"], "Acme.Store"),
+    ("store.go", """package store
+import "fmt"
+import (
+    "strings"
+    cache "github.com/acme/cache"
+    // "github.com/acme/ignored"
+)
+type Store struct {
+    items []string
+}
+type Repository interface{}
+func (s *Store) Render() string { return strings.Join(s.items, fmt.Sprint(",")) }
+func New() *Store { return &Store{} }
+""", ["fmt", "strings", "github.com/acme/cache"], ["Store", "Repository"], ["Render", "New"], "store"),
+    ("store.rs", """use std::fmt;
+use crate::cache::{Lru, Ttl};
+pub(crate) use package::store::{
+    Repo,
+    Cache,
+};
+mod parser;
+// use crate::ignored;
+pub struct Store {
+    repo: Repo,
+}
+enum Kind { A, B }
+trait Render {}
+impl Store {
+    pub fn render(&self) -> String { String::new() }
+}
+fn main() {}
+""", ["std::fmt", "crate::cache", "package::store", "parser"], ["Store", "Kind", "Render"], ["render", "main"], None),
+    ("store.cpp", """#include <vector>
+#include "cache/lru.h"
+// #include "ignored.h"
+template <typename T>
+class Store : public Base {
+};
+struct Row {
+};
+int count(const std::vector<int>& items) {
+    if (items.empty()) {
+        return 0;
+    }
+    return static_cast<int>(items.size());
+}
+""", ["vector", "cache/lru.h"], ["Store", "Row"], ["count"], None),
+    ("store.rb", """require 'json'
+require_relative "cache/lru"
+# require 'ignored'
+=begin
+require 'also_ignored'
+=end
+module Acme
+  class Store
+    def self.build; end
+    def empty?
+      true
+    end
+  end
+end
+""", ["json", "cache/lru"], ["Acme", "Store"], ["build", "empty?"], None),
+    ("Store.php", """<?php
+namespace Acme\\Store;
+use Acme\\Cache\\Lru;
+require_once 'lib/helpers.php';
+# include 'ignored.php';
+interface Repository {}
+class Store implements Repository
+{
+    public function render(array $rows): string { return implode(',', $rows); }
+}
+function helper() {}
+""", ["Acme\\Cache\\Lru", "lib/helpers"], ["Repository", "Store"], ["render", "helper"], "Acme\\Store"),
+    ("Store.swift", """import Foundation
+@testable import AcmeCache
+protocol Repository {}
+struct Row {}
+final class Store: Repository {
+    func render() -> String { "" }
+}
+extension Store {
+    func count() -> Int { 0 }
+}
+""", ["Foundation", "AcmeCache"], ["Repository", "Row", "Store", "Store"], ["render", "count"], None)
+]
+
+@pytest.mark.parametrize(
+    "name, source, imports, classes, functions, package", SOURCES, ids=[name for name, *_ in SOURCES]
+)
+def test_extracts_imports_and_declarations(tmp_path, name, source, imports, classes, functions, package):
+    path = tmp_path / name
+    path.write_text(source)
+    
+    result = get_analyzer(path.suffix).analyze_file(path)
+    
+    assert result['imports'] == imports
+    assert result['classes'] == classes
+    assert result['functions'] == functions
+    assert result['package'] == package
+    assert result['complexity'] == len(classes) + len(functions)
+
+@pytest.mark.parametrize("source, imports", [
+    ("use a::b::{\n    C,\n    D,\n};\nfn f() {}\n", ["a::b"]),
+    ("pub use a::{\n    b::{C, D},\n    e::F,\n};\nuse g::H;\n", ["a", "g::H"]),
+    ("use a::{b,\n    c};\nmod d;\nstruct Real;\n", ["a", "d"])
+])
+def test_rust_use_spanning_lines(tmp_path, source, imports):
+    path = tmp_path / "lib.rs"
+    path.write_text(source)
+    
+    result = RustAnalyzer.analyze_file(path)
+    
+    assert result['imports'] == imports
+    assert result['functions'] == (["f"] if "fn f" in source else [])
+    assert result['classes'] == (["Real"] if "Real" in source else [])
+
+@pytest.mark.parametrize("analyzer, name, segments", [
+    (RustAnalyzer, "crate::store::cache", ["store", "cache"]),
+    (RustAnalyzer, "super::parser", ["parser"]),
+    (GoAnalyzer, "github.com/acme/cache", ["github.com", "acme", "cache"]),
+    (CAnalyzer, "cache/lru.h", ["cache", "lru"]),
+    (PHPAnalyzer, "Acme\\Cache\\Lru", ["Acme", "Cache", "Lru"]),
+    (PHPAnalyzer, "../lib/helpers", ["lib", "helpers"])
+])
+def test_import_segments(analyzer, name, segments):
+    assert analyzer.import_segments(name) == segments
@@ -0,0 +1,75 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from analyzers.reachability import ReachabilityIndex
+from analyzers.risk_detector import RiskDetector
+
+def random_graph(seed: int, n: int, m: int):
+    """File paths and (importer, imported) index pairs of a random graph, cycles and self-imports included."""
+    rng = np.random.default_rng(seed)
+    paths = [f"src/m{i:03d}.py" for i in range(n)]
+    edges = rng.integers(0, n, size=(m, 2))
+    graph = nx.DiGraph()
+    graph.add_nodes_from(paths)
+    graph.add_edges_from((paths[u], paths[v]) for u, v in edges.tolist())
+    return paths, edges, graph
+
+def expected_dependents(graph: nx.DiGraph, paths, changed):
+    reached = set().union(*(nx.ancestors(graph, path) for path in changed)) - set(changed)
+    return [path for path in paths if path in reached]
+
+@pytest.mark.parametrize("seed, n, m", [(0, 30, 20), (1, 60, 90), (2, 120, 240), (3, 50, 400)])
+def test_dependents_match_ancestors(seed, n, m):
+    paths, edges, graph = random_graph(seed, n, m)
+    index = ReachabilityIndex.build(paths, edges)
+    
+    for path in paths:
+        assert index.dependents([path]) == (expected_dependents(graph, paths, [path]), [])
+    
+    rng = np.random.default_rng(seed)
+    for _ in range(20):
+        changed = [paths[i] for i in rng.choice(n, size=rng.integers(2, 6), replace=False)]
+        assert index.dependents(changed) == (expected_dependents(graph, paths, changed), [])
+
+def test_files_in_a_cycle_depend_on_each_other():
+    paths = ["a.py", "b.py", "c.py", "d.py"]
+    # a -> b -> c -> a, and d imports a
+    index = ReachabilityIndex.build(paths, np.array([[0, 1], [1, 2], [2, 0], [3, 0]]))
+    
+    assert index.component_count == 2
+    assert index.dependents(["b.py"]) == (["a.py", "c.py", "d.py"], [])
+    assert index.dependents(["d.py"]) == ([], [])
+
+def test_unknown_paths_are_returned_separately():
+    index = ReachabilityIndex.build(["a.py", "b.py"], np.array([[0, 1]]))
+    
+    assert index.dependents(["b.py", "gone.py"]) == (["a.py"], ["gone.py"])
+    assert index.dependents(["gone.py"]) == ([], ["gone.py"])
+
+def test_document_round_trip():
+    paths, edges, graph = random_graph(4, 80, 160)
+    index = ReachabilityIndex.from_document(ReachabilityIndex.build(paths, edges).to_document())
+    
+    for path in paths:
+        assert index.dependents([path])[0] == expected_dependents(graph, paths, [path])
+
+def test_empty_graph():
+    index = ReachabilityIndex.build([], np.empty((0, 2), dtype=np.int64))
+    
+    assert index.component_count == 0
+    assert index.dependents(["a.py"]) == ([], ["a.py"])
+
+def test_index_over_detector_edges(tmp_path):
+    # The pipeline builds the index from RiskDetector's paths and edge index pairs
+    imports = {"app": ["routes", "models"], "routes": ["services"], "services": ["models", "routes"], "models": [], "cli": ["services"]}
+    for module, names in imports.items():
+        (tmp_path / f"{module}.py").write_text("".join(f"import {name}\n" for name in names))
+    detector = RiskDetector(tmp_path, "python")
+    detector.detect_risks()
+    
+    index = ReachabilityIndex.build(detector.paths, detector.edges)
+    
+    for path in detector.paths:
+        assert index.dependents([path])[0] == expected_dependents(detector.graph, detector.paths, [path])
+    assert sorted(index.dependents(["models.py"])[0]) == ["app.py", "cli.py", "routes.py", "services.py"]
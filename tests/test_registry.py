@@ -0,0 +1,19 @@
+import pytest
+
+from analyzers.registry import ANALYZERS, FALLBACK_EXTENSIONS, extensions_for_language
+
+@pytest.mark.parametrize("language, extensions", [
+    ("Python", {".py"}),
+    ("typescript", {".js", ".jsx", ".ts", ".tsx"}),
+    ("Go", {".go"}),
+    ("C++", {".c", ".cpp", ".h"}),
+    ("C#", {".cs"})
+])
+def test_extensions_of_a_language_with_an_analyzer(language, extensions):
+    assert extensions_for_language(language) == extensions
+
+@pytest.mark.parametrize("language", ["HTML", "Shell", "", None])
+def test_languages_without_an_analyzer_fall_back_to_python_and_javascript(language):
+    assert extensions_for_language(language) == {".py", ".js", ".jsx", ".ts", ".tsx"} == FALLBACK_EXTENSIONS
+    # Not every registered extension
+    assert len(ANALYZERS) > len(FALLBACK_EXTENSIONS)
@@ -0,0 +1,68 @@
+import networkx as nx
+import pytest
+
+from analyzers.risk_detector import RiskDetector
+
+# module -> modules it imports: cycles a-b-c, b-c-d and c-d, and a self-import
+IMPORTS = {
+    "a": ["b"],
+    "b": ["c"],
+    "c": ["a", "d"],
+    "d": ["c", "b"],
+    "e": ["e", "a"],
+    "f": ["a"]
+}
+
+@pytest.fixture
+def repo(tmp_path):
+    for module, imports in IMPORTS.items():
+        (tmp_path / f"{module}.py").write_text("".join(f"import {name}\n" for name in imports))
+    return tmp_path
+
+def cycle_risks(detector: RiskDetector):
+    return [risk for risk in detector.detect_risks() if risk.title == "Circular Dependency"]
+
+def rotations(cycles):
+    """Cycles as a set, compared regardless of the node they start at."""
+    return {frozenset(zip(cycle, cycle[1:] + cycle[:1])) for cycle in cycles}
+
+def test_canonical_cycles_start_at_the_smallest_node_in_sorted_order():
+    cycles = [["d", "c"], ["c", "a", "b"], ["x"], ["c", "d", "b"]]
+    
+    assert RiskDetector.canonical_cycles(cycles) == [["a", "b", "c"], ["b", "c", "d"], ["c", "d"], ["x"]]
+
+def test_cycles_match_simple_cycles(repo):
+    detector = RiskDetector(repo, "python")
+    risks = cycle_risks(detector)
+    
+    expected = [cycle for cycle in nx.simple_cycles(detector.graph) if len(cycle) > 1]
+    assert len(risks) == len(expected) == 3
+    assert rotations(risk.files for risk in risks) == rotations(expected)
+
+def test_cycles_are_reported_canonically(repo):
+    risks = cycle_risks(RiskDetector(repo, "python"))
+    
+    assert [risk.files for risk in risks] == [["a.py", "b.py", "c.py"], ["b.py", "c.py", "d.py"], ["c.py", "d.py"]]
+    assert risks[2].evidence == "Files form a circular dependency chain: c.py -> d.py -> c.py"
+    assert all(risk.confidence == "high" for risk in risks)
+
+@pytest.mark.parametrize("order", [list(IMPORTS), list(reversed(IMPORTS))])
+def test_cycles_do_not_depend_on_graph_order(repo, order):
+    detector = RiskDetector(repo, "python")
+    detector.detect_risks()
+    # The same graph with nodes and edges inserted in another order
+    shuffled = nx.DiGraph()
+    shuffled.add_nodes_from(f"{module}.py" for module in order)
+    shuffled.add_edges_from(sorted(detector.graph.edges(), key=lambda edge: order.index(edge[0][:-3]), reverse=True))
+    detector.graph = shuffled
+    
+    assert [risk.files for risk in detector._detect_circular_dependencies()] == [
+        ["a.py", "b.py", "c.py"], ["b.py", "c.py", "d.py"], ["c.py", "d.py"]
+    ]
+
+def test_max_cycles_caps_enumeration(repo):
+    risks = cycle_risks(RiskDetector(repo, "python", max_cycles=2))
+    
+    # The self-import counts towards the cap but is not reported
+    assert 1 <= len(risks) <= 2
+    assert rotations(risk.files for risk in risks) <= rotations([["a.py", "b.py", "c.py"], ["b.py", "c.py", "d.py"], ["c.py", "d.py"]])
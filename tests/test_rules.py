@@ -0,0 +1,208 @@
+import json
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from analyzers.risk_detector import RiskDetector
+from analyzers.rules import DEFAULT_THRESHOLDS, RuleEngine, load_thresholds
+from config import get_settings
+
+CONFIDENCE = ['high', 'medium', 'low']
+
+# The file-level checks as RiskDetector hard-coded them before the rule engine,
+# one loop per check, in detect_risks' order
+
+def reference_file_risks(paths, m, graph, t=DEFAULT_THRESHOLDS):
+    risks = []
+    for i, path in enumerate(paths):
+        if m['loc'][i] > t['god_file_loc'] or m['complexity'][i] > t['god_file_complexity']:
+            risks.append((
+                "God File Detected", path,
+                f"File has {m['loc'][i]} lines of code and complexity score of {m['complexity'][i]}. "
+                f"Depended on by {m['fan_in'][i]} other files.",
+                f"Consider breaking {path} into smaller, focused modules. "
+                "Extract related functionality into separate files with clear responsibilities.",
+                'high' if m['loc'][i] > t['god_file_loc'] * 1.5 else 'medium'
+            ))
+    for i, path in enumerate(paths):
+        if m['fan_in'][i] >= t['high_fan_in']:
+            dependents = list(graph.predecessors(path))[:5]
+            risks.append((
+                "High Fan-In (Central File)", path,
+                f"File is depended upon by {m['fan_in'][i]} other files. Dependents: {', '.join(dependents)}",
+                "Consider if this file has too many responsibilities. "
+                "Extract interfaces or abstract base classes to reduce direct coupling.",
+                'medium'
+            ))
+        if m['fan_out'][i] >= t['high_fan_out']:
+            dependencies = list(graph.successors(path))[:5]
+            risks.append((
+                "High Fan-Out (Excessive Dependencies)", path,
+                f"File depends on {m['fan_out'][i]} other files. Dependencies: {', '.join(dependencies)}",
+                "Apply dependency injection or use facade pattern to reduce direct dependencies. "
+                "Consider if this file is doing too much.",
+                'medium'
+            ))
+    db_keywords = {'database', 'db', 'model', 'schema', 'query', 'mongo', 'sql'}
+    api_keywords = {'api', 'route', 'endpoint', 'controller', 'handler', 'view'}
+    for path in paths:
+        lowered = path.lower()
+        if any(kw in lowered for kw in db_keywords) and any(kw in lowered for kw in api_keywords):
+            risks.append((
+                "Potential Layer Violation", path,
+                "File appears to mix database and API concerns based on naming and structure.",
+                "Introduce a service layer to separate business logic from controllers. "
+                "Keep database access in dedicated repository or data access files.",
+                'low'
+            ))
+    return risks
+
+def reference_hotspots(m, days, t=DEFAULT_THRESHOLDS):
+    commits, loc, complexity = (np.asarray(m[name]) for name in ('commits', 'loc', 'complexity'))
+    mask = (commits >= t['hotspot_min_commits']) & (
+        (complexity >= t['hotspot_min_complexity']) | (loc >= t['hotspot_min_loc'])
+    )
+    score = commits * np.maximum(complexity, 1)
+    flagged = np.flatnonzero(mask)
+    flagged = flagged[np.argsort(-score[flagged], kind='stable')][:20]
+    
+    risks = []
+    for i in flagged:
+        path = m['paths'][i]
+        churn = f" ({m['churned_lines'][i]} lines added or removed)" if 'churned_lines' in m else ""
+        risks.append((
+            "Change Hotspot", path,
+            f"File changed in {commits[i]} commits over the last {days} days{churn}. "
+            f"It has {loc[i]} lines of code, complexity score of {complexity[i]} "
+            f"and is depended on by {m['fan_in'][i]} other files.",
+            f"Prioritise {path} for refactoring and test coverage. "
+            "Look for the responsibilities that keep changing and extract them into their own modules.",
+            'high' if loc[i] > t['god_file_loc'] or complexity[i] > t['god_file_complexity'] else 'medium'
+        ))
+    return risks
+
+def summary(risks):
+    return [(risk.title, *risk.files, risk.evidence, risk.suggested_action, risk.confidence.value) for risk in risks]
+
+def by_confidence(risks):
+    return sorted(risks, key=lambda risk: CONFIDENCE.index(risk[-1]))
+
+def random_columns(seed: int, n: int = 300):
+    """Metric columns and import graph of n files, some named like mixed layers."""
+    rng = np.random.default_rng(seed)
+    names = ["api/db_routes", "models/user_view", "core/util", "handlers/query", "lib/parse", "sql/schema"]
+    paths = [f"{names[i % len(names)]}_{i}.py" for i in range(n)]
+    graph = nx.DiGraph()
+    graph.add_nodes_from(paths)
+    # A few hubs and a few files importing many others
+    for u, v in rng.integers(0, n, size=(n * 3, 2)).tolist():
+        if u != v:
+            graph.add_edge(paths[u], paths[v if rng.random() < 0.7 else v % 8])
+    columns = {
+        'paths': paths,
+        'loc': rng.integers(0, 1000, size=n),
+        'complexity': rng.integers(0, 45, size=n),
+        'fan_in': np.array([graph.in_degree(p) for p in paths]),
+        'fan_out': np.array([graph.out_degree(p) for p in paths])
+    }
+    return columns, graph
+
+def graph_context(paths, graph):
+    return {
+        'dependents': lambda i: ', '.join(list(graph.predecessors(paths[i]))[:5]),
+        'dependencies': lambda i: ', '.join(list(graph.successors(paths[i]))[:5])
+    }
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_file_rules_match_the_hard_coded_checks(seed):
+    columns, graph = random_columns(seed)
+    
+    risks = RuleEngine().evaluate(columns, graph_context(columns['paths'], graph))
+    
+    expected = reference_file_risks(columns['paths'], columns, graph)
+    # Every rule fires somewhere, so each is covered
+    assert {risk[0] for risk in expected} >= {"God File Detected", "High Fan-In (Central File)", "Potential Layer Violation"}
+    assert summary(risks) == expected
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_file_rules_match_with_overridden_thresholds(seed):
+    columns, graph = random_columns(seed)
+    thresholds = {**DEFAULT_THRESHOLDS, 'god_file_loc': 900, 'high_fan_in': 4, 'high_fan_out': 4}
+    
+    risks = RuleEngine(thresholds={'god_file_loc': 900, 'high_fan_in': 4, 'high_fan_out': 4}).evaluate(
+        columns, graph_context(columns['paths'], graph)
+    )
+    
+    assert summary(risks) == reference_file_risks(columns['paths'], columns, graph, thresholds)
+
+@pytest.mark.parametrize("seed, with_churn", [(0, True), (1, False), (2, True)])
+def test_hotspots_match_the_hard_coded_check(seed, with_churn):
+    columns, _ = random_columns(seed)
+    rng = np.random.default_rng(seed)
+    columns['commits'] = rng.integers(0, 12, size=len(columns['paths']))
+    if with_churn:
+        columns['churned_lines'] = rng.integers(0, 5000, size=len(columns['paths']))
+    metrics = {name: list(column) for name, column in columns.items()}
+    
+    risks = RiskDetector.detect_hotspots(metrics, 90)
+    
+    expected = reference_hotspots(metrics, 90)
+    # Enough candidates that the top-20 cut and the ranking matter
+    assert len(expected) == 20
+    assert summary(risks) == expected
+
+def test_file_rules_skip_hotspots_without_commits():
+    columns, graph = random_columns(0)
+    
+    risks = RuleEngine().evaluate(columns, graph_context(columns['paths'], graph))
+    
+    assert all(risk.title != "Change Hotspot" for risk in risks)
+    assert RiskDetector.detect_hotspots({name: list(column) for name, column in columns.items()}, 90) == []
+
+def test_detector_matches_the_hard_coded_checks(tmp_path):
+    # A hub imported by 11 files, a file importing 16, a god file and a mixed-layer file
+    for i in range(16):
+        (tmp_path / f"leaf{i}.py").write_text("import hub\n" if i < 11 else "x = 1\n")
+    (tmp_path / "hub.py").write_text("x = 1\n")
+    (tmp_path / "wide.py").write_text("".join(f"import leaf{i}\n" for i in range(16)))
+    (tmp_path / "big.py").write_text("".join(f"value_{i} = {i}\n" for i in range(800)))
+    (tmp_path / "api").mkdir()
+    (tmp_path / "api" / "db_routes.py").write_text("import hub\n")
+    detector = RiskDetector(tmp_path, "python")
+    
+    risks = [risk for risk in detector.detect_risks() if risk.title != "Circular Dependency"]
+    
+    expected = reference_file_risks(detector.paths, detector.metrics, detector.graph)
+    assert {risk[0] for risk in expected} == {
+        "God File Detected", "High Fan-In (Central File)", "High Fan-Out (Excessive Dependencies)", "Potential Layer Violation"
+    }
+    assert summary(risks) == by_confidence(expected)
+
+@pytest.fixture
+def rules_file(tmp_path, monkeypatch):
+    path = tmp_path / "rules.json"
+    monkeypatch.setattr(get_settings(), "risk_rules_file", str(path))
+    return path
+
+def test_thresholds_default_without_a_rules_file(monkeypatch):
+    monkeypatch.setattr(get_settings(), "risk_rules_file", "")
+    
+    assert load_thresholds("octo-org") == DEFAULT_THRESHOLDS
+
+def test_rules_file_overrides_for_everyone_and_per_organization(rules_file):
+    rules_file.write_text(json.dumps({
+        "thresholds": {"god_file_loc": 800, "unknown_rule": 3, "high_fan_in": "many"},
+        "organizations": {"Octo-Org": {"high_fan_in": 20, "high_fan_out": True}}
+    }))
+    
+    assert load_thresholds() == {**DEFAULT_THRESHOLDS, 'god_file_loc': 800}
+    assert load_thresholds("other") == {**DEFAULT_THRESHOLDS, 'god_file_loc': 800}
+    assert load_thresholds("octo-org") == {**DEFAULT_THRESHOLDS, 'god_file_loc': 800, 'high_fan_in': 20}
+
+def test_unreadable_rules_file_falls_back_to_defaults(rules_file):
+    rules_file.write_text("{not json")
+    assert load_thresholds("octo-org") == DEFAULT_THRESHOLDS
+    
+    rules_file.write_text(json.dumps({"thresholds": ["god_file_loc", 800]}))
+    assert load_thresholds("octo-org") == DEFAULT_THRESHOLDS
@@ -0,0 +1,154 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from config import get_settings
+from services import single_flight
+from services.single_flight import AnalysisSingleFlight, analysis_key
+
+pytestmark = pytest.mark.anyio
+
+KEY = analysis_key(7, "a" * 40)
+
+@pytest.fixture
+def flights(db, clock, monkeypatch):
+    """A flight coordinator on the test clock, with a short poll and a 60 second lease."""
+    # Ahead of the wall clock, which mongomock's TTL index expires documents by
+    clock.now = datetime.now(timezone.utc) + timedelta(days=1)
+    monkeypatch.setattr(single_flight, "_now", clock)
+    monkeypatch.setattr(AnalysisSingleFlight, "_indexes_ready", False)
+    monkeypatch.setattr(get_settings(), "single_flight_poll_seconds", 0.01)
+    monkeypatch.setattr(get_settings(), "single_flight_lease_seconds", 60)
+    monkeypatch.setattr(get_settings(), "single_flight_reuse_seconds", 60)
+    return AnalysisSingleFlight(db)
+
+class Compute:
+    """An analysis that counts its runs and, when gated, waits for its gate to open."""
+    
+    def __init__(self, db, analysis_id="mine", gated=False):
+        self.db = db
+        self.analysis_id = analysis_id
+        self.calls = 0
+        self.gate = asyncio.Event()
+        if not gated:
+            self.gate.set()
+    
+    async def __call__(self):
+        self.calls += 1
+        await self.gate.wait()
+        analysis = {"analysis_id": self.analysis_id, "risks": []}
+        await self.db["analyses"].insert_one(dict(analysis))
+        return analysis
+
+async def other_node_flight(db, clock, status, expires_in=60, analysis_id=None):
+    """A flight led by another process."""
+    await db[AnalysisSingleFlight.COLLECTION].insert_one({
+        "_id": KEY,
+        "status": status,
+        "token": "their-token",
+        "owner": "other-node",
+        "analysis_id": analysis_id,
+        "started_at": clock(),
+        "expires_at": clock.stored(expires_in)
+    })
+
+async def run(flights, compute):
+    # A broken takeover keeps following the flight forever; fail instead
+    return await asyncio.wait_for(flights.run(KEY, compute), 5)
+
+async def flight(db):
+    return await db[AnalysisSingleFlight.COLLECTION].find_one({"_id": KEY})
+
+async def test_concurrent_runs_share_one_compute(db, flights):
+    compute = Compute(db, gated=True)
+    
+    first = asyncio.ensure_future(run(flights, compute))
+    second = asyncio.ensure_future(run(AnalysisSingleFlight(db), Compute(db, "theirs")))
+    await asyncio.sleep(0.05)
+    compute.gate.set()
+    
+    assert await first == ({"analysis_id": "mine", "risks": []}, False)
+    assert await second == ({"analysis_id": "mine", "risks": []}, True)
+    assert compute.calls == 1
+    assert (await flight(db))["status"] == AnalysisSingleFlight.DONE
+    assert await db["analyses"].count_documents({}) == 1
+
+async def test_finished_flight_answers_within_reuse_window(db, clock, flights):
+    await run(flights, Compute(db))
+    clock.advance(30)
+    compute = Compute(db, "again")
+    
+    assert await run(flights, compute) == ({"analysis_id": "mine", "risks": []}, True)
+    assert compute.calls == 0
+
+async def test_follower_reads_a_done_flight(db, clock, flights):
+    await other_node_flight(db, clock, AnalysisSingleFlight.DONE, analysis_id="theirs")
+    await db["analyses"].insert_one({"analysis_id": "theirs", "risks": []})
+    compute = Compute(db)
+    
+    assert await run(flights, compute) == ({"analysis_id": "theirs", "risks": []}, True)
+    assert compute.calls == 0
+
+async def test_follower_waits_for_a_running_flight(db, clock, flights):
+    await other_node_flight(db, clock, AnalysisSingleFlight.RUNNING)
+    compute = Compute(db)
+    
+    follower = asyncio.ensure_future(run(flights, compute))
+    await asyncio.sleep(0.05)
+    assert not follower.done()
+    # The other node finishes
+    await db["analyses"].insert_one({"analysis_id": "theirs", "risks": []})
+    await db[AnalysisSingleFlight.COLLECTION].update_one(
+        {"_id": KEY}, {"$set": {"status": AnalysisSingleFlight.DONE, "analysis_id": "theirs"}}
+    )
+    
+    assert await follower == ({"analysis_id": "theirs", "risks": []}, True)
+    assert compute.calls == 0
+
+async def test_failed_flight_is_taken_over(db, clock, flights):
+    await other_node_flight(db, clock, AnalysisSingleFlight.FAILED)
+    compute = Compute(db)
+    
+    assert await run(flights, compute) == ({"analysis_id": "mine", "risks": []}, False)
+    assert compute.calls == 1
+    taken = await flight(db)
+    assert (taken["status"], taken["owner"], taken["analysis_id"]) == (AnalysisSingleFlight.DONE, flights.owner, "mine")
+
+async def test_expired_flight_is_taken_over(db, clock, flights):
+    # Its leader stopped heartbeating a second ago
+    await other_node_flight(db, clock, AnalysisSingleFlight.RUNNING, expires_in=-1)
+    compute = Compute(db)
+    
+    assert await run(flights, compute) == ({"analysis_id": "mine", "risks": []}, False)
+    assert compute.calls == 1
+    assert (await flight(db))["owner"] == flights.owner
+
+async def test_lease_lapsing_while_following_is_taken_over(db, clock, flights):
+    await other_node_flight(db, clock, AnalysisSingleFlight.RUNNING)
+    compute = Compute(db)
+    
+    follower = asyncio.ensure_future(run(flights, compute))
+    await asyncio.sleep(0.05)
+    assert compute.calls == 0
+    clock.advance(61)
+    
+    assert await follower == ({"analysis_id": "mine", "risks": []}, False)
+    assert compute.calls == 1
+
+async def test_done_flight_without_its_analysis_is_taken_over(db, clock, flights):
+    await other_node_flight(db, clock, AnalysisSingleFlight.DONE, analysis_id="deleted")
+    compute = Compute(db)
+    
+    assert await run(flights, compute) == ({"analysis_id": "mine", "risks": []}, False)
+    assert compute.calls == 1
+
+async def test_failed_compute_fails_the_flight_for_the_next_caller(db, flights):
+    async def failing():
+        raise RuntimeError("clone failed")
+    
+    with pytest.raises(RuntimeError):
+        await run(flights, failing)
+    assert (await flight(db))["status"] == AnalysisSingleFlight.FAILED
+    
+    assert await run(flights, Compute(db)) == ({"analysis_id": "mine", "risks": []}, False)
@@ -0,0 +1,181 @@
+import hashlib
+import hmac
+import json
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from auth.dependencies import get_database
+from config import get_settings
+from routes import webhooks
+from services.job_queue import AnalysisJobQueue
+
+pytestmark = pytest.mark.anyio
+
+SECRET = "test-webhook-secret"
+FIXTURES = Path(__file__).resolve().parent.parent / "backend" / "scripts" / "fixtures"
+REPO_ID = 186853002
+
+def recorded(name: str) -> dict:
+    """A recorded GitHub delivery payload."""
+    return json.loads((FIXTURES / f"{name}.json").read_text())
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "github_webhook_secret", SECRET)
+    monkeypatch.setattr(settings, "webhook_debounce_seconds", 30.0)
+    return settings
+
+@pytest.fixture
+async def client(db, settings, clock):
+    app = FastAPI()
+    app.include_router(webhooks.router)
+    app.dependency_overrides[get_database] = lambda: db
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+@pytest.fixture
+async def subscribers(db):
+    """Two users who analyzed the pushed repository, the second most recently in large mode."""
+    await db["analyses"].insert_many([
+        {"repo_id": REPO_ID, "user_github_id": 1, "mode": "standard", "analyzed_at": datetime(2026, 1, 1)},
+        {"repo_id": REPO_ID, "user_github_id": 2, "mode": "standard", "analyzed_at": datetime(2025, 12, 1)},
+        {"repo_id": REPO_ID, "user_github_id": 2, "mode": "large", "analyzed_at": datetime(2025, 12, 20)},
+        {"repo_id": 1, "user_github_id": 3, "mode": "standard", "analyzed_at": datetime(2026, 1, 1)}
+    ])
+
+async def deliver(client, event: str, payload, signature=None):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    return await client.post("/api/webhooks/github", content=body, headers={
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event,
+        "X-GitHub-Delivery": "72d3162e-cc78-11e3-81ab-4c9367dc0958",
+        "X-Hub-Signature-256": signature if signature is not None else sign(body)
+    })
+
+async def jobs(db):
+    return await db[AnalysisJobQueue.COLLECTION].find({}, {"_id": 0}).sort("user_github_id", 1).to_list(None)
+
+@pytest.mark.parametrize("signature", [
+    "",
+    "sha1=0123456789abcdef",
+    "sha256=" + "0" * 64,
+    sign(json.dumps(recorded("github_push")).encode(), secret="another-secret")
+])
+async def test_rejects_invalid_signatures(client, db, subscribers, signature):
+    response = await deliver(client, "push", recorded("github_push"), signature=signature)
+    
+    assert response.status_code == 401
+    assert await jobs(db) == []
+
+async def test_rejects_a_body_changed_after_signing(client, db, subscribers):
+    body = json.dumps(recorded("github_push")).encode()
+    tampered = body.replace(b'"refs/heads/main"', b'"refs/heads/evil"')
+    
+    response = await deliver(client, "push", tampered, signature=sign(body))
+    
+    assert response.status_code == 401
+    assert await jobs(db) == []
+
+async def test_unconfigured_secret_disables_the_webhook(client, db, settings, monkeypatch):
+    monkeypatch.setattr(settings, "github_webhook_secret", "")
+    
+    response = await deliver(client, "push", recorded("github_push"))
+    
+    assert response.status_code == 503
+
+async def test_answers_ping(client):
+    response = await deliver(client, "ping", recorded("github_ping"))
+    
+    assert response.status_code == 200
+    assert response.json() == {"status": "pong"}
+
+@pytest.mark.parametrize("event, payload, reason", [
+    ("pull_request", "github_pull_request", "Unhandled event pull_request"),
+    ("push", "github_push_tag", "Not a push to the default branch: refs/tags/v1.4.0")
+])
+async def test_ignores_events_that_are_not_default_branch_pushes(client, db, subscribers, event, payload, reason):
+    response = await deliver(client, event, recorded(payload))
+    
+    assert response.status_code == 200
+    assert response.json() == {"status": "ignored", "reason": reason}
+    assert await jobs(db) == []
+
+async def test_ignores_branch_deletion(client, db, subscribers):
+    payload = recorded("github_push")
+    payload.update(deleted=True, after="0" * 40)
+    
+    response = await deliver(client, "push", payload)
+    
+    assert response.json()["status"] == "ignored"
+    assert await jobs(db) == []
+
+async def test_ignores_repositories_nobody_analyzed(client, db):
+    response = await deliver(client, "push", recorded("github_push"))
+    
+    assert response.json() == {"status": "ignored", "reason": "Repository has not been analyzed by any user"}
+    assert await jobs(db) == []
+
+async def test_push_queues_a_delayed_job_per_subscriber(client, db, clock, subscribers):
+    payload = recorded("github_push")
+    
+    response = await deliver(client, "push", payload)
+    
+    assert response.status_code == 200
+    assert response.json()["status"] == "queued"
+    queued = await jobs(db)
+    assert sorted(job["job_id"] for job in queued) == sorted(response.json()["jobs"])
+    assert [(job["user_github_id"], job["large_repo"]) for job in queued] == [(1, False), (2, True)]
+    for job in queued:
+        assert job["status"] == AnalysisJobQueue.QUEUED
+        assert job["commit_sha"] == payload["after"]
+        assert job["repo"]["full_name"] == "octo-org/octo-service"
+        assert job["not_before"] == clock.stored(30)
+
+async def test_push_burst_coalesces_into_one_job_for_the_latest_commit(client, db, clock, subscribers):
+    payload = recorded("github_push")
+    responses = []
+    for i, after in enumerate(["a" * 40, "b" * 40, "c" * 40]):
+        if i:
+            clock.advance(10)
+        payload["after"] = after
+        responses.append((await deliver(client, "push", payload)).json())
+    
+    # Every delivery answers with the same jobs, one per subscriber
+    assert responses[0]["jobs"] == responses[1]["jobs"] == responses[2]["jobs"]
+    queued = await jobs(db)
+    assert len(queued) == 2
+    for job in queued:
+        assert job["coalesced"] == 3
+        assert job["commit_sha"] == "c" * 40
+        # Debounced: the job waits for the pushes to settle after the last one
+        assert job["not_before"] == clock.stored(30)
+    
+    # Once a worker claims the job, the next push queues a new one
+    assert await AnalysisJobQueue(db).claim("w1") is None
+    clock.advance(30)
+    claimed = await AnalysisJobQueue(db).claim("w1")
+    payload["after"] = "d" * 40
+    response = await deliver(client, "push", payload)
+    assert claimed["job_id"] not in response.json()["jobs"]
+    assert len(await jobs(db)) == 3
+
+@pytest.mark.parametrize("body", [
+    b"not json",
+    b"[]",
+    json.dumps({"ref": "refs/heads/main", "after": "a" * 40}).encode(),
+    json.dumps({"ref": "refs/heads/main", "repository": "octo-org/octo-service"}).encode(),
+    json.dumps({"ref": "refs/heads/main", "repository": {"id": REPO_ID, "default_branch": "main"}}).encode()
+])
+async def test_rejects_a_signed_but_malformed_push(client, db, subscribers, body):
+    response = await deliver(client, "push", body)
+    
+    assert response.status_code == 400
+    assert await jobs(db) == []
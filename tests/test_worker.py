@@ -0,0 +1,65 @@
+import pytest
+from git import Actor, Repo
+
+from config import get_settings
+from services.job_queue import AnalysisJobQueue
+from services.single_flight import AnalysisSingleFlight, analysis_key
+from worker import AnalysisWorker
+
+pytestmark = pytest.mark.anyio
+
+AUTHOR = Actor("Dev", "dev@example.com")
+USER = {"github_id": 1, "username": "dev", "access_token": "token"}
+
+@pytest.fixture
+def origin(tmp_path):
+    """A repository whose branch moved on after a push: (repo, pushed sha, head sha)."""
+    path = tmp_path / "origin"
+    repo = Repo.init(path, initial_branch="main")
+    (path / "app.py").write_text("import models\n")
+    (path / "models.py").write_text("x = 1\n")
+    repo.index.add(["app.py", "models.py"])
+    pushed = repo.index.commit("pushed", author=AUTHOR, committer=AUTHOR).hexsha
+    (path / "cli.py").write_text("import app\n")
+    repo.index.add(["cli.py"])
+    head = repo.index.commit("pushed later", author=AUTHOR, committer=AUTHOR).hexsha
+    return {
+        "id": 7, "name": "origin", "full_name": "octo-org/origin", "clone_url": path.as_uri(),
+        "default_branch": "main", "size": 1
+    }, pushed, head
+
+async def run_job(db, repo, commit_sha):
+    await db["users"].insert_one(dict(USER))
+    queue = AnalysisJobQueue(db)
+    await queue.enqueue_coalesced(repo, USER["github_id"], "push:7:refs/heads/main:1", commit_sha, 0)
+    job = await queue.claim("w1")
+    await AnalysisWorker(db, "w1").process(job)
+    return await db[AnalysisJobQueue.COLLECTION].find_one({"job_id": job["job_id"]})
+
+@pytest.mark.parametrize("clone_mode, history_days", [("sparse", 0), ("full", 0), ("full", 30)])
+async def test_push_job_analyzes_the_pushed_commit_not_the_branch_head(db, origin, monkeypatch, clone_mode, history_days):
+    monkeypatch.setattr(get_settings(), "clone_mode", clone_mode)
+    monkeypatch.setattr(get_settings(), "history_days", history_days)
+    repo, pushed, _ = origin
+    
+    job = await run_job(db, repo, pushed)
+    
+    assert job["status"] == AnalysisJobQueue.SUCCEEDED
+    analysis = await db["analyses"].find_one({"analysis_id": job["analysis_id"]})
+    assert analysis["commit_sha"] == pushed
+    # cli.py only exists at the branch head
+    assert analysis["feasibility"]["stats"]["total_files"] == 2
+    flight = await db[AnalysisSingleFlight.COLLECTION].find_one({})
+    assert flight["_id"] == analysis_key(repo["id"], pushed)
+    if history_days:
+        assert analysis["history"]["commits"] == 1
+
+async def test_push_job_fails_when_the_commit_is_gone(db, origin):
+    repo, _, _ = origin
+    
+    job = await run_job(db, repo, "0123456789abcdef0123456789abcdef01234567")
+    
+    # Retried later rather than analyzing whatever the branch points at now
+    assert job["status"] == AnalysisJobQueue.QUEUED
+    assert job["error"].startswith("Failed to clone repository")
+    assert await db["analyses"].count_documents({}) == 0